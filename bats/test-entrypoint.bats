@@ -9,17 +9,49 @@ setup() {
   run docker run --rm \
     -e INPUT_INPUT_FILE="entrypoint.sh" \
     -e INPUT_OUTPUT_FILE="test_output.txt" \
+    -e INPUT_OUTPUT_STREAMING=true \
+    -e INPUT_INPUT_DIFF_PRUNING=true \
+    -e INPUT_INPUT_DIFF_EXCLUDE="docs/api/*,*.svg" \
+    -e INPUT_INPUT_DIFF_MAX_TOKENS=30000 \
     -e INPUT_AGENT_TYPE=router \
     -e INPUT_AGENT_PROVIDER=openrouter \
     -e INPUT_AGENT_MODEL=test_model \
     -e INPUT_AGENT_TEMPERATURE=0.7 \
+    -e INPUT_AGENT_FALLBACKS="anthropic:claude-3-5-sonnet-20240620" \
     -e INPUT_AGENT_PREAMBLE_ENABLED=true \
     -e INPUT_AGENT_PREAMBLE="Sample Preamble" \
+    -e INPUT_AGENT_INPUT_REFERENCES=true \
+    -e INPUT_AGENT_OUTPUT_PASSTHROUGH=true \
+    -e INPUT_AGENT_FAST_PATH=true \
+    -e INPUT_AGENT_TOOL_BINDING=run_pattern \
+    -e INPUT_AGENT_TOOLS_TOP_K=10 \
+    -e INPUT_AGENT_HIERARCHICAL_ROUTING=true \
+    -e INPUT_AGENT_ROUTING_CACHE=true \
+    -e INPUT_AGENT_CONTEXT_TOKENS=20000 \
+    -e INPUT_AGENT_RECENT_COMMENTS=3 \
+    -e INPUT_AGENT_HISTORY_COMPACTION=true \
+    -e INPUT_AGENT_MAX_TOKENS=100000 \
+    -e INPUT_AGENT_MAX_COST=0.5 \
+    -e INPUT_AGENT_MAX_SECONDS=300 \
     -e INPUT_FABRIC_PROVIDER=anthropic \
     -e INPUT_FABRIC_MODEL=fabric_model_test \
     -e INPUT_FABRIC_TEMPERATURE=0.8 \
+    -e INPUT_FABRIC_FALLBACKS="openrouter:openai/gpt-4o,openai:gpt-4o-mini" \
     -e INPUT_FABRIC_PATTERNS_INCLUDED="pattern1,pattern2" \
     -e INPUT_FABRIC_PATTERNS_EXCLUDED="pattern3,pattern4" \
+    -e INPUT_FABRIC_TIMEOUT=120 \
+    -e INPUT_FABRIC_MAX_RETRIES=2 \
+    -e INPUT_FABRIC_HEDGE_DELAY=30 \
+    -e INPUT_FABRIC_CHUNK_TOKENS=50000 \
+    -e INPUT_FABRIC_MAX_CONCURRENT_CHUNKS=8 \
+    -e INPUT_FABRIC_CACHE_DIR=".fabric-cache" \
+    -e INPUT_FABRIC_CACHE_TTL=3600 \
+    -e INPUT_FABRIC_CACHE_MAX_ENTRIES=100 \
+    -e INPUT_LLM_REQUESTS_PER_MINUTE=500 \
+    -e INPUT_LLM_TOKENS_PER_MINUTE=30000 \
+    -e INPUT_DEADLINE=1500 \
+    -e INPUT_DEADLINE_THRESHOLD=120 \
+    -e INPUT_DEADLINE_FALLBACK="openai:gpt-4o-mini" \
     -e INPUT_VERBOSE=true \
     -e INPUT_DEBUG=true \
     test-fabric-agent-action
@@ -29,17 +61,49 @@ setup() {
 
   # Check for expected output
   [[ "$output" =~ "-i 'entrypoint.sh' -o 'test_output.txt'" ]]
+  [[ "$output" =~ "--output-streaming" ]]
+  [[ "$output" =~ "--input-diff-pruning" ]]
+  [[ "$output" =~ "--input-diff-exclude 'docs/api/*,*.svg'" ]]
+  [[ "$output" =~ "--input-diff-max-tokens '30000'" ]]
   [[ "$output" =~ "--agent-type 'router'" ]]
   [[ "$output" =~ "--agent-provider 'openrouter'" ]]
   [[ "$output" =~ "--agent-model 'test_model'" ]]
   [[ "$output" =~ "--agent-temperature '0.7'" ]]
+  [[ "$output" =~ "--agent-fallbacks 'anthropic:claude-3-5-sonnet-20240620'" ]]
   [[ "$output" =~ "--agent-preamble-enabled" ]]
   [[ "$output" =~ "--agent-preamble 'Sample Preamble'" ]]
+  [[ "$output" =~ "--agent-input-references" ]]
+  [[ "$output" =~ "--agent-output-passthrough" ]]
+  [[ "$output" =~ "--agent-fast-path" ]]
+  [[ "$output" =~ "--agent-tool-binding 'run_pattern'" ]]
+  [[ "$output" =~ "--agent-tools-top-k '10'" ]]
+  [[ "$output" =~ "--agent-hierarchical-routing" ]]
+  [[ "$output" =~ "--agent-routing-cache" ]]
+  [[ "$output" =~ "--agent-context-tokens '20000'" ]]
+  [[ "$output" =~ "--agent-recent-comments '3'" ]]
+  [[ "$output" =~ "--agent-history-compaction" ]]
+  [[ "$output" =~ "--agent-max-tokens '100000'" ]]
+  [[ "$output" =~ "--agent-max-cost '0.5'" ]]
+  [[ "$output" =~ "--agent-max-seconds '300'" ]]
   [[ "$output" =~ "--fabric-provider 'anthropic'" ]]
   [[ "$output" =~ "--fabric-model 'fabric_model_test'" ]]
   [[ "$output" =~ "--fabric-temperature '0.8'" ]]
+  [[ "$output" =~ "--fabric-fallbacks 'openrouter:openai/gpt-4o,openai:gpt-4o-mini'" ]]
   [[ "$output" =~ "--fabric-patterns-included 'pattern1,pattern2'" ]]
   [[ "$output" =~ "--fabric-patterns-excluded 'pattern3,pattern4'" ]]
+  [[ "$output" =~ "--fabric-timeout '120'" ]]
+  [[ "$output" =~ "--fabric-max-retries '2'" ]]
+  [[ "$output" =~ "--fabric-hedge-delay '30'" ]]
+  [[ "$output" =~ "--fabric-chunk-tokens '50000'" ]]
+  [[ "$output" =~ "--fabric-max-concurrent-chunks '8'" ]]
+  [[ "$output" =~ "--fabric-cache-dir '.fabric-cache'" ]]
+  [[ "$output" =~ "--fabric-cache-ttl '3600'" ]]
+  [[ "$output" =~ "--fabric-cache-max-entries '100'" ]]
+  [[ "$output" =~ "--llm-requests-per-minute '500'" ]]
+  [[ "$output" =~ "--llm-tokens-per-minute '30000'" ]]
+  [[ "$output" =~ "--deadline '1500'" ]]
+  [[ "$output" =~ "--deadline-threshold '120'" ]]
+  [[ "$output" =~ "--deadline-fallback 'openai:gpt-4o-mini'" ]]
   [[ "$output" =~ "--verbose" ]]
   [[ "$output" =~ "--debug" ]]
 }
@@ -57,16 +121,46 @@ setup() {
   # Check for expected output without the optional variables
   [[ "$output" =~ "-i 'entrypoint.sh' -o 'test_output.txt'" ]]
   [[ "$output" =~ "--agent-type 'react'" ]]
+  [[ ! "$output" =~ "--output-streaming" ]]
+  [[ ! "$output" =~ "--input-diff-pruning" ]]
+  [[ ! "$output" =~ "--input-diff-exclude" ]]
+  [[ ! "$output" =~ "--input-diff-max-tokens" ]]
   [[ ! "$output" =~ "--agent-provider" ]]
   [[ ! "$output" =~ "--agent-model" ]]
   [[ ! "$output" =~ "--agent-temperature" ]]
+  [[ ! "$output" =~ "--agent-fallbacks" ]]
   [[ ! "$output" =~ "--agent-preamble-enabled" ]]
   [[ ! "$output" =~ "--agent-preamble" ]]
+  [[ ! "$output" =~ "--agent-input-references" ]]
+  [[ ! "$output" =~ "--agent-output-passthrough" ]]
+  [[ ! "$output" =~ "--agent-fast-path" ]]
+  [[ ! "$output" =~ "--agent-tool-binding" ]]
+  [[ ! "$output" =~ "--agent-tools-top-k" ]]
+  [[ ! "$output" =~ "--agent-hierarchical-routing" ]]
+  [[ ! "$output" =~ "--agent-routing-cache" ]]
+  [[ ! "$output" =~ "--agent-context-tokens" ]]
+  [[ ! "$output" =~ "--agent-recent-comments" ]]
+  [[ ! "$output" =~ "--agent-history-compaction" ]]
+  [[ ! "$output" =~ "--agent-max-tokens" ]]
+  [[ ! "$output" =~ "--agent-max-cost" ]]
+  [[ ! "$output" =~ "--agent-max-seconds" ]]
   [[ ! "$output" =~ "--fabric-provider" ]]
   [[ ! "$output" =~ "--fabric-model" ]]
   [[ ! "$output" =~ "--fabric-temperature" ]]
+  [[ ! "$output" =~ "--fabric-fallbacks" ]]
   [[ ! "$output" =~ "--fabric-patterns-included" ]]
   [[ ! "$output" =~ "--fabric-patterns-excluded" ]]
+  [[ ! "$output" =~ "--fabric-timeout" ]]
+  [[ ! "$output" =~ "--fabric-max-retries" ]]
+  [[ ! "$output" =~ "--fabric-hedge-delay" ]]
+  [[ ! "$output" =~ "--fabric-chunk-tokens" ]]
+  [[ ! "$output" =~ "--fabric-max-concurrent-chunks" ]]
+  [[ ! "$output" =~ "--fabric-cache-dir" ]]
+  [[ ! "$output" =~ "--fabric-cache-ttl" ]]
+  [[ ! "$output" =~ "--fabric-cache-max-entries" ]]
+  [[ ! "$output" =~ "--llm-requests-per-minute" ]]
+  [[ ! "$output" =~ "--llm-tokens-per-minute" ]]
+  [[ ! "$output" =~ "--deadline" ]]
   [[ ! "$output" =~ "--verbose" ]]
   [[ ! "$output" =~ "--debug" ]]
 }
@@ -18,6 +18,22 @@ else
     ARGS="-h"
 fi
 
+if [ "$INPUT_OUTPUT_STREAMING" = 'true' ]; then
+    ARGS="$ARGS --output-streaming"
+fi
+
+if [ "$INPUT_INPUT_DIFF_PRUNING" = 'true' ]; then
+    ARGS="$ARGS --input-diff-pruning"
+fi
+
+if [ -n "$INPUT_INPUT_DIFF_EXCLUDE" ]; then
+    ARGS="$ARGS --input-diff-exclude '$INPUT_INPUT_DIFF_EXCLUDE'"
+fi
+
+if [ -n "$INPUT_INPUT_DIFF_MAX_TOKENS" ]; then
+    ARGS="$ARGS --input-diff-max-tokens '$INPUT_INPUT_DIFF_MAX_TOKENS'"
+fi
+
 if [ -n "$INPUT_AGENT_TYPE" ]; then
     ARGS="$ARGS --agent-type '$INPUT_AGENT_TYPE'"
 fi
@@ -34,6 +50,10 @@ if [ -n "$INPUT_AGENT_TEMPERATURE" ]; then
     ARGS="$ARGS --agent-temperature '$INPUT_AGENT_TEMPERATURE'"
 fi
 
+if [ -n "$INPUT_AGENT_FALLBACKS" ]; then
+    ARGS="$ARGS --agent-fallbacks '$INPUT_AGENT_FALLBACKS'"
+fi
+
 if [ "$INPUT_AGENT_PREAMBLE_ENABLED" = 'true' ]; then
     ARGS="$ARGS --agent-preamble-enabled"
 fi
@@ -42,6 +62,58 @@ if [ -n "$INPUT_AGENT_PREAMBLE" ]; then
     ARGS="$ARGS --agent-preamble '$INPUT_AGENT_PREAMBLE'"
 fi
 
+if [ "$INPUT_AGENT_INPUT_REFERENCES" = 'true' ]; then
+    ARGS="$ARGS --agent-input-references"
+fi
+
+if [ "$INPUT_AGENT_OUTPUT_PASSTHROUGH" = 'true' ]; then
+    ARGS="$ARGS --agent-output-passthrough"
+fi
+
+if [ -n "$INPUT_AGENT_TOOL_BINDING" ]; then
+    ARGS="$ARGS --agent-tool-binding '$INPUT_AGENT_TOOL_BINDING'"
+fi
+
+if [ -n "$INPUT_AGENT_TOOLS_TOP_K" ]; then
+    ARGS="$ARGS --agent-tools-top-k '$INPUT_AGENT_TOOLS_TOP_K'"
+fi
+
+if [ "$INPUT_AGENT_HIERARCHICAL_ROUTING" = 'true' ]; then
+    ARGS="$ARGS --agent-hierarchical-routing"
+fi
+
+if [ "$INPUT_AGENT_ROUTING_CACHE" = 'true' ]; then
+    ARGS="$ARGS --agent-routing-cache"
+fi
+
+if [ -n "$INPUT_AGENT_CONTEXT_TOKENS" ]; then
+    ARGS="$ARGS --agent-context-tokens '$INPUT_AGENT_CONTEXT_TOKENS'"
+fi
+
+if [ -n "$INPUT_AGENT_RECENT_COMMENTS" ]; then
+    ARGS="$ARGS --agent-recent-comments '$INPUT_AGENT_RECENT_COMMENTS'"
+fi
+
+if [ "$INPUT_AGENT_HISTORY_COMPACTION" = 'true' ]; then
+    ARGS="$ARGS --agent-history-compaction"
+fi
+
+if [ -n "$INPUT_AGENT_MAX_TOKENS" ]; then
+    ARGS="$ARGS --agent-max-tokens '$INPUT_AGENT_MAX_TOKENS'"
+fi
+
+if [ -n "$INPUT_AGENT_MAX_COST" ]; then
+    ARGS="$ARGS --agent-max-cost '$INPUT_AGENT_MAX_COST'"
+fi
+
+if [ -n "$INPUT_AGENT_MAX_SECONDS" ]; then
+    ARGS="$ARGS --agent-max-seconds '$INPUT_AGENT_MAX_SECONDS'"
+fi
+
+if [ "$INPUT_AGENT_FAST_PATH" = 'true' ]; then
+    ARGS="$ARGS --agent-fast-path"
+fi
+
 if [ -n "$INPUT_FABRIC_PROVIDER" ]; then
     ARGS="$ARGS --fabric-provider '$INPUT_FABRIC_PROVIDER'"
 fi
@@ -54,6 +126,10 @@ if [ -n "$INPUT_FABRIC_TEMPERATURE" ]; then
     ARGS="$ARGS --fabric-temperature '$INPUT_FABRIC_TEMPERATURE'"
 fi
 
+if [ -n "$INPUT_FABRIC_FALLBACKS" ]; then
+    ARGS="$ARGS --fabric-fallbacks '$INPUT_FABRIC_FALLBACKS'"
+fi
+
 if [ -n "$INPUT_FABRIC_PATTERNS_INCLUDED" ]; then
     ARGS="$ARGS --fabric-patterns-included '$INPUT_FABRIC_PATTERNS_INCLUDED'"
 fi
@@ -66,6 +142,58 @@ if [ -n "$INPUT_FABRIC_MAX_NUM_TURNS" ]; then
     ARGS="$ARGS --fabric-max-num-turns '$INPUT_FABRIC_MAX_NUM_TURNS'"
 fi
 
+if [ -n "$INPUT_FABRIC_TIMEOUT" ]; then
+    ARGS="$ARGS --fabric-timeout '$INPUT_FABRIC_TIMEOUT'"
+fi
+
+if [ -n "$INPUT_FABRIC_MAX_RETRIES" ]; then
+    ARGS="$ARGS --fabric-max-retries '$INPUT_FABRIC_MAX_RETRIES'"
+fi
+
+if [ -n "$INPUT_FABRIC_HEDGE_DELAY" ]; then
+    ARGS="$ARGS --fabric-hedge-delay '$INPUT_FABRIC_HEDGE_DELAY'"
+fi
+
+if [ -n "$INPUT_FABRIC_CHUNK_TOKENS" ]; then
+    ARGS="$ARGS --fabric-chunk-tokens '$INPUT_FABRIC_CHUNK_TOKENS'"
+fi
+
+if [ -n "$INPUT_FABRIC_MAX_CONCURRENT_CHUNKS" ]; then
+    ARGS="$ARGS --fabric-max-concurrent-chunks '$INPUT_FABRIC_MAX_CONCURRENT_CHUNKS'"
+fi
+
+if [ -n "$INPUT_FABRIC_CACHE_DIR" ]; then
+    ARGS="$ARGS --fabric-cache-dir '$INPUT_FABRIC_CACHE_DIR'"
+fi
+
+if [ -n "$INPUT_FABRIC_CACHE_TTL" ]; then
+    ARGS="$ARGS --fabric-cache-ttl '$INPUT_FABRIC_CACHE_TTL'"
+fi
+
+if [ -n "$INPUT_FABRIC_CACHE_MAX_ENTRIES" ]; then
+    ARGS="$ARGS --fabric-cache-max-entries '$INPUT_FABRIC_CACHE_MAX_ENTRIES'"
+fi
+
+if [ -n "$INPUT_LLM_REQUESTS_PER_MINUTE" ]; then
+    ARGS="$ARGS --llm-requests-per-minute '$INPUT_LLM_REQUESTS_PER_MINUTE'"
+fi
+
+if [ -n "$INPUT_LLM_TOKENS_PER_MINUTE" ]; then
+    ARGS="$ARGS --llm-tokens-per-minute '$INPUT_LLM_TOKENS_PER_MINUTE'"
+fi
+
+if [ -n "$INPUT_DEADLINE" ]; then
+    ARGS="$ARGS --deadline '$INPUT_DEADLINE'"
+fi
+
+if [ -n "$INPUT_DEADLINE_THRESHOLD" ]; then
+    ARGS="$ARGS --deadline-threshold '$INPUT_DEADLINE_THRESHOLD'"
+fi
+
+if [ -n "$INPUT_DEADLINE_FALLBACK" ]; then
+    ARGS="$ARGS --deadline-fallback '$INPUT_DEADLINE_FALLBACK'"
+fi
+
 if [ "$INPUT_VERBOSE" = 'true' ]; then
     ARGS="$ARGS --verbose"
 fi
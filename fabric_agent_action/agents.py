@@ -1,62 +1,349 @@
+import asyncio
 import logging
+import operator
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Literal, Type, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Annotated, Any, Callable, Literal, Optional, Sequence, Type
 
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
-
-from fabric_agent_action.fabric_tools import FabricTools
+from langgraph.prebuilt.tool_node import TOOL_CALL_ERROR_TEMPLATE
+from pydantic import BaseModel, Field, create_model
+
+from fabric_agent_action.chunking import estimate_tokens
+from fabric_agent_action.context_budget import DEFAULT_RECENT_COMMENTS, ContextBudgeter
+from fabric_agent_action.deadline import Deadline, DeadlineExceeded
+from fabric_agent_action.fabric_tools import FabricTools, ainvoke_tool
+from fabric_agent_action.history_compaction import HistoryCompactor
+from fabric_agent_action.inputs import InputReferenceResolver, InputSections, find_references
 from fabric_agent_action.llms import LLMProvider
+from fabric_agent_action.pricing import estimate_cost
+from fabric_agent_action.prompt_caching import bind_tools, create_prompt_message
+from fabric_agent_action.response_cache import get_cache_key
+from fabric_agent_action.routing import PatternIndex, PatternMatcher, group_by_category
+from fabric_agent_action.routing_cache import RoutingCache, from_templates, to_templates
+from fabric_agent_action.tool_schemas import create_structured_tools, get_tool_schemas
 
 logger = logging.getLogger(__name__)
 
+INPUT_REFERENCES_PROMPT = """
+INPUT REFERENCES:
+1. Do not copy input text into tool arguments - reference it instead:
+   - {{INSTRUCTION}}, {{INPUT}}, {{GITHUB ISSUE}}, {{GITHUB PULL REQUEST}}, {{GIT DIFF}}
+   - {{COMMENTS}} for all comments, {{COMMENT <ID>}} for a single comment
+   - {{<tool call id>}} for the output of a previous tool call
+2. References are replaced with the exact text before the tool is executed
+3. References can be mixed with your own text in the same argument
+
+"""
+
+OUTPUT_PASSTHROUGH_PROMPT = """
+OUTPUT PASSTHROUGH:
+1. Do not repeat tool output in your final answer
+2. To return tool output, respond with only a reference to its tool call: {{<tool call id>}}
+   - The reference is replaced with the exact, unmodified tool output
+3. This takes precedence over OUTPUT REQUIREMENTS
+
+"""
+
+# Output of run stopped by deadline, so the run ends with a clear result instead of an error
+DEADLINE_MESSAGE = "Agent stopped by deadline before fabric pattern completed"
+
+CATEGORY_ROUTING_PROMPT = """You are a Fabric Assistant selecting categories of fabric patterns. Your task is to select categories containing patterns needed to fulfill INSTRUCTION.
+
+RULES:
+1. Select as few categories as possible, most relevant first
+2. Select multiple categories only if INSTRUCTION requires patterns from each of them
+
+CATEGORIES:
+"""
+
+
+@dataclass(frozen=True)
+class AgentOptions:
+    input_references: bool = False
+    output_passthrough: bool = False
+    fast_path: bool = False
+    tool_binding: Literal["patterns", "run_pattern"] = "patterns"
+    tools_top_k: int = 0
+    hierarchical_routing: bool = False
+    routing_cache: Optional[RoutingCache] = None
+    context_tokens: int = 0
+    recent_comments: int = DEFAULT_RECENT_COMMENTS
+    history_compaction: bool = False
+    deadline: Optional[Deadline] = None
+
+
+def resolve_tool_call_references(messages: Sequence[BaseMessage]) -> AIMessage:
+    """Return last AI message with {{NAME}} references in tool call arguments replaced by exact text"""
+    last_message = messages[-1]
+    if not isinstance(last_message, AIMessage):
+        raise ValueError("Last message is not an AI message")
+
+    input_str = messages[0].content if isinstance(messages[0].content, str) else ""
+    tool_results = {
+        m.tool_call_id: m.content for m in messages if isinstance(m, ToolMessage) and isinstance(m.content, str)
+    }
+    resolver = InputReferenceResolver(InputSections.parse(input_str), tool_results)
+
+    tool_calls = [
+        {
+            **tool_call,
+            "args": {k: resolver.resolve(v) if isinstance(v, str) else v for k, v in tool_call["args"].items()},
+        }
+        for tool_call in last_message.tool_calls
+    ]
+    return last_message.model_copy(update={"tool_calls": tool_calls})
+
+
+def get_deadline_update(e: DeadlineExceeded) -> Any:
+    """End run stopped by deadline with a clear result instead of an error"""
+    logger.warning(f"{e}, stopping agent")
+    return {"messages": [AIMessage(content=DEADLINE_MESSAGE)]}
+
 
 class BaseAgent(ABC):
     """Base class for all agents"""
 
-    def __init__(self, llm_provider: LLMProvider, fabric_tools: FabricTools) -> None:
+    def __init__(
+        self, llm_provider: LLMProvider, fabric_tools: FabricTools, options: Optional[AgentOptions] = None
+    ) -> None:
         self.llm_provider = llm_provider
         self.fabric_tools = fabric_tools
+        self.options = options or AgentOptions()
 
     @abstractmethod
     def build_graph(self) -> CompiledStateGraph:
         """Build and return the agent's graph"""
         pass
 
+    def _get_prompt_with_options(self, prompt: str) -> str:
+        """Extend agent prompt with instructions for enabled options"""
+        if self.options.input_references:
+            prompt += INPUT_REFERENCES_PROMPT
+        return prompt
+
+    def _get_agent_tools(self) -> list[Any]:
+        """Return tools bound to agent LLM: one tool per pattern or single run_pattern tool"""
+        if self.options.tool_binding == "run_pattern":
+            return [self.fabric_tools.get_run_pattern_tool()]
+        return self.fabric_tools.get_fabric_tools()
+
+    def _handle_tool_error(self, e: Exception) -> str:
+        """Return tool error to agent LLM, deadline is raised to stop the run"""
+        if isinstance(e, DeadlineExceeded):
+            raise e
+        return TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e))
+
+    def _create_tools_node(self, tools: Sequence[Any]) -> Any:
+        """Create graph node executing tools, resolving input references if enabled"""
+        tool_node = ToolNode(
+            create_structured_tools(tools, get_tool_schemas(tools)), handle_tool_errors=self._handle_tool_error
+        )
+
+        def get_input(state: MessagesState) -> Any:
+            if not self.options.input_references:
+                return state
+            return {"messages": [resolve_tool_call_references(state["messages"])]}
+
+        def run_tools(state: MessagesState) -> Any:
+            try:
+                return tool_node.invoke(get_input(state))
+            except DeadlineExceeded as e:
+                return get_deadline_update(e)
+
+        async def arun_tools(state: MessagesState) -> Any:
+            try:
+                return await tool_node.ainvoke(get_input(state))
+            except DeadlineExceeded as e:
+                return get_deadline_update(e)
+
+        return RunnableLambda(run_tools, afunc=arun_tools)
+
 
 class AgentBuilder:
-    def __init__(self, agent_type: str, llm_provider: LLMProvider, fabric_tools: FabricTools) -> None:
+    def __init__(
+        self,
+        agent_type: str,
+        llm_provider: LLMProvider,
+        fabric_tools: FabricTools,
+        options: Optional[AgentOptions] = None,
+    ) -> None:
         self.agent_type = agent_type
         self.llm_provider = llm_provider
         self.fabric_tools = fabric_tools
+        self.options = options or AgentOptions()
+        self._pattern_index: Optional[PatternIndex] = None
 
         self._agents: dict[str, Type[BaseAgent]] = {
             "router": RouterAgent,
             "react": ReActAgent,
             "react_issue": ReActIssueAgent,
             "react_pr": ReActPRAgent,
+            "plan": PlanAgent,
         }
 
-    def build(self) -> CompiledStateGraph:
-        """Build and return appropriate agent type"""
+    def build(self, input_str: Optional[str] = None) -> CompiledStateGraph:
+        """Build and return appropriate agent type, or fast path graph if input names pattern explicitly"""
         agent_class = self._agents.get(self.agent_type)
         if not agent_class:
             raise ValueError(f"Unknown agent type: {self.agent_type}")
 
-        return agent_class(self.llm_provider, self.fabric_tools).build_graph()
+        if input_str is not None and self.options.fast_path:
+            tool = self._match_fast_path(input_str)
+            if tool:
+                logger.info(f"Fast path: running {tool.__name__} without agent")
+                return FastPathAgent(self.llm_provider, self.fabric_tools, tool, self.options).build_graph()
+
+        fabric_tools = self.fabric_tools
+        if input_str is not None and self.options.tools_top_k > 0:
+            fabric_tools = self._shortlist_tools(input_str)
+        if input_str is not None and self.options.hierarchical_routing and self.options.tool_binding == "patterns":
+            try:
+                fabric_tools = self._route_to_categories(input_str, fabric_tools)
+            except DeadlineExceeded as e:
+                return self._build_deadline_graph(e)
+
+        return agent_class(self.llm_provider, fabric_tools, self.options).build_graph()
+
+    def _build_deadline_graph(self, e: DeadlineExceeded) -> CompiledStateGraph:
+        """Build graph ending run stopped by deadline before agent was built"""
+        update = get_deadline_update(e)
+        builder = StateGraph(MessagesState)
+        builder.add_node("deadline", lambda state: update)
+        builder.add_edge(START, "deadline")
+        builder.add_edge("deadline", END)
+        return builder.compile()
+
+    def _route_to_categories(self, input_str: str, fabric_tools: FabricTools) -> FabricTools:
+        """Limit tools to categories selected by agent LLM if they exceed max number of tools"""
+        tools = fabric_tools.get_fabric_tools(check_max_number_of_tools=False)
+        if len(tools) <= fabric_tools.max_number_of_tools:
+            return fabric_tools
+
+        categories = group_by_category([tool.__name__ for tool in tools])
+        categories_type: Any = list[Literal[tuple(categories)]]  # type: ignore[misc]
+        selection_schema = create_model(
+            "CategorySelection",
+            categories=(categories_type, Field(description="Selected categories, most relevant first")),
+        )
+
+        llm = self.llm_provider.createAgentLLM()
+        prompt = CATEGORY_ROUTING_PROMPT + "\n".join(
+            f"- {category}: {', '.join(names)}" for category, names in categories.items()
+        )
+        instruction = InputSections.parse(input_str).instruction or input_str
+        messages: list[BaseMessage] = [
+            create_prompt_message(llm.llm, prompt, llm.use_system_message),
+            HumanMessage(content=f"INSTRUCTION:\n{instruction}"),
+        ]
+        selection: Any = llm.llm.with_structured_output(selection_schema).invoke(messages)
+        logger.info(f"Selected categories: {selection.categories}")
+
+        tool_names: list[str] = []
+        for category in selection.categories:
+            names = [name for name in categories[category] if name not in tool_names]
+            if len(tool_names) + len(names) > fabric_tools.max_number_of_tools:
+                logger.warning(f"Skipping category {category}, it exceeds max number of tools")
+                continue
+            tool_names.extend(names)
+
+        if not tool_names:
+            raise ValueError("No fabric pattern categories selected for this request")
+        return fabric_tools.with_tools(tool_names)
+
+    def _shortlist_tools(self, input_str: str) -> FabricTools:
+        """Limit tools to top-K patterns matching instruction, or all tools if nothing matches"""
+        instruction = InputSections.parse(input_str).instruction or input_str
+        if self._pattern_index is None:
+            self._pattern_index = PatternIndex.from_fabric_tools(self.fabric_tools)
+
+        tool_names = self._pattern_index.search(instruction, self.options.tools_top_k)
+        if not tool_names:
+            logger.info("No patterns matching instruction, using all tools")
+            return self.fabric_tools
+
+        logger.info(f"Shortlisted tools: {tool_names}")
+        return self.fabric_tools.with_tools(tool_names)
+
+    def _match_fast_path(self, input_str: str) -> Optional[Callable[[str], str]]:
+        sections = InputSections.parse(input_str)
+        if sections.content is None:
+            return None
+
+        tools = self.fabric_tools.get_fabric_tools(check_max_number_of_tools=False)
+        tool_name = PatternMatcher([tool.__name__ for tool in tools]).match(sections.instruction)
+        return next((tool for tool in tools if tool.__name__ == tool_name), None)
+
+
+class FastPathAgent(BaseAgent):
+    """Runs explicitly requested pattern on input content directly, without agent LLM"""
+
+    def __init__(
+        self,
+        llm_provider: LLMProvider,
+        fabric_tools: FabricTools,
+        tool: Callable[[str], str],
+        options: Optional[AgentOptions] = None,
+    ) -> None:
+        super().__init__(llm_provider, fabric_tools, options)
+        self.tool = tool
+
+    def _get_content(self, state: MessagesState) -> str:
+        input_str = state["messages"][0].content
+        content = InputSections.parse(input_str if isinstance(input_str, str) else "").content
+        if content is None:
+            raise ValueError("No content to run pattern on")
+        return content
+
+    def _run_pattern(self, state: MessagesState) -> Any:
+        try:
+            return {"messages": [AIMessage(content=self.tool(self._get_content(state)))]}
+        except DeadlineExceeded as e:
+            return get_deadline_update(e)
+
+    async def _arun_pattern(self, state: MessagesState) -> Any:
+        try:
+            return {"messages": [AIMessage(content=await ainvoke_tool(self.tool, self._get_content(state)))]}
+        except DeadlineExceeded as e:
+            return get_deadline_update(e)
+
+    def build_graph(self) -> CompiledStateGraph:
+        logger.debug(f"[{self.__class__.__name__}] building graph for {self.tool.__name__}...")
+
+        def pattern(state: MessagesState):  # type: ignore[no-untyped-def]
+            return self._run_pattern(state)
+
+        async def apattern(state: MessagesState):  # type: ignore[no-untyped-def]
+            return await self._arun_pattern(state)
+
+        builder = StateGraph(MessagesState)
+        builder.add_node("pattern", RunnableLambda(pattern, afunc=apattern))
+        builder.add_edge(START, "pattern")
+        builder.add_edge("pattern", END)
+        graph = builder.compile()
+
+        return graph
 
 
 class RouterAgent(BaseAgent):
-    def __init__(self, llm_provider: LLMProvider, fabric_tools: FabricTools) -> None:
-        super().__init__(llm_provider, fabric_tools)
+    def __init__(
+        self, llm_provider: LLMProvider, fabric_tools: FabricTools, options: Optional[AgentOptions] = None
+    ) -> None:
+        super().__init__(llm_provider, fabric_tools, options)
 
     def build_graph(self) -> CompiledStateGraph:
         logger.debug(f"[{RouterAgent.__name__}] building graph...")
 
         llm = self.llm_provider.createAgentLLM()
-        llm_with_tools = llm.llm.bind_tools(self.fabric_tools.get_fabric_tools())
+        tools = self._get_agent_tools()
+        tool_schemas = get_tool_schemas(tools)
+        llm_with_tools = bind_tools(llm.llm, tool_schemas)
 
         msg_content = """You are a Fabric Assistant specialized in analyzing and executing fabric-related tools. Your task is to process inputs and execute fabric tools with exact output preservation.
 
@@ -83,17 +370,47 @@ OUTPUT REQUIREMENTS:
    - Provide the complete tool output as-is
 
         """
+        msg_content = self._get_prompt_with_options(msg_content)
 
-        agent_msg: Union[SystemMessage, HumanMessage] = (
-            SystemMessage(content=msg_content) if llm.use_system_message else HumanMessage(content=msg_content)
-        )
+        agent_msg = create_prompt_message(llm.llm, msg_content, llm.use_system_message)
+
+        routing_cache = self.options.routing_cache
+        # routing decisions are valid only for the same prompt and bound tools
+        fingerprint = get_cache_key(msg_content, tool_schemas)
 
         def assistant(state: MessagesState):  # type: ignore[no-untyped-def]
-            return {"messages": [llm_with_tools.invoke([agent_msg] + state["messages"])]}  # type: ignore[operator]
+            try:
+                if routing_cache is not None:
+                    return {
+                        "messages": [
+                            self._route_with_cache(
+                                routing_cache, fingerprint, llm_with_tools, agent_msg, state["messages"]
+                            )
+                        ]
+                    }
+                return {"messages": [llm_with_tools.invoke([agent_msg] + state["messages"])]}  # type: ignore[operator]
+            except DeadlineExceeded as e:
+                return get_deadline_update(e)
+
+        async def aassistant(state: MessagesState):  # type: ignore[no-untyped-def]
+            try:
+                if routing_cache is not None:
+                    return {
+                        "messages": [
+                            await self._aroute_with_cache(
+                                routing_cache, fingerprint, llm_with_tools, agent_msg, state["messages"]
+                            )
+                        ]
+                    }
+                return {
+                    "messages": [await llm_with_tools.ainvoke([agent_msg] + state["messages"])]  # type: ignore[operator]
+                }
+            except DeadlineExceeded as e:
+                return get_deadline_update(e)
 
         builder = StateGraph(MessagesState)
-        builder.add_node("assistant", assistant)
-        builder.add_node("tools", ToolNode(self.fabric_tools.get_fabric_tools()))
+        builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+        builder.add_node("tools", self._create_tools_node(tools))
         builder.add_edge(START, "assistant")
         builder.add_conditional_edges("assistant", tools_condition)
         builder.add_edge("tools", END)
@@ -101,35 +418,290 @@ OUTPUT REQUIREMENTS:
 
         return graph
 
+    def _get_cached_route(
+        self, routing_cache: RoutingCache, fingerprint: str, state_messages: Sequence[BaseMessage]
+    ) -> tuple[Optional[str], InputSections, Optional[AIMessage]]:
+        """Return cache key, input sections and cached tool calls for instruction if there are any"""
+        input_str = state_messages[0].content if isinstance(state_messages[0].content, str) else ""
+        sections = InputSections.parse(input_str)
+        key = routing_cache.get_key(sections, fingerprint)
+        if key is None:
+            return None, sections, None
+
+        templates = routing_cache.get(key)
+        tool_calls = from_templates(templates, sections) if templates is not None else None
+        if templates is None or tool_calls is None:
+            return key, sections, None
+
+        logger.info(f"Using cached routing decision: {[t['name'] for t in templates]}")
+        # with input references enabled, references are resolved by tools node
+        calls = templates if self.options.input_references else tool_calls
+        return (
+            key,
+            sections,
+            AIMessage(content="", tool_calls=[{**call, "id": f"call_cached_{i}"} for i, call in enumerate(calls)]),
+        )
+
+    def _record_route(
+        self, routing_cache: RoutingCache, key: str, sections: InputSections, response: BaseMessage
+    ) -> None:
+        if not isinstance(response, AIMessage) or not response.tool_calls:
+            return
+        recorded_templates = to_templates(
+            [{"name": c["name"], "args": c["args"]} for c in response.tool_calls], sections
+        )
+        if recorded_templates is not None:
+            routing_cache.record(key, recorded_templates)
+        else:
+            logger.debug("Routing decision not cached, tool arguments are not input sections")
+
+    def _route_with_cache(
+        self,
+        routing_cache: RoutingCache,
+        fingerprint: str,
+        llm_with_tools: Any,
+        agent_msg: BaseMessage,
+        state_messages: Sequence[BaseMessage],
+    ) -> BaseMessage:
+        """Return cached tool calls for instruction, or invoke agent and record its decision"""
+        key, sections, cached_message = self._get_cached_route(routing_cache, fingerprint, state_messages)
+        if cached_message is not None:
+            return cached_message
+
+        response: BaseMessage = llm_with_tools.invoke([agent_msg, *state_messages])
+        if key is not None:
+            self._record_route(routing_cache, key, sections, response)
+        return response
+
+    async def _aroute_with_cache(
+        self,
+        routing_cache: RoutingCache,
+        fingerprint: str,
+        llm_with_tools: Any,
+        agent_msg: BaseMessage,
+        state_messages: Sequence[BaseMessage],
+    ) -> BaseMessage:
+        """Async variant of _route_with_cache"""
+        key, sections, cached_message = self._get_cached_route(routing_cache, fingerprint, state_messages)
+        if cached_message is not None:
+            return cached_message
+
+        response: BaseMessage = await llm_with_tools.ainvoke([agent_msg, *state_messages])
+        if key is not None:
+            self._record_route(routing_cache, key, sections, response)
+        return response
+
 
 class ReActAgentState(MessagesState):
     max_num_turns: int
+    # limits of agent LLM usage, 0 for no limit
+    max_tokens: int
+    max_cost: float
+    max_seconds: float
+    # tokens saved by history compaction, one entry per assistant turn
+    compaction_saved_tokens: Annotated[list[int], operator.add]
+    # running counters, updated by assistant turns
+    num_tool_turns: Annotated[int, operator.add]
+    num_llm_calls: Annotated[int, operator.add]
+    prompt_tokens: Annotated[int, operator.add]
+    completion_tokens: Annotated[int, operator.add]
+    cost: Annotated[float, operator.add]
+    last_prompt_tokens: int
+    last_completion_tokens: int
+    started_at: float
+    elapsed_seconds: float
+
+
+def _get_trailing_tool_messages(messages: Sequence[BaseMessage]) -> list[ToolMessage]:
+    """Return tool messages after last AI message, i.e. outputs of last tool turn"""
+    tool_messages: list[ToolMessage] = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        tool_messages.append(message)
+    return tool_messages[::-1]
 
 
 class BaseReActAgent(BaseAgent):
     """Base class for ReAct-style agents that implements common functionality"""
 
+    def __init__(
+        self, llm_provider: LLMProvider, fabric_tools: FabricTools, options: Optional[AgentOptions] = None
+    ) -> None:
+        super().__init__(llm_provider, fabric_tools, options)
+        self.context_budgeter = (
+            ContextBudgeter(self.options.context_tokens, self.options.recent_comments)
+            if self.options.context_tokens > 0
+            else None
+        )
+        self.history_compactor = (
+            HistoryCompactor(self.options.input_references) if self.options.history_compaction else None
+        )
+
+    def _get_messages(self, agent_msg: BaseMessage, state: ReActAgentState) -> tuple[list[BaseMessage], int]:
+        """Return messages sent to agent LLM and number of tokens saved by history compaction.
+
+        History is compacted and comment history of input is trimmed to context budget. Graph state
+        keeps the whole history, so references to compacted or trimmed parts are still resolved.
+        """
+        messages: list[BaseMessage] = list(state["messages"])
+        saved_tokens = 0
+        if self.history_compactor is not None:
+            messages, saved_tokens = self.history_compactor.compact(messages)
+            logger.debug(f"History compaction saved {saved_tokens} tokens")
+
+        first = messages[0] if messages else None
+        if self.context_budgeter is None or not isinstance(first, HumanMessage) or not isinstance(first.content, str):
+            return [agent_msg] + messages, saved_tokens
+        trimmed = self.context_budgeter.trim(first.content)
+        if trimmed == first.content:
+            return [agent_msg] + messages, saved_tokens
+        return [agent_msg, HumanMessage(content=trimmed, id=first.id)] + messages[1:], saved_tokens
+
+    def _get_update(
+        self,
+        state: ReActAgentState,
+        messages: list[BaseMessage],
+        response: BaseMessage,
+        saved_tokens: int,
+        started_at: float,
+    ) -> Any:
+        """Return state update of assistant turn: response and increments of running counters"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+            completion_tokens = estimate_tokens(str(getattr(response, "content", "")))
+        metadata = getattr(response, "response_metadata", {})
+        # response names exact model, e.g. the one which answered in failover chain
+        model = metadata.get("model_name") or metadata.get("model") or ""
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        if cost is None and state.get("max_cost", 0) > 0:
+            logger.warning(f"Unknown price of model {model!r}, its calls are not counted in cost")
+
+        update = {
+            "messages": [response],
+            "num_tool_turns": len(_get_trailing_tool_messages(state["messages"])),
+            "num_llm_calls": 1,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost": cost or 0.0,
+            "last_prompt_tokens": prompt_tokens,
+            "last_completion_tokens": completion_tokens,
+            "started_at": started_at,
+            "elapsed_seconds": time.monotonic() - started_at,
+        }
+        if self.history_compactor is not None:
+            update["compaction_saved_tokens"] = [saved_tokens]
+        return update
+
     def _assistant(
         self,
         llm_with_tools: Any,
-        agent_msg: Union[SystemMessage, HumanMessage],
+        agent_msg: BaseMessage,
         state: ReActAgentState,
     ) -> Any:
-        return {"messages": [llm_with_tools.invoke([agent_msg] + state["messages"])]}
-
-    def _tools_condition(self, state: ReActAgentState) -> Literal["tools", "__end__"]:
+        started_at = state.get("started_at") or time.monotonic()
+        messages, saved_tokens = self._get_messages(agent_msg, state)
+        try:
+            response = llm_with_tools.invoke(messages)
+        except DeadlineExceeded as e:
+            logger.warning(f"{e}, stopping agent with the best result so far")
+            return self._finish(state)
+        return self._get_update(state, messages, response, saved_tokens, started_at)
+
+    async def _aassistant(
+        self,
+        llm_with_tools: Any,
+        agent_msg: BaseMessage,
+        state: ReActAgentState,
+    ) -> Any:
+        started_at = state.get("started_at") or time.monotonic()
+        messages, saved_tokens = self._get_messages(agent_msg, state)
+        try:
+            response = await llm_with_tools.ainvoke(messages)
+        except DeadlineExceeded as e:
+            logger.warning(f"{e}, stopping agent with the best result so far")
+            return self._finish(state)
+        return self._get_update(state, messages, response, saved_tokens, started_at)
+
+    def _tools_condition(self, state: ReActAgentState) -> Literal["tools", "finish", "__end__"]:
         messages = state.get("messages", [])
 
-        max_num_turns = state.get("max_num_turns", 10)
-        num_responses = len([m for m in messages if isinstance(m, ToolMessage)])
-        if num_responses >= max_num_turns:
-            logger.warning(f"Exceeded maximum number of tools turns: {num_responses} >= {max_num_turns}")
+        ai_message = messages[-1]
+        if not hasattr(ai_message, "tool_calls") or len(ai_message.tool_calls) == 0:
             return "__end__"
 
-        ai_message = messages[-1]
-        if hasattr(ai_message, "tool_calls") and len(ai_message.tool_calls) > 0:
-            return "tools"
-        return "__end__"
+        max_num_turns = state.get("max_num_turns", 10)
+        num_tool_turns = state.get("num_tool_turns", 0)
+        if num_tool_turns >= max_num_turns:
+            logger.warning(f"Exceeded maximum number of tools turns: {num_tool_turns} >= {max_num_turns}")
+            return "finish"
+        return "tools"
+
+    def _get_exceeded_limit(self, state: ReActAgentState) -> Optional[str]:
+        """Return limit which next assistant turn would cross, None if it fits all limits.
+
+        Next prompt resends previous one with its response and outputs of last tool turn,
+        response is assumed to be as long as the previous one and turn to take average time.
+        """
+        deadline = self.options.deadline
+        if deadline is not None and deadline.expired:
+            return f"deadline: {deadline.seconds}s passed"
+
+        num_llm_calls = state.get("num_llm_calls", 0)
+        if num_llm_calls == 0:
+            return None
+        last_prompt_tokens = state.get("last_prompt_tokens", 0)
+        last_completion_tokens = state.get("last_completion_tokens", 0)
+        tool_tokens = sum(estimate_tokens(str(m.content)) for m in _get_trailing_tool_messages(state["messages"]))
+        next_tokens = last_prompt_tokens + 2 * last_completion_tokens + tool_tokens
+        tokens = state.get("prompt_tokens", 0) + state.get("completion_tokens", 0)
+
+        max_tokens = state.get("max_tokens", 0)
+        if max_tokens > 0 and tokens + next_tokens > max_tokens:
+            return f"tokens: {tokens} used, next turn needs about {next_tokens} of {max_tokens}"
+
+        max_cost = state.get("max_cost", 0)
+        cost = state.get("cost", 0.0)
+        # cost per token of previous turns, input and output tokens together
+        next_cost = cost / tokens * next_tokens if tokens else 0.0
+        if max_cost > 0 and cost + next_cost > max_cost:
+            return f"cost: ${cost:.4f} used, next turn needs about ${next_cost:.4f} of ${max_cost}"
+
+        max_seconds = state.get("max_seconds", 0)
+        started_at = state.get("started_at")
+        elapsed = time.monotonic() - started_at if started_at else 0.0
+        next_seconds = elapsed / num_llm_calls
+        if max_seconds > 0 and elapsed + next_seconds > max_seconds:
+            return f"time: {elapsed:.1f}s elapsed, next turn needs about {next_seconds:.1f}s of {max_seconds}s"
+        return None
+
+    def _budget_condition(self, state: ReActAgentState) -> Literal["assistant", "finish"]:
+        limit = self._get_exceeded_limit(state)
+        if limit is not None:
+            logger.warning(f"Stopping agent before it exceeds limit of {limit}")
+            return "finish"
+        return "assistant"
+
+    def _handle_tool_error(self, e: Exception) -> str:
+        """Return every tool error to agent LLM, deadline stops the run in budget condition"""
+        return TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e))
+
+    def _finish(self, state: ReActAgentState) -> Any:
+        """End run stopped by limit with the best result so far: output of last successful tool call"""
+        for message in reversed(state["messages"]):
+            if isinstance(message, ToolMessage) and message.status != "error" and message.content:
+                content = message.content if isinstance(message.content, str) else str(message.content)
+                return {"messages": [AIMessage(content=content)]}
+        return {"messages": [AIMessage(content="Agent stopped by limit before any fabric pattern completed")]}
+
+    def _get_prompt_with_options(self, prompt: str) -> str:
+        prompt = super()._get_prompt_with_options(prompt)
+        if self.options.output_passthrough:
+            prompt += OUTPUT_PASSTHROUGH_PROMPT
+        return prompt
 
     @abstractmethod
     def _get_agent_prompt(self) -> str:
@@ -140,25 +712,36 @@ class BaseReActAgent(BaseAgent):
         logger.debug(f"[{self.__class__.__name__}] building graph...")
 
         llm = self.llm_provider.createAgentLLM()
-        llm_with_tools = llm.llm.bind_tools(self.fabric_tools.get_fabric_tools())
+        tools = self._get_agent_tools()
+        # every turn resends conversation history, so it is cached too
+        llm_with_tools = bind_tools(llm.llm, get_tool_schemas(tools), cache_messages=True)
 
-        agent_prompt = self._get_agent_prompt()
-        agent_msg: Union[SystemMessage, HumanMessage] = (
-            SystemMessage(content=agent_prompt) if llm.use_system_message else HumanMessage(content=agent_prompt)
-        )
+        agent_prompt = self._get_prompt_with_options(self._get_agent_prompt())
+        agent_msg = create_prompt_message(llm.llm, agent_prompt, llm.use_system_message)
 
         def assistant(state: ReActAgentState):  # type: ignore[no-untyped-def]
             return self._assistant(llm_with_tools, agent_msg, state)
 
-        def tools_condition(state: ReActAgentState) -> Literal["tools", "__end__"]:
+        async def aassistant(state: ReActAgentState):  # type: ignore[no-untyped-def]
+            return await self._aassistant(llm_with_tools, agent_msg, state)
+
+        def tools_condition(state: ReActAgentState) -> Literal["tools", "finish", "__end__"]:
             return self._tools_condition(state)
 
+        def budget_condition(state: ReActAgentState) -> Literal["assistant", "finish"]:
+            return self._budget_condition(state)
+
+        def finish(state: ReActAgentState):  # type: ignore[no-untyped-def]
+            return self._finish(state)
+
         builder = StateGraph(ReActAgentState)
-        builder.add_node("assistant", assistant)
-        builder.add_node("tools", ToolNode(self.fabric_tools.get_fabric_tools()))
+        builder.add_node("assistant", RunnableLambda(assistant, afunc=aassistant))
+        builder.add_node("tools", self._create_tools_node(tools))
+        builder.add_node("finish", finish)
         builder.add_edge(START, "assistant")
         builder.add_conditional_edges("assistant", tools_condition)
-        builder.add_edge("tools", "assistant")
+        builder.add_conditional_edges("tools", budget_condition)
+        builder.add_edge("finish", END)
         graph = builder.compile()
 
         return graph
@@ -286,3 +869,231 @@ OUTPUT REQUIREMENTS:
    - Provide the complete tool output as-is
 
         """
+
+
+class PlanStep(BaseModel):
+    """Single fabric pattern call"""
+
+    id: str = Field(description="Unique step id, e.g. step1")
+    pattern: str = Field(description="Name of fabric pattern to run")
+    input: str = Field(
+        description="Input for pattern. Use {{NAME}} references to input sections or {{<step id>}} for output of previous step"
+    )
+
+
+class Plan(BaseModel):
+    """Plan of fabric pattern calls to execute"""
+
+    steps: list[PlanStep] = Field(description="Steps to execute. Empty if no suitable fabric pattern")
+    outputs: list[str] = Field(
+        default_factory=list,
+        description="Ids of steps whose output is returned. Defaults to the last step",
+    )
+
+
+class PlanAgentState(MessagesState):
+    max_num_turns: int
+    plan: Optional[Plan]
+
+
+class PlanAgent(BaseAgent):
+    """Plan-and-execute agent: one agent LLM call plans pattern calls, which are then executed locally.
+
+    Steps referencing output of other steps with {{<step id>}} wait for them, independent steps run concurrently.
+    """
+
+    max_concurrent_steps = 4
+
+    def _get_agent_prompt(self, catalog: str) -> str:
+        return f"""You are a Fabric Assistant specialized in planning execution of fabric patterns. Your task is to create a plan of fabric pattern calls that fulfills the request.
+
+INPUT COMPONENTS:
+1. INSTRUCTION: Current action request
+2. INPUT, GITHUB ISSUE, GITHUB PULL REQUEST, GIT DIFF, COMMENTS: Content to process (depending on request)
+
+PLANNING RULES:
+1. Use only patterns from AVAILABLE PATTERNS
+2. Use as few steps as possible, focus only on current INSTRUCTION
+3. Do not copy content into step input - reference it instead:
+   - {{{{INSTRUCTION}}}}, {{{{INPUT}}}}, {{{{GITHUB ISSUE}}}}, {{{{GITHUB PULL REQUEST}}}}, {{{{GIT DIFF}}}}
+   - {{{{COMMENTS}}}} for all comments, {{{{COMMENT <ID>}}}} for a single comment
+   - {{{{<step id>}}}} for the output of a previous step, e.g. clean text in step1 and improve writing of {{{{step1}}}} in step2
+4. Steps not referencing each other are executed concurrently
+5. Failure Protocol:
+   - If no suitable fabric pattern can be determined, return plan without steps
+
+AVAILABLE PATTERNS:
+{catalog}
+
+"""
+
+    def _plan(self, llm_with_structured_output: Any, agent_msg: BaseMessage, state: PlanAgentState) -> Any:
+        try:
+            return self._get_plan_update(llm_with_structured_output.invoke([agent_msg] + state["messages"]))
+        except DeadlineExceeded as e:
+            return {"plan": None, **get_deadline_update(e)}
+
+    async def _aplan(self, llm_with_structured_output: Any, agent_msg: BaseMessage, state: PlanAgentState) -> Any:
+        try:
+            return self._get_plan_update(await llm_with_structured_output.ainvoke([agent_msg] + state["messages"]))
+        except DeadlineExceeded as e:
+            return {"plan": None, **get_deadline_update(e)}
+
+    def _get_plan_update(self, plan: Plan) -> Any:
+        logger.debug(f"[{PlanAgent.__name__}] plan: {plan}")
+        if not plan.steps:
+            return {"plan": plan, "messages": [AIMessage(content="no fabric pattern for this request")]}
+        return {"plan": plan}
+
+    def _plan_condition(self, state: PlanAgentState) -> Literal["executor", "__end__"]:
+        plan = state.get("plan")
+        return "executor" if plan and plan.steps else "__end__"
+
+    def _validate_plan(self, plan: Plan, tools: dict[str, Callable[[str], str]], max_num_turns: int) -> None:
+        if len(plan.steps) > max_num_turns:
+            raise ValueError(f"Plan has {len(plan.steps)} steps, but maximum number of turns is {max_num_turns}")
+
+        step_ids = [step.id for step in plan.steps]
+        if len(set(step_ids)) != len(step_ids):
+            raise ValueError(f"Plan has duplicated step ids: {step_ids}")
+
+        for step in plan.steps:
+            if step.pattern not in tools:
+                raise ValueError(f"Unknown fabric pattern in plan: {step.pattern}")
+
+        for output in plan.outputs:
+            if output not in step_ids:
+                raise ValueError(f"Unknown plan output: {output}")
+
+    def _pop_ready_steps(
+        self, pending: dict[str, tuple[PlanStep, set[str]]], results: dict[str, str]
+    ) -> list[PlanStep]:
+        """Remove and return pending steps whose dependencies are done"""
+        ready = [step for step, dependencies in pending.values() if dependencies.issubset(results)]
+        for step in ready:
+            del pending[step.id]
+            logger.debug(f"[{PlanAgent.__name__}] running {step.id}: {step.pattern}")
+        return ready
+
+    def _get_pending_steps(self, plan: Plan) -> dict[str, tuple[PlanStep, set[str]]]:
+        step_ids = {step.id for step in plan.steps}
+        return {step.id: (step, {ref for ref in find_references(step.input) if ref in step_ids}) for step in plan.steps}
+
+    def _execute_plan(
+        self, plan: Plan, tools: dict[str, Callable[[str], str]], sections: InputSections
+    ) -> dict[str, str]:
+        """Execute plan steps as soon as steps they reference are done"""
+        results: dict[str, str] = {}
+        resolver = InputReferenceResolver(sections, results)
+        pending = self._get_pending_steps(plan)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrent_steps, len(plan.steps))) as pool:
+            running: dict[Future[str], PlanStep] = {}
+            while pending or running:
+                for step in self._pop_ready_steps(pending, results):
+                    running[pool.submit(tools[step.pattern], resolver.resolve(step.input))] = step
+
+                if not running:
+                    raise ValueError(f"Plan has steps with unresolved dependencies: {list(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future).id] = future.result()
+
+        return results
+
+    async def _aexecute_plan(
+        self, plan: Plan, tools: dict[str, Callable[[str], str]], sections: InputSections
+    ) -> dict[str, str]:
+        """Async variant of _execute_plan, steps run as tasks on the event loop"""
+        results: dict[str, str] = {}
+        resolver = InputReferenceResolver(sections, results)
+        pending = self._get_pending_steps(plan)
+        semaphore = asyncio.Semaphore(self.max_concurrent_steps)
+
+        async def run_step(step: PlanStep, input: str) -> str:
+            async with semaphore:
+                return await ainvoke_tool(tools[step.pattern], input)
+
+        running: dict[asyncio.Task[str], PlanStep] = {}
+        try:
+            while pending or running:
+                for step in self._pop_ready_steps(pending, results):
+                    running[asyncio.create_task(run_step(step, resolver.resolve(step.input)))] = step
+
+                if not running:
+                    raise ValueError(f"Plan has steps with unresolved dependencies: {list(pending)}")
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task).id] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+
+        return results
+
+    def _get_execution_inputs(
+        self, state: PlanAgentState
+    ) -> tuple[Plan, dict[str, Callable[[str], str]], InputSections]:
+        plan = state["plan"]
+        assert plan is not None  # Ensured by _plan_condition
+
+        tools = {tool.__name__: tool for tool in self.fabric_tools.get_fabric_tools(check_max_number_of_tools=False)}
+        self._validate_plan(plan, tools, state.get("max_num_turns", 10))
+
+        input_str = state["messages"][0].content
+        return plan, tools, InputSections.parse(input_str if isinstance(input_str, str) else "")
+
+    def _get_output_update(self, plan: Plan, results: dict[str, str]) -> Any:
+        outputs = plan.outputs or [plan.steps[-1].id]
+        return {"messages": [AIMessage(content="\n\n".join(results[output] for output in outputs))]}
+
+    def _execute(self, state: PlanAgentState) -> Any:
+        plan, tools, sections = self._get_execution_inputs(state)
+        try:
+            return self._get_output_update(plan, self._execute_plan(plan, tools, sections))
+        except DeadlineExceeded as e:
+            return get_deadline_update(e)
+
+    async def _aexecute(self, state: PlanAgentState) -> Any:
+        plan, tools, sections = self._get_execution_inputs(state)
+        try:
+            return self._get_output_update(plan, await self._aexecute_plan(plan, tools, sections))
+        except DeadlineExceeded as e:
+            return get_deadline_update(e)
+
+    def build_graph(self) -> CompiledStateGraph:
+        logger.debug(f"[{self.__class__.__name__}] building graph...")
+
+        llm = self.llm_provider.createAgentLLM()
+        llm_with_structured_output = llm.llm.with_structured_output(Plan)
+
+        tools = self.fabric_tools.get_fabric_tools(check_max_number_of_tools=False)
+        agent_prompt = self._get_agent_prompt(self.fabric_tools.get_fabric_tools_catalog(tools))
+        agent_msg = create_prompt_message(llm.llm, agent_prompt, llm.use_system_message)
+
+        def plan(state: PlanAgentState):  # type: ignore[no-untyped-def]
+            return self._plan(llm_with_structured_output, agent_msg, state)
+
+        async def aplan(state: PlanAgentState):  # type: ignore[no-untyped-def]
+            return await self._aplan(llm_with_structured_output, agent_msg, state)
+
+        def plan_condition(state: PlanAgentState) -> Literal["executor", "__end__"]:
+            return self._plan_condition(state)
+
+        def execute(state: PlanAgentState):  # type: ignore[no-untyped-def]
+            return self._execute(state)
+
+        async def aexecute(state: PlanAgentState):  # type: ignore[no-untyped-def]
+            return await self._aexecute(state)
+
+        builder = StateGraph(PlanAgentState)
+        builder.add_node("planner", RunnableLambda(plan, afunc=aplan))
+        builder.add_node("executor", RunnableLambda(execute, afunc=aexecute))
+        builder.add_edge(START, "planner")
+        builder.add_conditional_edges("planner", plan_condition)
+        builder.add_edge("executor", END)
+        graph = builder.compile()
+
+        return graph
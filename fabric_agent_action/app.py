@@ -1,13 +1,19 @@
 import argparse
+import asyncio
 import logging
 import sys
-from typing import TextIO
+from pathlib import Path
+from typing import Optional, TextIO
 
-from fabric_agent_action.agents import AgentBuilder
+from fabric_agent_action.agents import AgentBuilder, AgentOptions
+from fabric_agent_action.call_policy import CallPolicy
 from fabric_agent_action.config import AppConfig
+from fabric_agent_action.diff_pruning import DEFAULT_EXCLUDE_GLOBS, DiffPruner
 from fabric_agent_action.fabric_tools import FabricTools
 from fabric_agent_action.graphs import GraphExecutorFactory
 from fabric_agent_action.llms import LLMProvider
+from fabric_agent_action.response_cache import ResponseCache, SQLiteCache
+from fabric_agent_action.routing_cache import RoutingCache
 
 logger = logging.getLogger(__name__)
 
@@ -62,6 +68,28 @@ def parse_arguments() -> AppConfig:
         default=sys.stdout,
         help="Output file (default: stdout)",
     )
+    io_group.add_argument(
+        "--output-streaming",
+        action="store_true",
+        help="Write fabric pattern output to output file as it is generated",
+    )
+    io_group.add_argument(
+        "--input-diff-pruning",
+        action="store_true",
+        help="Summarize lockfiles, vendored, generated and binary files in GIT DIFF section of input",
+    )
+    io_group.add_argument(
+        "--input-diff-exclude",
+        type=str,
+        default="",
+        help="Comma separated globs of additional files summarized by --input-diff-pruning",
+    )
+    io_group.add_argument(
+        "--input-diff-max-tokens",
+        type=int,
+        default=0,
+        help="Keep best ranked hunks of GIT DIFF section fitting this many tokens, 0 keeps all (default: 0)",
+    )
 
     # Logging arguments
     log_group = parser.add_argument_group("Logging Options")
@@ -78,6 +106,45 @@ def parse_arguments() -> AppConfig:
         help="Enable debug logging",
     )
 
+    # LLM client configuration
+    llm_group = parser.add_argument_group("LLM Client Options")
+    llm_group.add_argument(
+        "--llm-http2",
+        action="store_true",
+        help="Use HTTP/2 for OpenAI and OpenRouter requests, requires h2 package",
+    )
+    llm_group.add_argument(
+        "--llm-requests-per-minute",
+        type=int,
+        default=0,
+        help="Maximum requests per minute to each provider model, 0 for limits from response headers (default: 0)",
+    )
+    llm_group.add_argument(
+        "--llm-tokens-per-minute",
+        type=int,
+        default=0,
+        help="Maximum tokens per minute of each provider model, 0 for limits from response headers (default: 0)",
+    )
+    llm_group.add_argument(
+        "--deadline",
+        type=float,
+        default=0,
+        help="Seconds the whole run may take, LLM calls are cancelled when they run out, "
+        "0 for no deadline (default: 0)",
+    )
+    llm_group.add_argument(
+        "--deadline-threshold",
+        type=float,
+        default=60,
+        help="Use --deadline-fallback models when less than this many seconds remain to deadline (default: 60)",
+    )
+    llm_group.add_argument(
+        "--deadline-fallback",
+        type=str,
+        default="",
+        help="Faster model used near deadline as provider:model, e.g. openai:gpt-4o-mini (default: none)",
+    )
+
     # Agent configuration
     agent_group = parser.add_argument_group("Agent Configuration")
     agent_group.add_argument(
@@ -99,10 +166,16 @@ def parse_arguments() -> AppConfig:
         default=0,
         help="Sampling temperature for agent model (default: 0)",
     )
+    agent_group.add_argument(
+        "--agent-fallbacks",
+        type=str,
+        default="",
+        help="Comma separated fallback provider:model list for agent, tried in order when provider fails",
+    )
     agent_group.add_argument(
         "--agent-type",
         type=str,
-        choices=["router", "react", "react_issue", "react_pr"],
+        choices=["router", "react", "react_issue", "react_pr", "plan"],
         default="router",
         help="Type of agent (default: router)",
     )
@@ -117,6 +190,82 @@ def parse_arguments() -> AppConfig:
         default="##### (🤖 AI Generated)",
         help="Preamble added to the beginning of output (default: ##### (🤖 AI Generated)",
     )
+    agent_group.add_argument(
+        "--agent-input-references",
+        action="store_true",
+        help="Let agent pass input sections to fabric tools by {{NAME}} reference instead of copying them",
+    )
+    agent_group.add_argument(
+        "--agent-output-passthrough",
+        action="store_true",
+        help="Let ReAct agents return tool output by {{<tool call id>}} reference instead of repeating it",
+    )
+    agent_group.add_argument(
+        "--agent-fast-path",
+        action="store_true",
+        help="Run pattern directly, without agent, if instruction is explicit /fabric <pattern> command",
+    )
+    agent_group.add_argument(
+        "--agent-tool-binding",
+        type=str,
+        choices=["patterns", "run_pattern"],
+        default="patterns",
+        help="Bind one tool per fabric pattern or single run_pattern tool to agent (default: patterns)",
+    )
+    agent_group.add_argument(
+        "--agent-tools-top-k",
+        type=int,
+        default=0,
+        help="Bind only top K fabric patterns matching instruction to agent, 0 to bind all (default: 0)",
+    )
+    agent_group.add_argument(
+        "--agent-hierarchical-routing",
+        action="store_true",
+        help="If fabric patterns exceed model's tool limit, let agent select pattern categories first",
+    )
+    agent_group.add_argument(
+        "--agent-routing-cache",
+        action="store_true",
+        help="Cache router agent decisions per instruction in --fabric-cache-dir and skip agent call on hit",
+    )
+    agent_group.add_argument(
+        "--agent-context-tokens",
+        type=int,
+        default=0,
+        help="Trim issue and pull request comment history sent to ReAct agents to this many tokens, "
+        "0 disables trimming (default: 0)",
+    )
+    agent_group.add_argument(
+        "--agent-recent-comments",
+        type=int,
+        default=5,
+        help="Number of most recent comments never trimmed by --agent-context-tokens (default: 5)",
+    )
+    agent_group.add_argument(
+        "--agent-history-compaction",
+        action="store_true",
+        help="Compact tool outputs and arguments repeated in ReAct agent history before each turn",
+    )
+    agent_group.add_argument(
+        "--agent-max-tokens",
+        type=int,
+        default=0,
+        help="Stop ReAct agents with the best result so far before their LLM uses more tokens, "
+        "0 for no limit (default: 0)",
+    )
+    agent_group.add_argument(
+        "--agent-max-cost",
+        type=float,
+        default=0,
+        help="Stop ReAct agents with the best result so far before estimated cost of their LLM exceeds this many USD, "
+        "0 for no limit (default: 0)",
+    )
+    agent_group.add_argument(
+        "--agent-max-seconds",
+        type=float,
+        default=0,
+        help="Stop ReAct agents with the best result so far before they run longer, 0 for no limit (default: 0)",
+    )
 
     # Fabric configuration
     fabric_group = parser.add_argument_group("Fabric Configuration")
@@ -139,6 +288,12 @@ def parse_arguments() -> AppConfig:
         default=0,
         help="Sampling temperature for fabric model (default: 0)",
     )
+    fabric_group.add_argument(
+        "--fabric-fallbacks",
+        type=str,
+        default="",
+        help="Comma separated fallback provider:model list for fabric, tried in order when provider fails",
+    )
     fabric_group.add_argument(
         "--fabric-patterns-included",
         type=str,
@@ -157,6 +312,56 @@ def parse_arguments() -> AppConfig:
         default=10,
         help="Maximum number of turns to LLM when running fabric patterns (default: 10)",
     )
+    fabric_group.add_argument(
+        "--fabric-timeout",
+        type=float,
+        default=0,
+        help="Timeout of single fabric pattern LLM call in seconds, 0 for no timeout (default: 0)",
+    )
+    fabric_group.add_argument(
+        "--fabric-max-retries",
+        type=int,
+        default=0,
+        help="Retries of timed out or transiently failed fabric pattern LLM calls (default: 0)",
+    )
+    fabric_group.add_argument(
+        "--fabric-hedge-delay",
+        type=float,
+        default=0,
+        help="Send duplicate fabric pattern LLM request if call takes longer than this many seconds, "
+        "adapted to p95 latency of previous calls, 0 disables hedging (default: 0)",
+    )
+    fabric_group.add_argument(
+        "--fabric-chunk-tokens",
+        type=int,
+        default=0,
+        help="Split pattern input larger than this many tokens into chunks, run pattern on them and combine "
+        "outputs, 0 disables chunking (default: 0)",
+    )
+    fabric_group.add_argument(
+        "--fabric-max-concurrent-chunks",
+        type=int,
+        default=4,
+        help="Maximum number of chunks of single pattern input processed concurrently (default: 4)",
+    )
+    fabric_group.add_argument(
+        "--fabric-cache-dir",
+        type=str,
+        default="",
+        help="Directory of fabric pattern responses cache, cache is disabled if not set",
+    )
+    fabric_group.add_argument(
+        "--fabric-cache-ttl",
+        type=int,
+        default=604800,
+        help="Time to live of cached fabric pattern responses in seconds (default: 604800)",
+    )
+    fabric_group.add_argument(
+        "--fabric-cache-max-entries",
+        type=int,
+        default=1000,
+        help="Maximum number of cached fabric pattern responses (default: 1000)",
+    )
 
     args = parser.parse_args()
 
@@ -189,23 +394,98 @@ def main() -> None:
 
 
 def app(config: AppConfig) -> None:
-    input_str = read_input(config.input_file)
+    asyncio.run(aapp(config))
 
+
+async def aapp(config: AppConfig) -> None:
+    """Run agent on the event loop, fabric pattern LLM requests are made asynchronously"""
     llm_provider = LLMProvider(config)
+    # connections to LLM providers are opened while input is read and graph is built
+    warm_up = asyncio.create_task(llm_provider.awarm_up())
+    try:
+        await run_agent(config, llm_provider)
+    finally:
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        logger.info(f"LLM usage: {llm_provider.token_usage.get_usage()}")
+        await llm_provider.aclose()
+
+
+def create_diff_pruner(config: AppConfig) -> DiffPruner:
+    extra_globs = [glob.strip() for glob in config.input_diff_exclude.split(",") if glob.strip()]
+    return DiffPruner(
+        list(DEFAULT_EXCLUDE_GLOBS) + extra_globs,
+        config.input_diff_max_tokens,
+        summarize_noise=config.input_diff_pruning,
+    )
+
+
+async def run_agent(config: AppConfig, llm_provider: LLMProvider) -> None:
+    input_str = await asyncio.to_thread(read_input, config.input_file)
+    if config.input_diff_pruning or config.input_diff_max_tokens > 0:
+        input_str = await asyncio.to_thread(create_diff_pruner(config).prune_input, input_str)
+
     fabric_llm = llm_provider.createFabricLLM()
+    if config.agent_routing_cache and not config.fabric_cache_dir:
+        raise ValueError("Routing cache requires --fabric-cache-dir")
+
+    caches: list[SQLiteCache] = []
+    response_cache: Optional[ResponseCache] = None
+    routing_cache: Optional[RoutingCache] = None
+    if config.fabric_cache_dir:
+        response_cache = ResponseCache(
+            Path(config.fabric_cache_dir),
+            llm_provider.getFabricLLMConfig(),
+            config.fabric_cache_ttl,
+            config.fabric_cache_max_entries,
+        )
+        caches.append(response_cache)
+    if config.agent_routing_cache:
+        routing_cache = RoutingCache(
+            Path(config.fabric_cache_dir),
+            llm_provider.getAgentLLMConfig(),
+            config.fabric_cache_ttl,
+            config.fabric_cache_max_entries,
+        )
+        caches.append(routing_cache)
+    call_policy = CallPolicy(config.fabric_timeout, config.fabric_max_retries, config.fabric_hedge_delay)
     fabric_tools = FabricTools(
         fabric_llm.llm,
         fabric_llm.use_system_message,
         fabric_llm.max_number_of_tools,
         config.fabric_patterns_included,
         config.fabric_patterns_excluded,
+        response_cache,
+        call_policy,
+        config.fabric_chunk_tokens,
+        config.fabric_max_concurrent_chunks,
     )
 
-    agent_builder = AgentBuilder(config.agent_type, llm_provider, fabric_tools)
-    graph = agent_builder.build()
+    agent_options = AgentOptions(
+        input_references=config.agent_input_references,
+        output_passthrough=config.agent_output_passthrough,
+        fast_path=config.agent_fast_path,
+        tool_binding=config.agent_tool_binding,
+        tools_top_k=config.agent_tools_top_k,
+        hierarchical_routing=config.agent_hierarchical_routing,
+        routing_cache=routing_cache,
+        context_tokens=config.agent_context_tokens,
+        recent_comments=config.agent_recent_comments,
+        history_compaction=config.agent_history_compaction,
+        deadline=llm_provider.deadline,
+    )
+    agent_builder = AgentBuilder(config.agent_type, llm_provider, fabric_tools, agent_options)
+    graph = await asyncio.to_thread(agent_builder.build, input_str)
 
     executor = GraphExecutorFactory.create(config)
-    executor.execute(graph, input_str)
+    try:
+        await executor.aexecute(graph, input_str)
+    finally:
+        logger.info(f"fabric calls: {call_policy.get_stats()}")
+        call_policy.close()
+        for cache in caches:
+            logger.info(f"{cache.cache_file.name}: {cache.get_stats()}")
+            cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import anthropic
+import openai
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGE_PERCENTILE = 0.95
+MIN_LATENCY_SAMPLES = 5
+MAX_LATENCY_SAMPLES = 100
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Errors worth another attempt, other errors (e.g. invalid request) fail immediately
+RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (
+    TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    anthropic.APIConnectionError,
+    anthropic.RateLimitError,
+    anthropic.InternalServerError,
+)
+
+
+@dataclass(frozen=True)
+class CallStats:
+    calls: int
+    retries: int
+    timeouts: int
+    hedged: int
+    hedge_wins: int
+
+
+class LatencyTracker:
+    """Latencies of recent successful calls"""
+
+    def __init__(self, max_samples: int = MAX_LATENCY_SAMPLES) -> None:
+        self._samples: deque[float] = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._samples.append(latency)
+
+    def get_percentile(self, percentile: float, min_samples: int = MIN_LATENCY_SAMPLES) -> Optional[float]:
+        """Return latency percentile, None if there are less than min_samples samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+
+class CallPolicy:
+    """Timeout, retries and hedging of fabric LLM calls.
+
+    Each attempt is limited to timeout seconds (0 for no limit). Timed out attempts and
+    transient provider errors are retried up to max_retries times with jittered exponential
+    backoff. With hedge_delay > 0, a duplicate request is sent if attempt doesn't finish
+    within p95 latency of previous calls (hedge_delay until there are enough samples), and
+    whichever finishes first is used. Duplicate requests are counted in stats.
+    """
+
+    def __init__(self, timeout: float = 0, max_retries: int = 0, hedge_delay: float = 0) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge_delay = hedge_delay
+        self.latencies = LatencyTracker()
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._pool: Optional[ContextThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get_stats(self) -> CallStats:
+        return CallStats(self.calls, self.retries, self.timeouts, self.hedged, self.hedge_wins)
+
+    def _get_hedge_delay(self) -> Optional[float]:
+        if self.hedge_delay <= 0:
+            return None
+        return self.latencies.get_percentile(HEDGE_PERCENTILE) or self.hedge_delay
+
+    def _get_backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _should_retry(self, attempt: int, e: BaseException) -> bool:
+        if isinstance(e, TimeoutError):
+            self._count("timeouts")
+        if attempt >= self.max_retries or not isinstance(e, RETRYABLE_ERRORS):
+            return False
+        self._count("retries")
+        return True
+
+    def call(self, func: Callable[[], T]) -> T:
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return self._call_attempt(func)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                backoff = self._get_backoff(attempt)
+                logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {backoff:.2f}s")
+                time.sleep(backoff)
+                attempt += 1
+
+    async def acall(self, func: Callable[[], Awaitable[T]]) -> T:
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(self._acall_attempt(func), self.timeout or None)
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                backoff = self._get_backoff(attempt)
+                logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+                attempt += 1
+
+    def _timed(self, func: Callable[[], T]) -> T:
+        started = time.monotonic()
+        result = func()
+        self.latencies.record(time.monotonic() - started)
+        return result
+
+    async def _atimed(self, func: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        result = await func()
+        self.latencies.record(time.monotonic() - started)
+        return result
+
+    def _call_attempt(self, func: Callable[[], T]) -> T:
+        hedge_delay = self._get_hedge_delay()
+        if hedge_delay is None and self.timeout <= 0:
+            return self._timed(func)
+
+        # blocking call can't be interrupted, it runs in worker thread which is abandoned on timeout,
+        # in copy of caller context, e.g. with its run config and deadline
+        with self._lock:
+            if self._pool is None:
+                self._pool = ContextThreadPoolExecutor(thread_name_prefix="fabric-call")
+            pool = self._pool
+
+        deadline = time.monotonic() + self.timeout if self.timeout > 0 else None
+        hedge_at = time.monotonic() + hedge_delay if hedge_delay is not None else None
+        pending: set[Future[T]] = {pool.submit(self._timed, func)}
+        primary = next(iter(pending))
+        while True:
+            wake_at = min((t for t in (deadline, hedge_at) if t is not None), default=None)
+            done, pending = wait(
+                pending,
+                timeout=max(0.0, wake_at - time.monotonic()) if wake_at is not None else None,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                if future.exception() is None or not pending:
+                    return self._get_result(future, primary)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"LLM call timed out after {self.timeout}s")
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                self._count("hedged")
+                logger.debug("LLM call exceeded hedge delay, sending duplicate request")
+                pending.add(pool.submit(self._timed, func))
+
+    async def _acall_attempt(self, func: Callable[[], Awaitable[T]]) -> T:
+        hedge_delay = self._get_hedge_delay()
+        if hedge_delay is None:
+            return await self._atimed(func)
+
+        primary = asyncio.ensure_future(self._atimed(func))
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if not done:
+                self._count("hedged")
+                logger.debug("LLM call exceeded hedge delay, sending duplicate request")
+                pending.add(asyncio.ensure_future(self._atimed(func)))
+            while True:
+                for future in done:
+                    if future.exception() is None or not pending:
+                        return self._get_result(future, primary)
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _get_result(self, future: "Future[T] | asyncio.Future[T]", primary: "Future[T] | asyncio.Future[T]") -> T:
+        if future is not primary and future.exception() is None:
+            self._count("hedge_wins")
+        return future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,92 @@
+import re
+from dataclasses import dataclass
+
+# Rough average of English text and code, good enough to keep chunks within context window
+CHARS_PER_TOKEN = 4
+
+REDUCE_INPUT_TEMPLATE = """The input was too large to process at once, so it was split into {count} consecutive parts and the instructions were applied to each part. Below are the outputs for the parts, in order.
+
+Combine them into a single output for the whole input. Follow the original instructions and output format exactly, merge duplicates, and do not mention the parts.
+
+{outputs}"""
+
+
+@dataclass(frozen=True)
+class Boundary:
+    pattern: re.Pattern[str]
+    # repeat text before first boundary (e.g. diff file header) in every chunk, so chunk is self-contained
+    repeat_header: bool = False
+
+
+# Structural boundaries tried in order, from largest structure to smallest. Splitting never drops text.
+BOUNDARIES = (
+    Boundary(re.compile(r"^(?=diff --git )", re.M)),
+    Boundary(re.compile(r"^(?=@@ )", re.M), repeat_header=True),
+    Boundary(re.compile(r"^(?=#{1,6} )", re.M)),
+    Boundary(re.compile(r"(?<=\n\n)(?=[^\n])")),
+    Boundary(re.compile(r"(?<=\n)(?=.)")),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def split_text(text: str, max_tokens: int) -> list[str]:
+    """Split text on structural boundaries (diff files and hunks, markdown sections, paragraphs, lines)
+    to chunks of at most max_tokens estimated tokens. Adjacent pieces are merged up to the budget."""
+    return _split(text, max_tokens * CHARS_PER_TOKEN, 0)
+
+
+def _split(text: str, max_chars: int, level: int) -> list[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(BOUNDARIES):
+        return [text[i : i + max_chars] for i in range(0, len(text), max_chars)]
+
+    boundary = BOUNDARIES[level]
+    pieces = [piece for piece in boundary.pattern.split(text) if piece]
+    if len(pieces) == 1:
+        return _split(text, max_chars, level + 1)
+
+    header = ""
+    if boundary.repeat_header and not boundary.pattern.match(pieces[0]) and len(pieces[0]) < max_chars // 2:
+        header = pieces.pop(0)
+    chunks: list[str] = []
+    for piece in pieces:
+        chunks.extend(_split(piece, max_chars - len(header), level + 1))
+    return [header + chunk for chunk in merge_chunks(chunks, max_chars - len(header))]
+
+
+def merge_chunks(chunks: list[str], max_chars: int) -> list[str]:
+    """Concatenate adjacent chunks while they fit max_chars"""
+    merged: list[str] = []
+    for chunk in chunks:
+        if merged and len(merged[-1]) + len(chunk) <= max_chars:
+            merged[-1] += chunk
+        else:
+            merged.append(chunk)
+    return merged
+
+
+def get_reduce_input(outputs: list[str]) -> str:
+    """Return input of reduce pass combining pattern outputs of consecutive parts"""
+    parts = "\n\n".join(f"## OUTPUT FOR PART {i}\n\n{output.strip()}" for i, output in enumerate(outputs, start=1))
+    return REDUCE_INPUT_TEMPLATE.format(count=len(outputs), outputs=parts)
+
+
+def group_outputs(outputs: list[str], max_tokens: int) -> list[list[str]]:
+    """Group consecutive outputs so reduce input of each group fits max_tokens.
+
+    If outputs are too large to be grouped, all of them are reduced at once, so reducing always ends.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    groups: list[list[str]] = []
+    for output in outputs:
+        if groups and len(get_reduce_input(groups[-1] + [output])) <= max_chars:
+            groups[-1].append(output)
+        else:
+            groups.append([output])
+    if len(groups) == len(outputs):
+        return [outputs]
+    return groups
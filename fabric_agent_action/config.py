@@ -11,17 +11,50 @@ class AppConfig(BaseModel):
 
     input_file: io.TextIOWrapper
     output_file: io.TextIOWrapper
+    output_streaming: bool = Field(default=False)
+    input_diff_pruning: bool = Field(default=False)
+    input_diff_exclude: str = Field(default="")
+    input_diff_max_tokens: int = Field(default=0, ge=0)
     verbose: bool = Field(default=False)
     debug: bool = Field(default=False)
+    llm_http2: bool = Field(default=False)
+    llm_requests_per_minute: int = Field(default=0, ge=0)
+    llm_tokens_per_minute: int = Field(default=0, ge=0)
+    deadline: float = Field(default=0, ge=0)
+    deadline_threshold: float = Field(default=60, ge=0)
+    deadline_fallback: str = Field(default="")
     agent_provider: Literal["openai", "openrouter", "anthropic"] = Field(default="openai")
     agent_model: str = Field(default="gpt-4o")
     agent_temperature: float = Field(default=0, ge=0, le=1)
+    agent_fallbacks: str = Field(default="")
     agent_preamble_enabled: bool = Field(default=False)
     agent_preamble: str = Field(default="##### (🤖 AI Generated)")
+    agent_input_references: bool = Field(default=False)
+    agent_output_passthrough: bool = Field(default=False)
+    agent_fast_path: bool = Field(default=False)
+    agent_tool_binding: Literal["patterns", "run_pattern"] = Field(default="patterns")
+    agent_tools_top_k: int = Field(default=0, ge=0)
+    agent_hierarchical_routing: bool = Field(default=False)
+    agent_routing_cache: bool = Field(default=False)
+    agent_context_tokens: int = Field(default=0, ge=0)
+    agent_recent_comments: int = Field(default=5, ge=0)
+    agent_history_compaction: bool = Field(default=False)
+    agent_max_tokens: int = Field(default=0, ge=0)
+    agent_max_cost: float = Field(default=0, ge=0)
+    agent_max_seconds: float = Field(default=0, ge=0)
     fabric_provider: Literal["openai", "openrouter", "anthropic"] = Field(default="openai")
     fabric_model: str = Field(default="gpt-4o")
     fabric_temperature: float = Field(default=0, ge=0, le=1)
-    agent_type: Literal["router", "react", "react_issue", "react_pr"] = Field(default="router")
+    fabric_fallbacks: str = Field(default="")
+    agent_type: Literal["router", "react", "react_issue", "react_pr", "plan"] = Field(default="router")
     fabric_max_num_turns: int = Field(default=10, gt=0)
     fabric_patterns_included: str = Field(default="")
     fabric_patterns_excluded: str = Field(default="")
+    fabric_timeout: float = Field(default=0, ge=0)
+    fabric_max_retries: int = Field(default=0, ge=0)
+    fabric_hedge_delay: float = Field(default=0, ge=0)
+    fabric_chunk_tokens: int = Field(default=0, ge=0)
+    fabric_max_concurrent_chunks: int = Field(default=4, gt=0)
+    fabric_cache_dir: str = Field(default="")
+    fabric_cache_ttl: int = Field(default=604800, gt=0)
+    fabric_cache_max_entries: int = Field(default=1000, gt=0)
@@ -0,0 +1,90 @@
+import logging
+import re
+
+from fabric_agent_action.chunking import estimate_tokens
+from fabric_agent_action.inputs import InputSection, InputSections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RECENT_COMMENTS = 5
+
+
+def is_bot_comment(comment: InputSection) -> bool:
+    """Return True for comments of GitHub apps, e.g. outputs of earlier fabric commands"""
+    return bool(comment.author and comment.author.strip().endswith("[bot]"))
+
+
+class ContextBudgeter:
+    """Trims comment history of issue and pull request input to fit max_tokens.
+
+    INSTRUCTION, issue or pull request description, git diff, comments referenced by the
+    instruction (by id) and the recent_comments most recent comments are always kept. Older
+    comments are trimmed until input fits: first outputs of bots are replaced with short stubs,
+    then older comments are omitted, oldest first, leaving one marker per omitted run. Input
+    size is then bounded by its kept parts, however long the thread is.
+    """
+
+    def __init__(self, max_tokens: int, recent_comments: int = DEFAULT_RECENT_COMMENTS) -> None:
+        self.max_tokens = max_tokens
+        self.recent_comments = recent_comments
+        self._trimmed: dict[str, str] = {}
+
+    def trim(self, input_str: str) -> str:
+        """Return input fitting the budget if possible, input is returned unchanged if it fits"""
+        if input_str not in self._trimmed:
+            self._trimmed[input_str] = self._trim(input_str)
+        return self._trimmed[input_str]
+
+    def _get_referenced_ids(self, sections: InputSections) -> set[str]:
+        return {
+            comment.id
+            for comment in sections.comments
+            if comment.id and re.search(rf"(?<![\w-]){re.escape(comment.id)}(?![\w-])", sections.instruction)
+        }
+
+    def _trim(self, input_str: str) -> str:
+        if estimate_tokens(input_str) <= self.max_tokens:
+            return input_str
+        sections = InputSections.parse(input_str)
+        comments = sections.comments
+        referenced_ids = self._get_referenced_ids(sections)
+        recent = {id(c) for c in comments[-self.recent_comments :]} if self.recent_comments > 0 else set()
+        # trimming candidates, oldest first
+        older = [c for c in comments if id(c) not in recent and c.id not in referenced_ids]
+        if not older:
+            return input_str
+
+        texts: dict[int, str] = {id(section): section.text for section in sections.sections}
+        omitted: set[int] = set()
+
+        def render() -> str:
+            parts: list[str] = [sections.preamble] if sections.preamble else []
+            num_omitted = 0
+            for section in sections.sections:
+                if id(section) in omitted:
+                    num_omitted += 1
+                    continue
+                if num_omitted:
+                    parts.append(f"[{num_omitted} older comments omitted]")
+                    num_omitted = 0
+                parts.append(texts[id(section)])
+            if num_omitted:
+                parts.append(f"[{num_omitted} older comments omitted]")
+            return "\n\n".join(parts)
+
+        for comment in older:
+            if is_bot_comment(comment):
+                tokens = estimate_tokens(comment.content)
+                texts[id(comment)] = f"{comment.header}\n[output elided, {tokens} tokens]"
+        trimmed = render()
+        for comment in older:
+            if estimate_tokens(trimmed) <= self.max_tokens:
+                break
+            omitted.add(id(comment))
+            trimmed = render()
+
+        logger.info(
+            f"Comment history trimmed from {estimate_tokens(input_str)} to {estimate_tokens(trimmed)} tokens, "
+            f"{len(omitted)} of {len(comments)} comments omitted"
+        )
+        return trimmed
@@ -0,0 +1,204 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Sequence, TypeVar
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import ConfigDict
+
+from fabric_agent_action.failover import ainvoke_model, get_child_config, invoke_model
+from fabric_agent_action.prompt_caching import CachingModelWrapper, bind_tools, with_cache_breakpoints
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Deadline of the run passed before LLM call finished"""
+
+
+class Deadline:
+    """Deadline of the whole run, e.g. before GitHub job timeout kills it.
+
+    Calls are limited to the remaining time and cancelled when it runs out. When less than
+    threshold seconds remain, calls should degrade to a faster model (see DeadlineChatModel).
+    Deadline of 0 seconds means no deadline.
+    """
+
+    def __init__(self, seconds: float = 0, threshold: float = 0) -> None:
+        self.seconds = seconds
+        self.threshold = threshold
+        self.expires_at = time.monotonic() + seconds if seconds > 0 else None
+        self._degraded = False
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def get_remaining(self) -> Optional[float]:
+        """Return remaining seconds, None if there is no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.get_remaining() == 0
+
+    def should_degrade(self) -> bool:
+        remaining = self.get_remaining()
+        if remaining is None or remaining >= self.threshold:
+            return False
+        if not self._degraded:
+            self._degraded = True
+            logger.warning(f"{remaining:.0f}s left to deadline, switching to fallback model")
+        return True
+
+    def _check(self) -> Optional[float]:
+        remaining = self.get_remaining()
+        if remaining == 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s passed")
+        return remaining
+
+    def call(self, func: Callable[[], T]) -> T:
+        remaining = self._check()
+        if remaining is None:
+            return func()
+
+        # blocking call can't be interrupted, it runs in worker thread which is abandoned when deadline passes
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(thread_name_prefix="deadline-call")
+            pool = self._pool
+        future = pool.submit(contextvars.copy_context().run, func)
+        try:
+            return future.result(timeout=remaining)
+        except TimeoutError:
+            if not future.done():
+                future.cancel()
+                raise DeadlineExceeded(f"Deadline of {self.seconds}s passed, LLM call cancelled") from None
+            raise
+
+    async def acall(self, func: Callable[[], Awaitable[T]]) -> T:
+        remaining = self._check()
+        task = asyncio.ensure_future(func())
+        try:
+            done, _ = await asyncio.wait({task}, timeout=remaining)
+        finally:
+            if not task.done():
+                task.cancel()
+        if not done:
+            raise DeadlineExceeded(f"Deadline of {self.seconds}s passed, LLM call cancelled")
+        return task.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class DeadlineRunnable(Runnable[LanguageModelInput, Any]):
+    """Runnable limited to remaining time of deadline, degrading to fallback near the deadline"""
+
+    def __init__(
+        self,
+        runnable: Runnable[LanguageModelInput, Any],
+        fallback: Optional[Runnable[LanguageModelInput, Any]],
+        deadline: Deadline,
+    ) -> None:
+        self.runnable = runnable
+        self.fallback = fallback
+        self.deadline = deadline
+
+    def _select(self) -> Runnable[LanguageModelInput, Any]:
+        if self.fallback is not None and self.deadline.should_degrade():
+            return self.fallback
+        return self.runnable
+
+    def invoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.deadline.call(functools.partial(self._select().invoke, input, config, **kwargs))
+
+    async def ainvoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.deadline.acall(functools.partial(self._select().ainvoke, input, config, **kwargs))
+
+
+class DeadlineChatModel(BaseChatModel, CachingModelWrapper):
+    """Chat model limited to remaining time of deadline.
+
+    When less than deadline threshold remains, calls go to fallback model instead of starting
+    a call the model can't finish. Models are invoked as child runs, so their tokens are
+    streamed to callbacks. Responses of fallback are marked with is_fallback_response.
+    Prompt cache breakpoints are set for each model in its provider format.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model: BaseChatModel
+    fallback: Optional[BaseChatModel] = None
+    deadline: Deadline
+
+    @property
+    def _llm_type(self) -> str:
+        return "deadline"
+
+    def _select(self) -> BaseChatModel:
+        if self.fallback is not None and self.deadline.should_degrade():
+            return self.fallback
+        return self.model
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        run_id = run_manager.run_id if run_manager else None
+        config = get_child_config(run_manager, CallbackManager(handlers=[], parent_run_id=run_id))
+        model = self._select()
+        message = self.deadline.call(
+            functools.partial(invoke_model, model, model is not self.model, messages, config, stop=stop, **kwargs)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        run_id = run_manager.run_id if run_manager else None
+        config = get_child_config(run_manager, AsyncCallbackManager(handlers=[], parent_run_id=run_id))
+        model = self._select()
+        message = await self.deadline.acall(
+            functools.partial(ainvoke_model, model, model is not self.model, messages, config, stop=stop, **kwargs)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable[LanguageModelInput, BaseMessage]:
+        fallback = self.fallback.bind_tools(tools, **kwargs) if self.fallback is not None else None
+        return DeadlineRunnable(self.model.bind_tools(tools, **kwargs), fallback, self.deadline)
+
+    def bind_cached_tools(
+        self, tool_schemas: Sequence[dict[str, Any]], cache_messages: bool
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        fallback = bind_tools(self.fallback, tool_schemas, cache_messages) if self.fallback is not None else None
+        return DeadlineRunnable(bind_tools(self.model, tool_schemas, cache_messages), fallback, self.deadline)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable[LanguageModelInput, Any]:
+        models = [self.model, self.fallback] if self.fallback is not None else [self.model]
+        runnables = [with_cache_breakpoints(m, m.with_structured_output(schema, **kwargs)) for m in models]
+        return DeadlineRunnable(runnables[0], runnables[1] if len(runnables) > 1 else None, self.deadline)
@@ -0,0 +1,232 @@
+import fnmatch
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from fabric_agent_action.chunking import estimate_tokens
+from fabric_agent_action.inputs import GIT_DIFF, InputSections
+
+logger = logging.getLogger(__name__)
+
+# Files that rarely matter for review but often make up most of the diff
+DEFAULT_EXCLUDE_GLOBS = (
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "*.lock",
+    "go.sum",
+    "vendor/*",
+    "node_modules/*",
+    "third_party/*",
+    "dist/*",
+    "*.min.js",
+    "*.min.css",
+    "*.map",
+    "*.snap",
+    "*_pb2.py",
+    "*_pb2_grpc.py",
+    "*.pb.go",
+    "*.generated.*",
+)
+
+GENERATED_MARKERS = ("@generated", "do not edit", "code generated", "auto-generated", "autogenerated")
+# Lines of minified files are much longer than lines of code written by hand
+MINIFIED_LINE_LENGTH = 500
+GENERATED_MARKER_LINES = 10
+
+TEST_PATH_RE = re.compile(r"(^|/)(tests?|__tests__|spec)/|(^|/)test_[^/]*$|_test\.[^/]*$|\.(test|spec)\.[^/]*$")
+DOCS_PATH_RE = re.compile(r"(^|/)docs?/|\.(md|rst|txt|adoc)$")
+CONFIG_PATH_RE = re.compile(r"\.(json|ya?ml|toml|ini|cfg|conf|xml)$")
+
+
+@dataclass
+class FileDiff:
+    """Diff of single file: header lines (diff --git, index, ---, +++) and hunks, each with its lines"""
+
+    header: list[str] = field(default_factory=list)
+    hunks: list[list[str]] = field(default_factory=list)
+
+    @property
+    def path(self) -> str:
+        for line in self.header:
+            if line.startswith("+++ ") and not line.startswith("+++ /dev/null"):
+                return _strip_prefix(line[4:].strip())
+        for line in self.header:
+            if line.startswith("--- ") and not line.startswith("--- /dev/null"):
+                return _strip_prefix(line[4:].strip())
+        _, _, path = self.header[0].strip().rpartition(" b/") if self.header else ("", "", "")
+        return path
+
+    @property
+    def is_binary(self) -> bool:
+        return any(line.startswith(("Binary files ", "GIT binary patch")) for line in self.header)
+
+    def get_changed_lines(self, hunk: list[str]) -> list[str]:
+        return [line for line in hunk[1:] if line.startswith(("+", "-"))]
+
+    def get_stats(self) -> tuple[int, int]:
+        added = removed = 0
+        for hunk in self.hunks:
+            for line in self.get_changed_lines(hunk):
+                if line.startswith("+"):
+                    added += 1
+                else:
+                    removed += 1
+        return added, removed
+
+
+def _strip_prefix(path: str) -> str:
+    return path[2:] if path.startswith(("a/", "b/")) else path
+
+
+def iter_lines(text: str) -> Iterator[str]:
+    """Yield lines of text with line endings, without copying the whole text like io.StringIO"""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start) + 1 or len(text)
+        yield text[start:end]
+        start = end
+
+
+def iter_file_diffs(lines: Iterable[str]) -> Iterator[FileDiff]:
+    """Parse diff lines (with line endings) to file diffs, holding only one file in memory.
+
+    Lines before the first file header are yielded as file diff without hunks.
+    """
+    file_diff = FileDiff()
+    for line in lines:
+        if line.startswith("diff --git "):
+            if file_diff.header or file_diff.hunks:
+                yield file_diff
+            file_diff = FileDiff(header=[line])
+        elif line.startswith("@@"):
+            file_diff.hunks.append([line])
+        elif file_diff.hunks:
+            file_diff.hunks[-1].append(line)
+        else:
+            file_diff.header.append(line)
+    if file_diff.header or file_diff.hunks:
+        yield file_diff
+
+
+@dataclass(frozen=True)
+class HunkInfo:
+    file_index: int
+    hunk_index: int
+    tokens: int
+    score: float
+
+
+class DiffPruner:
+    """Removes noise from git diff and fits the rest to token budget.
+
+    With summarize_noise, files matching exclude globs (lockfiles, vendored and generated code
+    by default), binary, generated or minified files are summarized to one line. With max_tokens > 0, hunks of the
+    remaining files are ranked by number of changed lines weighted by kind of file (code first,
+    then configuration, tests and docs) and the best ranked hunks fitting the budget are kept in
+    their original order. Headers of all files are kept, so the agent sees every changed file.
+
+    Diff is read twice from open_lines: first pass ranks hunks, second pass writes the result.
+    The parser holds only one file diff in memory at once, the source of lines and the result
+    are up to the caller (prune and prune_input work on strings).
+    """
+
+    def __init__(
+        self,
+        exclude_globs: Sequence[str] = DEFAULT_EXCLUDE_GLOBS,
+        max_tokens: int = 0,
+        summarize_noise: bool = True,
+    ) -> None:
+        self.exclude_globs = list(exclude_globs)
+        self.max_tokens = max_tokens
+        self.summarize_noise = summarize_noise
+
+    def get_noise_reason(self, file_diff: FileDiff) -> Optional[str]:
+        """Return why file diff is noise, None if it should be kept"""
+        path = file_diff.path
+        if not self.summarize_noise or not file_diff.header or not path:
+            return None
+        for glob in self.exclude_globs:
+            if fnmatch.fnmatch(path, glob) or fnmatch.fnmatch(path, f"*/{glob}"):
+                return f"matches {glob}"
+        if file_diff.is_binary:
+            return "binary file"
+        added = [line for hunk in file_diff.hunks for line in hunk[1:] if line.startswith("+")]
+        if any(marker in line.lower() for line in added[:GENERATED_MARKER_LINES] for marker in GENERATED_MARKERS):
+            return "generated file"
+        if added and sum(len(line) for line in added) / len(added) > MINIFIED_LINE_LENGTH:
+            return "minified file"
+        return None
+
+    def get_weight(self, path: str) -> float:
+        if TEST_PATH_RE.search(path) or DOCS_PATH_RE.search(path):
+            return 0.5
+        if CONFIG_PATH_RE.search(path):
+            return 0.7
+        return 1.0
+
+    def _get_summary(self, file_diff: FileDiff, reason: str) -> str:
+        if not file_diff.hunks:
+            return f"{file_diff.header[0].rstrip()}\n[{reason} omitted]\n"
+        added, removed = file_diff.get_stats()
+        return f"{file_diff.header[0].rstrip()}\n[{reason}, +{added} -{removed} lines omitted]\n"
+
+    def _select_hunks(self, open_lines: Callable[[], Iterable[str]]) -> Optional[set[tuple[int, int]]]:
+        """Return (file index, hunk index) of hunks fitting budget, None if all fit"""
+        fixed_tokens = 0
+        hunks: list[HunkInfo] = []
+        for file_index, file_diff in enumerate(iter_file_diffs(open_lines())):
+            reason = self.get_noise_reason(file_diff)
+            if reason is not None:
+                fixed_tokens += estimate_tokens(self._get_summary(file_diff, reason))
+                continue
+            fixed_tokens += estimate_tokens("".join(file_diff.header))
+            weight = self.get_weight(file_diff.path)
+            for hunk_index, hunk in enumerate(file_diff.hunks):
+                changed = len(file_diff.get_changed_lines(hunk))
+                hunks.append(HunkInfo(file_index, hunk_index, estimate_tokens("".join(hunk)), weight * changed))
+
+        if self.max_tokens <= 0 or fixed_tokens + sum(h.tokens for h in hunks) <= self.max_tokens:
+            return None
+        selected: set[tuple[int, int]] = set()
+        budget = self.max_tokens - fixed_tokens
+        for hunk_info in sorted(hunks, key=lambda h: (-h.score, h.tokens)):
+            if hunk_info.tokens <= budget:
+                selected.add((hunk_info.file_index, hunk_info.hunk_index))
+                budget -= hunk_info.tokens
+        return selected
+
+    def iter_pruned(self, open_lines: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """Yield pruned diff, file by file"""
+        selected = self._select_hunks(open_lines)
+        summarized = omitted = 0
+        for file_index, file_diff in enumerate(iter_file_diffs(open_lines())):
+            reason = self.get_noise_reason(file_diff)
+            if reason is not None:
+                summarized += 1
+                yield self._get_summary(file_diff, reason)
+                continue
+            kept = [
+                hunk
+                for hunk_index, hunk in enumerate(file_diff.hunks)
+                if selected is None or (file_index, hunk_index) in selected
+            ]
+            yield "".join(file_diff.header) + "".join("".join(hunk) for hunk in kept)
+            num_omitted = len(file_diff.hunks) - len(kept)
+            if num_omitted:
+                omitted += num_omitted
+                yield f"[{num_omitted} of {len(file_diff.hunks)} hunks omitted to fit token budget]\n"
+        logger.info(f"Git diff pruned: {summarized} files summarized, {omitted} hunks omitted")
+
+    def prune(self, diff: str) -> str:
+        return "".join(self.iter_pruned(lambda: iter_lines(diff)))
+
+    def prune_input(self, input_str: str) -> str:
+        """Return input with its GIT DIFF section pruned, input without git diff is returned unchanged"""
+        section = InputSections.parse(input_str).get(GIT_DIFF)
+        if section is None:
+            return input_str
+        pruned = self.prune(section.content).rstrip("\n")
+        return input_str.replace(section.text, f"{section.header}\n{pruned}", 1)
@@ -0,0 +1,313 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Iterator, Literal, Optional, Sequence, TypeVar
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    BaseCallbackManager,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.callbacks.manager import BaseRunManager
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import ConfigDict
+
+from fabric_agent_action.call_policy import RETRYABLE_ERRORS
+from fabric_agent_action.prompt_caching import (
+    CachingModelWrapper,
+    add_cache_breakpoints,
+    bind_tools,
+    with_cache_breakpoints,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+FAILURE_RATE_THRESHOLD = 0.5
+SLOW_CALL_SECONDS = 120.0
+WINDOW_SIZE = 10
+MIN_CALLS = 4
+OPEN_SECONDS = 30.0
+
+
+class CircuitBreaker:
+    """Circuit breaker of single LLM provider, shared by all its models.
+
+    Call fails if it raises transient provider error, takes longer than slow_call_seconds or is
+    cancelled (e.g. by call timeout) before it finishes.
+    Circuit opens when failure rate of last window_size calls (at least min_calls) reaches
+    failure_rate_threshold, or when a probe fails. Open circuit rejects calls for open_seconds,
+    then it is half-open: one probe call is let through, success closes the circuit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = FAILURE_RATE_THRESHOLD,
+        slow_call_seconds: float = SLOW_CALL_SECONDS,
+        window_size: int = WINDOW_SIZE,
+        min_calls: int = MIN_CALLS,
+        open_seconds: float = OPEN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.state: Literal["closed", "open", "half_open"] = "closed"
+        self._window: deque[bool] = deque(maxlen=window_size)
+        self._opened_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() >= self._opened_until:
+                logger.info(f"Circuit of {self.name} half-open, probing")
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, success: bool, latency: float) -> None:
+        failed = not success or latency > self.slow_call_seconds
+        with self._lock:
+            if self.state == "half_open":
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    logger.info(f"Circuit of {self.name} closed")
+                    self.state = "closed"
+                    self._window.clear()
+                return
+
+            self._window.append(failed)
+            failure_rate = sum(self._window) / len(self._window)
+            if len(self._window) >= self.min_calls and failure_rate >= self.failure_rate_threshold:
+                self._open()
+
+    def release(self) -> None:
+        """Let another probe through if probe call was cancelled"""
+        with self._lock:
+            self._probing = False
+
+    def _open(self) -> None:
+        logger.warning(f"Circuit of {self.name} open for {self.open_seconds}s")
+        self.state = "open"
+        self._opened_until = time.monotonic() + self.open_seconds
+        self._window.clear()
+
+
+class Failover:
+    """Calls ordered alternatives, skipping those with open circuit, until one succeeds.
+
+    Only transient provider errors fail over, other errors are raised. If all circuits
+    are open, all alternatives are tried anyway.
+    """
+
+    def __init__(self, names: Sequence[str], breakers: Sequence[CircuitBreaker]) -> None:
+        self.names = list(names)
+        self.breakers = list(breakers)
+
+    def _iter_order(self) -> Iterator[int]:
+        """Yield alternatives to call in order.
+
+        Circuit is checked just before its alternative is called, so half-open circuit of
+        fallback doesn't use up its probe when an earlier alternative succeeds.
+        """
+        tried = False
+        for i, breaker in enumerate(self.breakers):
+            if breaker.allow_request():
+                tried = True
+                yield i
+        if not tried:
+            logger.warning("All providers have open circuit, trying all of them")
+            yield from range(len(self.breakers))
+
+    def _on_failure(self, i: int, e: BaseException) -> None:
+        self.breakers[i].record(False, 0.0)
+        logger.warning(f"{self.names[i]} failed ({type(e).__name__}: {e})")
+
+    def call(self, calls: Sequence[Callable[[], T]]) -> T:
+        error: Optional[BaseException] = None
+        for i in self._iter_order():
+            started = time.monotonic()
+            try:
+                result = calls[i]()
+            except RETRYABLE_ERRORS as e:
+                self._on_failure(i, e)
+                error = e
+                continue
+            except Exception:
+                # provider responded, e.g. invalid request would fail on other providers too
+                self.breakers[i].record(True, time.monotonic() - started)
+                raise
+            except BaseException:
+                self.breakers[i].release()
+                raise
+            self.breakers[i].record(True, time.monotonic() - started)
+            return result
+        assert error is not None
+        raise error
+
+    async def acall(self, calls: Sequence[Callable[[], Awaitable[T]]]) -> T:
+        error: Optional[BaseException] = None
+        for i in self._iter_order():
+            started = time.monotonic()
+            try:
+                result = await calls[i]()
+            except RETRYABLE_ERRORS as e:
+                self._on_failure(i, e)
+                error = e
+                continue
+            except Exception:
+                self.breakers[i].record(True, time.monotonic() - started)
+                raise
+            except asyncio.CancelledError:
+                # cut off by call timeout or deadline, provider didn't answer in time
+                self.breakers[i].record(False, time.monotonic() - started)
+                raise
+            except BaseException:
+                self.breakers[i].release()
+                raise
+            self.breakers[i].record(True, time.monotonic() - started)
+            return result
+        assert error is not None
+        raise error
+
+
+class FailoverRunnable(Runnable[LanguageModelInput, Any]):
+    """Runnable failing over between equivalent runnables of different models, e.g. with bound tools"""
+
+    def __init__(self, runnables: Sequence[Runnable[LanguageModelInput, Any]], failover: Failover) -> None:
+        self.runnables = list(runnables)
+        self.failover = failover
+
+    def invoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.failover.call([functools.partial(r.invoke, input, config, **kwargs) for r in self.runnables])
+
+    async def ainvoke(self, input: LanguageModelInput, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.failover.acall(
+            [functools.partial(r.ainvoke, input, config, **kwargs) for r in self.runnables]
+        )
+
+
+# Response metadata flag of responses served by a fallback model instead of the configured one
+FALLBACK_METADATA_KEY = "fallback_model"
+
+
+def mark_fallback_response(message: BaseMessage) -> BaseMessage:
+    message.response_metadata[FALLBACK_METADATA_KEY] = True
+    return message
+
+
+def is_fallback_response(message: BaseMessage) -> bool:
+    """Return True if response was served by fallback model, e.g. it should not be cached as response of primary"""
+    return bool(message.response_metadata.get(FALLBACK_METADATA_KEY))
+
+
+def invoke_model(
+    model: BaseChatModel, fallback: bool, messages: list[BaseMessage], *args: Any, **kwargs: Any
+) -> BaseMessage:
+    """Invoke wrapped model with its cache breakpoints, marking response of fallback model"""
+    message = model.invoke(add_cache_breakpoints(model, messages), *args, **kwargs)
+    return mark_fallback_response(message) if fallback else message
+
+
+async def ainvoke_model(
+    model: BaseChatModel, fallback: bool, messages: list[BaseMessage], *args: Any, **kwargs: Any
+) -> BaseMessage:
+    """Async variant of invoke_model"""
+    message = await model.ainvoke(add_cache_breakpoints(model, messages), *args, **kwargs)
+    return mark_fallback_response(message) if fallback else message
+
+
+def get_child_config(run_manager: Optional[BaseRunManager], manager: BaseCallbackManager) -> RunnableConfig:
+    """Return config running model as child of failover run, with its inheritable callbacks, tags and metadata"""
+    if run_manager is None:
+        return {}
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return {"callbacks": manager}
+
+
+class FailoverChatModel(BaseChatModel, CachingModelWrapper):
+    """Chat model failing over between models of different providers in order.
+
+    Models are invoked as child runs, so their tokens are streamed to callbacks.
+    Tools, structured output and prompt cache breakpoints are set for each model in its provider format.
+    Responses of models other than the first are marked with is_fallback_response.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    models: list[BaseChatModel]
+    failover: Failover
+
+    @property
+    def _llm_type(self) -> str:
+        return "failover"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        run_id = run_manager.run_id if run_manager else None
+        config = get_child_config(run_manager, CallbackManager(handlers=[], parent_run_id=run_id))
+        message = self.failover.call(
+            [
+                functools.partial(invoke_model, m, i > 0, messages, config, stop=stop, **kwargs)
+                for i, m in enumerate(self.models)
+            ]
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        run_id = run_manager.run_id if run_manager else None
+        config = get_child_config(run_manager, AsyncCallbackManager(handlers=[], parent_run_id=run_id))
+        message = await self.failover.acall(
+            [
+                functools.partial(ainvoke_model, m, i > 0, messages, config, stop=stop, **kwargs)
+                for i, m in enumerate(self.models)
+            ]
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable[LanguageModelInput, BaseMessage]:
+        return FailoverRunnable([m.bind_tools(tools, **kwargs) for m in self.models], self.failover)
+
+    def bind_cached_tools(
+        self, tool_schemas: Sequence[dict[str, Any]], cache_messages: bool
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        return FailoverRunnable([bind_tools(m, tool_schemas, cache_messages) for m in self.models], self.failover)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> Runnable[LanguageModelInput, Any]:
+        return FailoverRunnable(
+            [with_cache_breakpoints(m, m.with_structured_output(schema, **kwargs)) for m in self.models],
+            self.failover,
+        )
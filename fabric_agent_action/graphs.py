@@ -1,44 +1,179 @@
 import io
 import logging
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Final, Type
+from typing import Any, Final, Optional, TextIO, Type
 
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
 from langgraph.graph.state import CompiledStateGraph
 
 from fabric_agent_action.config import AppConfig
+from fabric_agent_action.fabric_tools import FABRIC_PATTERN_TAG
+from fabric_agent_action.inputs import parse_reference
 
 logger = logging.getLogger(__name__)
 
+FLUSH_INTERVAL_SECONDS = 0.5
+
+
+class StreamingOutputWriter:
+    """Writes tokens of fabric pattern output to output file as they are generated.
+
+    The final output is usually output of the last fabric pattern run, so each new run restarts
+    the output file, preamble first, and its tokens are written instead. When graph finishes,
+    written text is completed to the final output: the rest is appended if written text is its
+    prefix, otherwise output file is rewritten (e.g. if agent answered in its own words).
+
+    Output file that can't be rewritten (e.g. stdout) can't be restarted either, so nothing is
+    streamed to it and only the final output is written.
+    """
+
+    def __init__(self, output_file: TextIO, preamble: str, flush_interval: float = FLUSH_INTERVAL_SECONDS) -> None:
+        self.output_file = output_file
+        self.preamble = preamble
+        self.flush_interval = flush_interval
+        self.enabled = output_file.seekable()
+        self._run_id: Optional[str] = None
+        self._run_ids: set[str] = set()
+        self._written: list[str] = []
+        self._last_flush = time.monotonic()
+        if not self.enabled:
+            logger.warning("Output file is not seekable, output is written when agent finishes")
+
+    def write_token(self, run_id: str, token: str) -> None:
+        if not token or not self.enabled:
+            return
+        if run_id not in self._run_ids:
+            logger.debug(f"Streaming output of fabric pattern run: {run_id}")
+            self._run_ids.add(run_id)
+            self._run_id = run_id
+            self._restart()
+            self._write(self.preamble)
+        if run_id != self._run_id:
+            return
+
+        self._write(token)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.output_file.flush()
+            self._last_flush = time.monotonic()
+
+    def finish(self, output: str) -> None:
+        written = "".join(self._written)
+        if output.startswith(written):
+            self._write(output[len(written) :])
+        else:
+            logger.debug("Streamed output differs from final output, rewriting output file")
+            self._restart()
+            self._write(output)
+        self.output_file.flush()
+
+    def _restart(self) -> None:
+        if self._written:
+            self.output_file.seek(0)
+            self.output_file.truncate()
+            self._written = []
+
+    def _write(self, text: str) -> None:
+        self.output_file.write(text)
+        self._written.append(text)
+
 
 class BaseGraphExecutor(ABC):
     """Abstract base class for all graph executors."""
 
     def __init__(self, config: AppConfig) -> None:
         self.config: Final[AppConfig] = config
+        self._stream_writer: Optional[StreamingOutputWriter] = None
         self._setup_output_encoding()
 
     @abstractmethod
     def execute(self, graph: CompiledStateGraph, input_str: str) -> None:
         pass
 
+    async def aexecute(self, graph: CompiledStateGraph, input_str: str) -> None:
+        """Execute graph asynchronously, LLM requests of concurrent nodes don't block each other"""
+        await self._aexecute(graph, input_str)
+
     @abstractmethod
     def _invoke_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
         pass
 
+    async def _ainvoke_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
+        return await graph.ainvoke(self._get_graph_input(input_str))
+
     @abstractmethod
     def _write_output(self, messages_state: Any) -> None:
         pass
 
+    def _get_graph_input(self, input_str: str) -> dict[str, Any]:
+        return {"messages": [HumanMessage(content=input_str)]}
+
     def _execute(self, graph: CompiledStateGraph, input_str: str) -> None:
         try:
-            messages_state = self._invoke_graph(graph, input_str)
+            if self.config.output_streaming:
+                messages_state = self._stream_graph(graph, input_str)
+            else:
+                messages_state = self._invoke_graph(graph, input_str)
+            self._log_messages(messages_state)
+            self._write_output(messages_state)
+        except Exception as e:
+            logger.error("Graph execution failed: %s", str(e))
+            raise
+
+    async def _aexecute(self, graph: CompiledStateGraph, input_str: str) -> None:
+        try:
+            if self.config.output_streaming:
+                messages_state = await self._astream_graph(graph, input_str)
+            else:
+                messages_state = await self._ainvoke_graph(graph, input_str)
             self._log_messages(messages_state)
             self._write_output(messages_state)
         except Exception as e:
             logger.error("Graph execution failed: %s", str(e))
             raise
 
+    def _stream_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
+        """Run graph writing fabric pattern tokens to output file, return final state"""
+        self._stream_writer = StreamingOutputWriter(self.config.output_file, self._format_output(""))
+        messages_state = None
+        stream: Any = graph.stream(self._get_graph_input(input_str), stream_mode=["messages", "values"])
+        for mode, data in stream:
+            if mode == "values":
+                messages_state = data
+            else:
+                self._write_message_chunk(data)
+        return messages_state
+
+    async def _astream_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
+        """Async variant of _stream_graph"""
+        self._stream_writer = StreamingOutputWriter(self.config.output_file, self._format_output(""))
+        messages_state = None
+        stream: Any = graph.astream(self._get_graph_input(input_str), stream_mode=["messages", "values"])
+        async for mode, data in stream:
+            if mode == "values":
+                messages_state = data
+            else:
+                self._write_message_chunk(data)
+        return messages_state
+
+    def _write_message_chunk(self, data: Any) -> None:
+        """Write token of fabric pattern run from messages stream"""
+        assert self._stream_writer is not None
+        chunk, metadata = data
+        if (
+            isinstance(chunk, AIMessageChunk)
+            and isinstance(chunk.content, str)
+            and FABRIC_PATTERN_TAG in metadata.get("tags", [])
+        ):
+            self._stream_writer.write_token(str(chunk.id), chunk.content)
+
+    def _write_content(self, content: str) -> None:
+        output = self._format_output(content)
+        if self._stream_writer is not None:
+            self._stream_writer.finish(output)
+        else:
+            self.config.output_file.write(output)
+
     def _setup_output_encoding(self) -> None:
         if isinstance(self.config.output_file, io.TextIOWrapper):
             try:
@@ -67,15 +202,14 @@ class RouterGraphExecutor(BaseGraphExecutor):
         self._execute(graph, input_str)
 
     def _invoke_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
-        return graph.invoke({"messages": [HumanMessage(content=input_str)]})
+        return graph.invoke(self._get_graph_input(input_str))
 
     def _write_output(self, messages_state: Any) -> None:
         last_message = messages_state["messages"][-1]
 
-        content = self._format_output(
+        self._write_content(
             last_message.content if isinstance(last_message.content, str) else str(last_message.content)
         )
-        self.config.output_file.write(content)
 
 
 class ReActGraphExecutor(BaseGraphExecutor):
@@ -84,23 +218,44 @@ class ReActGraphExecutor(BaseGraphExecutor):
     def execute(self, graph: CompiledStateGraph, input_str: str) -> None:
         self._execute(graph, input_str)
 
+    def _get_graph_input(self, input_str: str) -> dict[str, Any]:
+        return {
+            "messages": [HumanMessage(content=input_str)],
+            "max_num_turns": self.config.fabric_max_num_turns,
+            "max_tokens": self.config.agent_max_tokens,
+            "max_cost": self.config.agent_max_cost,
+            "max_seconds": self.config.agent_max_seconds,
+        }
+
     def _invoke_graph(self, graph: CompiledStateGraph, input_str: str) -> Any:
-        return graph.invoke(
-            {
-                "messages": [HumanMessage(content=input_str)],
-                "max_num_turns": self.config.fabric_max_num_turns,
-            }
-        )
+        return graph.invoke(self._get_graph_input(input_str))
 
     def _write_output(self, messages_state: Any) -> None:
-        last_message = messages_state["messages"][-1]
+        messages = messages_state["messages"]
+        last_message = messages[-1]
         if not isinstance(last_message, AIMessage) or not last_message.content:
             raise ValueError("Invalid or empty AI message")
 
-        content = self._format_output(
-            last_message.content if isinstance(last_message.content, str) else str(last_message.content)
-        )
-        self.config.output_file.write(content)
+        content = last_message.content if isinstance(last_message.content, str) else str(last_message.content)
+        passthrough_content = self._get_passthrough_content(messages, content)
+        if passthrough_content is not None:
+            logger.debug("Writing tool output referenced by final AI message")
+            content = passthrough_content
+
+        self._write_content(content)
+
+    def _get_passthrough_content(self, messages: list[BaseMessage], content: str) -> Optional[str]:
+        """Return tool output if final answer is only a {{<tool call id>}} reference to it"""
+        tool_call_id = parse_reference(content)
+        if tool_call_id is None:
+            return None
+
+        for message in reversed(messages):
+            if isinstance(message, ToolMessage) and message.tool_call_id == tool_call_id:
+                return message.content if isinstance(message.content, str) else str(message.content)
+
+        logger.warning(f"Final AI message references unknown tool call: {tool_call_id}")
+        return None
 
 
 class GraphExecutorFactory:
@@ -111,6 +266,7 @@ class GraphExecutorFactory:
         "react": ReActGraphExecutor,
         "react_issue": ReActGraphExecutor,
         "react_pr": ReActGraphExecutor,
+        "plan": ReActGraphExecutor,
     }
 
     @classmethod
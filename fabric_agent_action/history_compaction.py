@@ -0,0 +1,121 @@
+from typing import Any, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from fabric_agent_action.chunking import estimate_tokens
+from fabric_agent_action.inputs import (
+    COMMENT,
+    GIT_DIFF,
+    GITHUB_ISSUE,
+    GITHUB_PULL_REQUEST,
+    INPUT,
+    InputSections,
+    find_references,
+)
+
+# Shorter texts are not worth replacing, reference or summary would be about as long
+MIN_COMPACT_TOKENS = 50
+
+CONTENT_SECTIONS = (INPUT, GITHUB_ISSUE, GITHUB_PULL_REQUEST, GIT_DIFF)
+
+
+class HistoryCompactor:
+    """Compacts ReAct message history before it is resent to agent LLM.
+
+    Every turn resends the whole history, so large texts repeated in it make prompt size grow
+    quadratically with the number of turns. Two kinds of repetition are compacted:
+
+    - tool outputs consumed by a later tool call (passed to it as whole argument value or by
+      {{<tool call id>}} reference) are replaced with a short note, output of the later call supersedes them
+    - with input references, tool call arguments copying input sections or earlier tool outputs
+      get the copies replaced with {{NAME}} references, the form agent is asked to use anyway
+
+    Compaction of a message depends only on messages before it and on whether a later tool call
+    consumed it, so once compacted, history prefix stays the same and is still read from prompt cache.
+    """
+
+    def __init__(self, input_references: bool = False, min_tokens: int = MIN_COMPACT_TOKENS) -> None:
+        self.input_references = input_references
+        self.min_tokens = min_tokens
+
+    def _get_input_texts(self, messages: Sequence[BaseMessage]) -> list[tuple[str, str]]:
+        first = messages[0] if messages else None
+        if not isinstance(first, HumanMessage) or not isinstance(first.content, str):
+            return []
+        sections = InputSections.parse(first.content)
+        texts = [(s.name, s.content) for s in sections.sections if s.name in CONTENT_SECTIONS]
+        texts += [(f"{COMMENT} {c.id}", c.text) for c in sections.comments if c.id]
+        return [(name, text) for name, text in texts if estimate_tokens(text) >= self.min_tokens]
+
+    def _compact_args(self, args: dict[str, Any], texts: list[tuple[str, str]]) -> dict[str, Any]:
+        compacted: dict[str, Any] = {}
+        for key, value in args.items():
+            if isinstance(value, str):
+                # longest first, so text is not replaced by reference to its part
+                for name, text in sorted(texts, key=lambda t: -len(t[1])):
+                    if text in value:
+                        value = value.replace(text, f"{{{{{name}}}}}")
+            compacted[key] = value
+        return compacted
+
+    def _get_consumed(self, tool_call: Any, outputs: dict[str, str]) -> list[str]:
+        """Return ids of tool calls whose outputs are consumed by tool call.
+
+        Output quoted only in part of an argument is not consumed, the argument doesn't supersede it.
+        """
+        consumed: list[str] = []
+        for value in tool_call["args"].values():
+            if not isinstance(value, str):
+                continue
+            references = set(find_references(value))
+            consumed += [
+                call_id
+                for call_id, output in outputs.items()
+                if call_id in references or output.strip() == value.strip()
+            ]
+        return consumed
+
+    def _count_tokens(self, args: dict[str, Any]) -> int:
+        return sum(estimate_tokens(value) for value in args.values() if isinstance(value, str))
+
+    def compact(self, messages: Sequence[BaseMessage]) -> tuple[list[BaseMessage], int]:
+        """Return compacted messages and number of tokens saved"""
+        texts = self._get_input_texts(messages)
+        # outputs of earlier tool calls large enough to compact, by tool call id
+        outputs: dict[str, str] = {}
+        consumers: dict[str, str] = {}
+        compacted: list[BaseMessage] = []
+        saved = 0
+
+        for message in messages:
+            if isinstance(message, AIMessage) and message.tool_calls:
+                for tool_call in message.tool_calls:
+                    for call_id in self._get_consumed(tool_call, outputs):
+                        consumers.setdefault(call_id, tool_call["id"] or "")
+                if self.input_references:
+                    earlier_texts = texts + list(outputs.items())
+                    tool_calls: list[dict[str, Any]] = [
+                        {**tool_call, "args": self._compact_args(tool_call["args"], earlier_texts)}
+                        for tool_call in message.tool_calls
+                    ]
+                    saved += sum(
+                        self._count_tokens(before["args"]) - self._count_tokens(after["args"])
+                        for before, after in zip(message.tool_calls, tool_calls)
+                    )
+                    message = message.model_copy(update={"tool_calls": tool_calls})
+            elif isinstance(message, ToolMessage) and isinstance(message.content, str):
+                if estimate_tokens(message.content) >= self.min_tokens:
+                    outputs[message.tool_call_id] = message.content
+            compacted.append(message)
+
+        for i, message in enumerate(compacted):
+            if not isinstance(message, ToolMessage) or message.tool_call_id not in consumers:
+                continue
+            content = message.content if isinstance(message.content, str) else ""
+            tokens = estimate_tokens(content)
+            note = f"[output passed to tool call {consumers[message.tool_call_id]}, {tokens} tokens elided]"
+            saved += tokens - estimate_tokens(note)
+            compacted[i] = message.model_copy(update={"content": note})
+
+        return compacted, saved
+
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+WARM_UP_TIMEOUT_SECONDS = 5.0
+
+# Called with provider, model and response of every request, e.g. to read rate limit headers
+ResponseHook = Callable[[str, str, httpx.Response], None]
+
+# Keep idle connections open for whole run, pattern calls can be minutes apart
+KEEPALIVE_EXPIRY_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class ClientKey:
+    provider: str
+    base_url: str
+    api_key_hash: str
+
+
+@dataclass(frozen=True)
+class HTTPClients:
+    client: httpx.Client
+    async_client: httpx.AsyncClient
+
+
+@dataclass(frozen=True)
+class HTTPTransports:
+    transport: httpx.HTTPTransport
+    async_transport: httpx.AsyncHTTPTransport
+
+
+def is_http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HTTPClientPool:
+    """HTTP clients of OpenAI-compatible providers, shared by all LLMs with the same provider, model, base URL and key.
+
+    Clients of all models with the same provider, base URL and key share transport with keep-alive connections,
+    so agent and fabric LLMs pay for TLS handshake once. Each model has its own clients, so response hook
+    knows the requested model without parsing request body. HTTP/2 requires h2 package, without it HTTP/1.1 is used.
+    """
+
+    def __init__(self, http2: bool = False, response_hook: Optional[ResponseHook] = None) -> None:
+        self.http2 = http2 and is_http2_available()
+        self.response_hook = response_hook
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requires h2 package, using HTTP/1.1")
+        self._transports: dict[ClientKey, HTTPTransports] = {}
+        self._clients: dict[tuple[ClientKey, str], HTTPClients] = {}
+        # LLMs can be created in worker thread while warm-up runs on event loop
+        self._lock = threading.Lock()
+
+    def get_key(self, provider: str, base_url: Optional[str], api_key: str) -> ClientKey:
+        return ClientKey(
+            provider=provider,
+            base_url=base_url or OPENAI_API_BASE,
+            api_key_hash=hashlib.sha256(api_key.encode("utf-8")).hexdigest(),
+        )
+
+    def get_clients(self, provider: str, base_url: Optional[str], api_key: str, model: str) -> HTTPClients:
+        key = self.get_key(provider, base_url, api_key)
+        with self._lock:
+            return self._get_or_create_clients(key, model)
+
+    def _get_or_create_transports(self, key: ClientKey) -> HTTPTransports:
+        if key not in self._transports:
+            logger.debug(f"Creating HTTP transports for {key.provider} at {key.base_url}, http2={self.http2}")
+            limits = httpx.Limits(
+                max_connections=openai.DEFAULT_CONNECTION_LIMITS.max_connections,
+                max_keepalive_connections=openai.DEFAULT_CONNECTION_LIMITS.max_keepalive_connections,
+                keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+            )
+            self._transports[key] = HTTPTransports(
+                transport=httpx.HTTPTransport(http2=self.http2, limits=limits),
+                async_transport=httpx.AsyncHTTPTransport(http2=self.http2, limits=limits),
+            )
+        return self._transports[key]
+
+    def _get_or_create_clients(self, key: ClientKey, model: str) -> HTTPClients:
+        if (key, model) not in self._clients:
+            transports = self._get_or_create_transports(key)
+            self._clients[(key, model)] = HTTPClients(
+                client=openai.DefaultHttpxClient(
+                    transport=transports.transport, event_hooks={"response": [self._get_sync_hook(key, model)]}
+                ),
+                async_client=openai.DefaultAsyncHttpxClient(
+                    transport=transports.async_transport,
+                    event_hooks={"response": [self._get_async_hook(key, model)]},
+                ),
+            )
+        return self._clients[(key, model)]
+
+    def _get_sync_hook(self, key: ClientKey, model: str) -> Callable[[httpx.Response], None]:
+        def hook(response: httpx.Response) -> None:
+            if self.response_hook is not None:
+                self.response_hook(key.provider, model, response)
+
+        return hook
+
+    def _get_async_hook(self, key: ClientKey, model: str) -> Callable[[httpx.Response], Awaitable[None]]:
+        async def hook(response: httpx.Response) -> None:
+            if self.response_hook is not None:
+                self.response_hook(key.provider, model, response)
+
+        return hook
+
+    async def awarm_up(self, timeout: float = WARM_UP_TIMEOUT_SECONDS) -> None:
+        """Open connection of each async client, so first LLM request doesn't wait for TCP and TLS handshake"""
+
+        async def warm_up(key: ClientKey, clients: HTTPClients) -> None:
+            try:
+                # any response leaves connection open in pool, status doesn't matter
+                await clients.async_client.head(key.base_url, timeout=timeout)
+                logger.debug(f"Warmed up connection to {key.base_url}")
+            except httpx.HTTPError as e:
+                logger.debug(f"Connection warm-up to {key.base_url} failed: {e}")
+
+        with self._lock:
+            # connection opened by client of any model is pooled in transport shared by all of them
+            pooled = {key: clients for (key, _), clients in self._clients.items()}
+        await asyncio.gather(*(warm_up(key, clients) for key, clients in pooled.items()))
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._transports.clear()
+        # client closes its transport, closing transport shared with other clients again is a no-op
+        for http_clients in clients:
+            http_clients.client.close()
+            await http_clients.async_client.aclose()
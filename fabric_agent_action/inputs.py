@@ -0,0 +1,158 @@
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+INSTRUCTION = "INSTRUCTION"
+INPUT = "INPUT"
+GITHUB_ISSUE = "GITHUB ISSUE"
+GITHUB_PULL_REQUEST = "GITHUB PULL REQUEST"
+GIT_DIFF = "GIT DIFF"
+ISSUE_COMMENT = "ISSUE COMMENT"
+PULL_REQUEST_COMMENT = "PULL REQUEST COMMENT"
+COMMENTS = "COMMENTS"
+COMMENT = "COMMENT"
+
+_HEADER_RE = re.compile(
+    r"^(?:"
+    r"(?P<plain>INSTRUCTION|INPUT|GIT DIFF):[ \t]*"
+    r"|(?P<item>GITHUB ISSUE|GITHUB PULL REQUEST), NR: (?P<nr>[^,\s]+).*"
+    r"|(?P<comment>ISSUE COMMENT|PULL REQUEST COMMENT), ID: (?P<id>[^,\s]+)(?:, \w+: (?P<author>.*))?"
+    r")$",
+    re.MULTILINE,
+)
+
+_REFERENCE_RE = re.compile(r"\{\{([^{}\n]{1,100})\}\}")
+
+
+@dataclass(frozen=True)
+class InputSection:
+    name: str
+    header: str
+    content: str
+    id: Optional[str] = None
+    author: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Section with its header line, as it appeared in the input"""
+        return f"{self.header}\n{self.content}"
+
+
+class InputSections:
+    """Splits agent input into INSTRUCTION, INPUT, GITHUB ISSUE, GIT DIFF and comment sections.
+
+    Text before the first section header is kept as preamble.
+    """
+
+    def __init__(self, sections: list[InputSection], preamble: str = "") -> None:
+        self.sections = sections
+        self.preamble = preamble
+
+    @classmethod
+    def parse(cls, input_str: str) -> "InputSections":
+        sections: list[InputSection] = []
+        matches = list(_HEADER_RE.finditer(input_str))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(input_str)
+            content = input_str[match.end() : end].strip("\n")
+            if match.group("plain"):
+                name = match.group("plain")
+            elif match.group("item"):
+                name = match.group("item")
+            else:
+                name = match.group("comment")
+            sections.append(
+                InputSection(
+                    name=name,
+                    header=match.group(0),
+                    content=content,
+                    id=match.group("id") or match.group("nr"),
+                    author=match.group("author"),
+                )
+            )
+        preamble = input_str[: matches[0].start()] if matches else input_str
+        return cls(sections, preamble.strip("\n"))
+
+    def get(self, name: str) -> Optional[InputSection]:
+        for section in self.sections:
+            if section.name == name:
+                return section
+        return None
+
+    @property
+    def instruction(self) -> str:
+        section = self.get(INSTRUCTION)
+        return section.content.strip() if section else ""
+
+    @property
+    def comments(self) -> list[InputSection]:
+        return [s for s in self.sections if s.name in (ISSUE_COMMENT, PULL_REQUEST_COMMENT)]
+
+    @property
+    def content(self) -> Optional[str]:
+        """Content to process: INPUT or issue/pull request description with git diff, without comments"""
+        sections = [s for s in self.sections if s.name in (INPUT, GITHUB_ISSUE, GITHUB_PULL_REQUEST, GIT_DIFF)]
+        if not sections:
+            return None
+        if len(sections) == 1:
+            return sections[0].content
+        return "\n\n".join(s.text for s in sections)
+
+    def get_comment(self, comment_id: str) -> Optional[InputSection]:
+        for comment in self.comments:
+            if comment.id == comment_id:
+                return comment
+        return None
+
+
+def find_references(value: str) -> list[str]:
+    """Return names of all {{NAME}} references in value"""
+    return [name.strip() for name in _REFERENCE_RE.findall(value)]
+
+
+def parse_reference(value: str) -> Optional[str]:
+    """Return NAME if value consists of a single {{NAME}} reference, otherwise None"""
+    match = _REFERENCE_RE.fullmatch(value.strip())
+    return match.group(1).strip() if match else None
+
+
+class InputReferenceResolver:
+    """Replaces {{NAME}} references in tool arguments with the exact text they point to.
+
+    NAME can be a section of the original input (INSTRUCTION, INPUT, GITHUB ISSUE,
+    GITHUB PULL REQUEST, GIT DIFF, COMMENTS, COMMENT <ID>) or the id of a previous tool call.
+    Unknown references are left untouched.
+    """
+
+    def __init__(self, sections: InputSections, tool_results: Optional[dict[str, str]] = None) -> None:
+        self.sections = sections
+        self.tool_results = tool_results if tool_results is not None else {}
+
+    def lookup(self, name: str) -> Optional[str]:
+        name = name.strip()
+        if name in self.tool_results:
+            return self.tool_results[name]
+
+        key = name.upper()
+        if key == COMMENTS:
+            comments = self.sections.comments
+            return "\n\n".join(c.text for c in comments) if comments else None
+        if key.startswith(f"{COMMENT} "):
+            comment = self.sections.get_comment(name[len(COMMENT) + 1 :].strip())
+            return comment.text if comment else None
+
+        section = self.sections.get(key)
+        return section.content if section else None
+
+    def resolve(self, value: str) -> str:
+        def replace(match: re.Match[str]) -> str:
+            resolved = self.lookup(match.group(1))
+            if resolved is None:
+                logger.warning(f"Unknown input reference: {match.group(0)}")
+                return match.group(0)
+            return resolved
+
+        return _REFERENCE_RE.sub(replace, value)
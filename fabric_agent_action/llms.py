@@ -1,14 +1,20 @@
 import logging
 import os
 import sys
-from dataclasses import dataclass
-from typing import Literal, Type, Optional, Any
+from dataclasses import dataclass, replace
+from typing import Literal, Type, Optional, Any, cast, get_args
 
+import httpx
 from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 
 from fabric_agent_action import constants
+from fabric_agent_action.deadline import Deadline, DeadlineChatModel
+from fabric_agent_action.failover import CircuitBreaker, Failover, FailoverChatModel
+from fabric_agent_action.http_clients import HTTPClientPool
+from fabric_agent_action.prompt_caching import TokenUsageHandler
+from fabric_agent_action.rate_limiter import RateLimiter, RateLimiterUsageHandler
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +33,23 @@ class LLMConfig:
     provider: ProviderType
     model: str
     temperature: float
+    # retries of provider client, None for its default
+    max_retries: Optional[int] = None
+
+
+def parse_fallbacks(fallbacks: str, temperature: float) -> list[LLMConfig]:
+    """Parse ordered fallback list, e.g. anthropic:claude-3-5-sonnet-20240620,openrouter:openai/gpt-4o"""
+    llm_configs = []
+    for item in fallbacks.split(","):
+        if not item.strip():
+            continue
+        provider, separator, model = item.strip().partition(":")
+        if not separator or not model:
+            raise ValueError(f"Invalid fallback '{item.strip()}', expected provider:model")
+        if provider not in get_args(ProviderType):
+            raise ValueError(f"Unsupported provider: {provider}")
+        llm_configs.append(LLMConfig(provider=cast(ProviderType, provider), model=model, temperature=temperature))
+    return llm_configs
 
 
 @dataclass(frozen=True)
@@ -68,8 +91,42 @@ class LLMProvider:
             "o1-preview": ModelConfig(max_number_of_tools=256, use_system_message=False),
         }
         self._default_model_config = ModelConfig(max_number_of_tools=1000, use_system_message=True)
+        self.client_pool = HTTPClientPool(http2=config.llm_http2, response_hook=self._on_response)
+        self._llms: dict[LLMConfig, LLM] = {}
+        self._chains: dict[tuple[LLMConfig, ...], LLM] = {}
+        self._rate_limiters: dict[tuple[str, str], RateLimiter] = {}
+        self._circuit_breakers: dict[str, CircuitBreaker] = {}
+        # shared by all LLMs, reports usage of whole run
+        self.token_usage = TokenUsageHandler()
+        # deadline of whole run starts when provider is created
+        self.deadline = Deadline(config.deadline, config.deadline_threshold)
+
+    def get_rate_limiter(self, provider: str, model: str) -> RateLimiter:
+        """Return rate limiter shared by all LLMs of provider model"""
+        if (provider, model) not in self._rate_limiters:
+            self._rate_limiters[(provider, model)] = RateLimiter(
+                self.config.llm_requests_per_minute, self.config.llm_tokens_per_minute
+            )
+        return self._rate_limiters[(provider, model)]
+
+    def get_circuit_breaker(self, provider: str) -> CircuitBreaker:
+        """Return circuit breaker shared by all LLMs of provider"""
+        if provider not in self._circuit_breakers:
+            self._circuit_breakers[provider] = CircuitBreaker(provider)
+        return self._circuit_breakers[provider]
+
+    def _on_response(self, provider: str, model: str, response: httpx.Response) -> None:
+        """Adapt rate limiter of requested model to rate limit headers"""
+        if (provider, model) in self._rate_limiters:
+            self._rate_limiters[(provider, model)].update_from_headers(response.headers, response.status_code)
 
     def _get_llm_instance(self, llm_config: LLMConfig) -> LLM:
+        """Return LLM for config, created once and reused by every graph build"""
+        if llm_config not in self._llms:
+            self._llms[llm_config] = self._create_llm_instance(llm_config)
+        return self._llms[llm_config]
+
+    def _create_llm_instance(self, llm_config: LLMConfig) -> LLM:
         provider_config = self._provider_configs.get(llm_config.provider)
         if not provider_config:
             raise ValueError(f"Unsupported provider: {llm_config.provider}")
@@ -96,6 +153,11 @@ class LLMProvider:
             }
             if provider_config.api_base:
                 kwargs["openai_api_base"] = provider_config.api_base
+            clients = self.client_pool.get_clients(
+                llm_config.provider, provider_config.api_base, api_key, llm_config.model
+            )
+            kwargs["http_client"] = clients.client
+            kwargs["http_async_client"] = clients.async_client
         elif provider_config.model_class == ChatAnthropic:
             kwargs = {
                 "temperature": llm_config.temperature,
@@ -105,6 +167,13 @@ class LLMProvider:
         else:
             raise ValueError(f"Unsupported model class: {provider_config.model_class}")
 
+        if llm_config.max_retries is not None:
+            kwargs["max_retries"] = llm_config.max_retries
+
+        rate_limiter = self.get_rate_limiter(llm_config.provider, llm_config.model)
+        kwargs["rate_limiter"] = rate_limiter
+        kwargs["callbacks"] = [RateLimiterUsageHandler(rate_limiter), self.token_usage]
+
         # Create LLM instance
         llm_instance = provider_config.model_class(**kwargs)
 
@@ -114,20 +183,96 @@ class LLMProvider:
             max_number_of_tools=model_config.max_number_of_tools,
         )
 
-    def createAgentLLM(self) -> LLM:
-        return self._get_llm_instance(
-            LLMConfig(
-                provider=self.config.agent_provider,
-                model=self.config.agent_model,
-                temperature=self.config.agent_temperature,
+    def _get_llm_chain(self, llm_configs: list[LLMConfig]) -> LLM:
+        """Return LLM failing over between configs in order, skipping providers with open circuit"""
+        if len(llm_configs) == 1:
+            return self._get_llm_instance(llm_configs[0])
+        key = tuple(llm_configs)
+        if key not in self._chains:
+            llms = [self._get_llm_instance(llm_config) for llm_config in llm_configs]
+            names = [f"{llm_config.provider}:{llm_config.model}" for llm_config in llm_configs]
+            logger.debug(f"using failover chain: {', '.join(names)}")
+            failover = Failover(names, [self.get_circuit_breaker(llm_config.provider) for llm_config in llm_configs])
+            self._chains[key] = LLM(
+                llm=FailoverChatModel(models=[llm.llm for llm in llms], failover=failover),
+                # prompt and tools must work with each model of the chain
+                use_system_message=all(llm.use_system_message for llm in llms),
+                max_number_of_tools=min(llm.max_number_of_tools for llm in llms),
             )
+        return self._chains[key]
+
+    def _with_deadline(self, llm: LLM, temperature: float, max_retries: Optional[int] = None) -> LLM:
+        """Return LLM limited to remaining time of deadline, degrading to deadline fallback near it"""
+        if self.deadline.expires_at is None:
+            return llm
+        fallback_configs = [
+            replace(llm_config, max_retries=max_retries)
+            for llm_config in parse_fallbacks(self.config.deadline_fallback, temperature)
+        ]
+        fallback = self._get_llm_chain(fallback_configs) if fallback_configs else None
+        llms = [llm, fallback] if fallback is not None else [llm]
+        return LLM(
+            llm=DeadlineChatModel(
+                model=llm.llm, fallback=fallback.llm if fallback is not None else None, deadline=self.deadline
+            ),
+            # prompt and tools must work with fallback model too
+            use_system_message=all(item.use_system_message for item in llms),
+            max_number_of_tools=min(item.max_number_of_tools for item in llms),
+        )
+
+    def getAgentLLMConfig(self) -> LLMConfig:
+        return LLMConfig(
+            provider=self.config.agent_provider,
+            model=self.config.agent_model,
+            temperature=self.config.agent_temperature,
         )
 
+    def getAgentLLMConfigs(self) -> list[LLMConfig]:
+        """Return agent LLM config followed by its fallbacks"""
+        llm_config = self.getAgentLLMConfig()
+        return [llm_config] + parse_fallbacks(self.config.agent_fallbacks, llm_config.temperature)
+
+    def createAgentLLM(self) -> LLM:
+        return self._with_deadline(self._get_llm_chain(self.getAgentLLMConfigs()), self.config.agent_temperature)
+
+    def getFabricLLMConfig(self) -> LLMConfig:
+        return LLMConfig(
+            provider=self.config.fabric_provider,
+            model=self.config.fabric_model,
+            temperature=self.config.fabric_temperature,
+            max_retries=self._get_fabric_client_retries(),
+        )
+
+    def getFabricLLMConfigs(self) -> list[LLMConfig]:
+        """Return fabric LLM config followed by its fallbacks"""
+        llm_config = self.getFabricLLMConfig()
+        return [llm_config] + [
+            replace(fallback, max_retries=llm_config.max_retries)
+            for fallback in parse_fallbacks(self.config.fabric_fallbacks, llm_config.temperature)
+        ]
+
+    def _get_fabric_client_retries(self) -> Optional[int]:
+        """Disable retries of provider client if call policy retries fabric calls, so they don't multiply"""
+        return 0 if self.config.fabric_max_retries > 0 else None
+
     def createFabricLLM(self) -> LLM:
-        return self._get_llm_instance(
-            LLMConfig(
-                provider=self.config.fabric_provider,
-                model=self.config.fabric_model,
-                temperature=self.config.fabric_temperature,
-            )
+        return self._with_deadline(
+            self._get_llm_chain(self.getFabricLLMConfigs()),
+            self.config.fabric_temperature,
+            self._get_fabric_client_retries(),
         )
+
+    async def awarm_up(self) -> None:
+        """Open connections to agent and fabric LLM providers, clients are reused by LLMs created later"""
+        deadline_configs = parse_fallbacks(self.config.deadline_fallback, 0) if self.deadline.expires_at else []
+        for llm_config in self.getAgentLLMConfigs() + self.getFabricLLMConfigs() + deadline_configs:
+            provider_config = self._provider_configs.get(llm_config.provider)
+            api_key = os.environ.get(provider_config.env_key) if provider_config else None
+            # langchain-anthropic manages its own HTTP clients
+            if provider_config and provider_config.model_class == ChatOpenAI and api_key:
+                self.client_pool.get_clients(llm_config.provider, provider_config.api_base, api_key, llm_config.model)
+        await self.client_pool.awarm_up()
+
+    async def aclose(self) -> None:
+        self.deadline.close()
+        await self.client_pool.aclose()
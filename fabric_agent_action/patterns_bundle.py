@@ -0,0 +1,137 @@
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PATTERNS_FOLDER = Path(__file__).resolve().parent.parent / "prompts" / "fabric_patterns"
+PATTERNS_BUNDLE_FILE = Path(__file__).resolve().parent.parent / "prompts" / "fabric_patterns.bundle"
+
+# Set to 1 when editing patterns from source, so stale bundle is not used. Bundle of the packaged
+# action is built from its patterns (see Dockerfile) and trusted without statting pattern files.
+PATTERNS_BUNDLE_CHECK_ENV = "FABRIC_PATTERNS_BUNDLE_CHECK"
+
+_MAGIC = b"FABRICPB1\n"
+_INDEX_SIZE = struct.Struct("<Q")
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    offset: int
+    length: int
+    sha256: str
+
+
+def build_bundle(patterns_folder: Path, bundle_file: Path) -> int:
+    """Pack system.md of all patterns into single indexed bundle file.
+
+    Layout: magic, index size, JSON index {name: [offset, length, sha256]}, concatenated UTF-8 contents.
+
+    Returns:
+        int: Number of bundled patterns
+    """
+    index: dict[str, BundleEntry] = {}
+    contents: list[bytes] = []
+    offset = 0
+    for system_file in sorted(patterns_folder.glob("*/system.md")):
+        # same newline translation as reading pattern file in text mode
+        content = system_file.read_text(encoding="utf-8").encode("utf-8")
+        index[system_file.parent.name] = BundleEntry(offset, len(content), hashlib.sha256(content).hexdigest())
+        contents.append(content)
+        offset += len(content)
+
+    index_bytes = json.dumps({name: [e.offset, e.length, e.sha256] for name, e in index.items()}).encode("utf-8")
+    tmp_file = bundle_file.with_suffix(".tmp")
+    with open(tmp_file, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_INDEX_SIZE.pack(len(index_bytes)))
+        f.write(index_bytes)
+        for content in contents:
+            f.write(content)
+    tmp_file.replace(bundle_file)
+
+    return len(index)
+
+
+class PatternsBundle:
+    """Read-only, memory-mapped bundle of fabric patterns.
+
+    Pages are shared through OS page cache between processes using the same bundle,
+    pattern content is sliced out of the mapping only when it is read.
+    """
+
+    def __init__(self, bundle_file: Path) -> None:
+        with open(bundle_file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Invalid fabric patterns bundle: {bundle_file}")
+
+        (index_size,) = _INDEX_SIZE.unpack_from(self._mmap, len(_MAGIC))
+        index_start = len(_MAGIC) + _INDEX_SIZE.size
+        index = json.loads(self._mmap[index_start : index_start + index_size])
+        self._index = {name: BundleEntry(*entry) for name, entry in index.items()}
+        self._data = memoryview(self._mmap)[index_start + index_size :]
+
+    def __contains__(self, pattern_name: str) -> bool:
+        return pattern_name in self._index
+
+    def names(self) -> list[str]:
+        return list(self._index)
+
+    def get_bytes(self, pattern_name: str) -> memoryview:
+        """Return zero-copy view of pattern content"""
+        entry = self._index[pattern_name]
+        return self._data[entry.offset : entry.offset + entry.length]
+
+    def read(self, pattern_name: str) -> str:
+        return str(self.get_bytes(pattern_name), "utf-8")
+
+    def get_hash(self, pattern_name: str) -> str:
+        return self._index[pattern_name].sha256
+
+
+def is_bundle_stale(bundle: PatternsBundle, bundle_file: Path, patterns_folder: Path) -> bool:
+    """Return True if patterns were added, removed or edited after bundle was built"""
+    if not patterns_folder.exists():
+        return False
+    system_files = list(patterns_folder.glob("*/system.md"))
+    if sorted(f.parent.name for f in system_files) != sorted(bundle.names()):
+        return True
+    built_at = bundle_file.stat().st_mtime
+    return any(f.stat().st_mtime > built_at for f in system_files)
+
+
+@functools.lru_cache(maxsize=None)
+def get_patterns_bundle(
+    bundle_file: Path = PATTERNS_BUNDLE_FILE,
+    patterns_folder: Path = PATTERNS_FOLDER,
+    check_stale: Optional[bool] = None,
+) -> Optional[PatternsBundle]:
+    """Return process-wide bundle, or None if bundle was not built.
+
+    With check_stale (default: FABRIC_PATTERNS_BUNDLE_CHECK=1), None is also returned if bundle is older than patterns.
+    """
+    if not bundle_file.exists():
+        logger.debug(f"Fabric patterns bundle not found: {bundle_file}")
+        return None
+
+    bundle = PatternsBundle(bundle_file)
+    if check_stale is None:
+        check_stale = os.environ.get(PATTERNS_BUNDLE_CHECK_ENV) == "1"
+    if check_stale and is_bundle_stale(bundle, bundle_file, patterns_folder):
+        logger.warning(
+            f"Fabric patterns bundle {bundle_file} is older than patterns, reading pattern files instead. "
+            "Rebuild it with scripts/build_fabric_patterns_bundle.py"
+        )
+        return None
+
+    logger.debug(f"Using fabric patterns bundle: {bundle_file}")
+    return bundle
@@ -0,0 +1,39 @@
+from typing import Optional
+
+# USD per million input and output tokens, model names are matched by longest prefix
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1-nano": (0.1, 0.4),
+    "gpt-4-turbo": (10.0, 30.0),
+    "o1": (15.0, 60.0),
+    "o1-mini": (1.1, 4.4),
+    "o3": (2.0, 8.0),
+    "o3-mini": (1.1, 4.4),
+    "o4-mini": (1.1, 4.4),
+    "claude-3-haiku": (0.25, 1.25),
+    "claude-3-5-haiku": (0.8, 4.0),
+    "claude-3-5-sonnet": (3.0, 15.0),
+    "claude-3-7-sonnet": (3.0, 15.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-3-opus": (15.0, 75.0),
+    "claude-opus-4": (15.0, 75.0),
+}
+
+
+def get_price(model: str) -> Optional[tuple[float, float]]:
+    """Return input and output price of model, None if it is unknown"""
+    # OpenRouter models are prefixed with vendor, e.g. openai/gpt-4o
+    name = model.rsplit("/", 1)[-1]
+    prefixes = [prefix for prefix in MODEL_PRICES if name.startswith(prefix)]
+    return MODEL_PRICES[max(prefixes, key=len)] if prefixes else None
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """Return estimated cost of LLM call in USD, None if price of model is unknown"""
+    price = get_price(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
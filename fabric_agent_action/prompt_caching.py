@@ -0,0 +1,161 @@
+import functools
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+from langchain_anthropic import ChatAnthropic
+from langchain_anthropic.chat_models import convert_to_anthropic_tool
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import Runnable, RunnableLambda
+
+# Anthropic caches prompt prefix up to block with cache_control, at most 4 breakpoints per request
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def supports_cache_control(llm: BaseChatModel) -> bool:
+    """Return True if prompt cache breakpoints must be set explicitly, other providers cache prefixes automatically"""
+    return isinstance(llm, ChatAnthropic)
+
+
+def create_prompt_message(llm: BaseChatModel, content: str, use_system_message: bool = True) -> BaseMessage:
+    """Create message with static prompt, e.g. agent prompt or pattern, placed first so it is a cacheable prefix"""
+    message_class = SystemMessage if use_system_message else HumanMessage
+    if not supports_cache_control(llm):
+        return message_class(content=content)
+    return message_class(content=[{"type": "text", "text": content, "cache_control": CACHE_CONTROL}])
+
+
+class CachingModelWrapper(ABC):
+    """Chat model delegating calls to other models, e.g. failover or deadline fallback.
+
+    Wrapped models can be of different providers, so the wrapper sets cache breakpoints
+    for each of them (see add_cache_breakpoints) instead of its caller.
+    """
+
+    @abstractmethod
+    def bind_cached_tools(
+        self, tool_schemas: Sequence[dict[str, Any]], cache_messages: bool
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Bind tools to each wrapped model with its cache breakpoints, see bind_tools"""
+
+
+def bind_tools(
+    llm: BaseChatModel, tool_schemas: Sequence[dict[str, Any]], cache_messages: bool = False
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    """Bind tools to LLM with cache breakpoints after tool definitions and after static prompt.
+
+    With cache_messages, breakpoint is also set on last message of every request, so ReAct turns
+    read conversation history of previous turn from cache.
+    """
+    if isinstance(llm, CachingModelWrapper):
+        return llm.bind_cached_tools(tool_schemas, cache_messages)
+    if not supports_cache_control(llm) or not tool_schemas:
+        return llm.bind_tools(tool_schemas)
+
+    tools: list[dict[str, Any]] = [dict(convert_to_anthropic_tool(schema)) for schema in tool_schemas]
+    tools[-1]["cache_control"] = CACHE_CONTROL
+    return with_cache_breakpoints(llm, llm.bind_tools(tools), cache_messages)
+
+
+def with_cache_breakpoints(
+    llm: BaseChatModel, runnable: Runnable[LanguageModelInput, Any], cache_messages: bool = False
+) -> Runnable[LanguageModelInput, Any]:
+    """Return runnable of LLM (e.g. with structured output) setting cache breakpoints on its input"""
+    if not supports_cache_control(llm):
+        return runnable
+    return RunnableLambda(functools.partial(add_cache_breakpoints, llm, cache_messages=cache_messages)) | runnable
+
+
+def add_cache_breakpoints(llm: BaseChatModel, input: LanguageModelInput, cache_messages: bool = False) -> Any:
+    """Return input messages with cache breakpoint after static prompt, placed first, and with
+    cache_messages also after last message. Input of LLM without cache breakpoints is returned unchanged.
+
+    Breakpoints are set on messages themselves, older langchain-anthropic would send cache_control
+    kwarg as top-level request parameter, which API rejects.
+    """
+    if not supports_cache_control(llm) or not isinstance(input, list) or not input:
+        return input
+    if not all(isinstance(message, BaseMessage) for message in input):
+        return input
+    messages: list[BaseMessage] = [_set_cache_breakpoint(input[0]), *input[1:]]
+    return add_cache_breakpoint(messages) if cache_messages else messages
+
+
+def add_cache_breakpoint(messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+    """Return messages with cache breakpoint on last content block of last message"""
+    if not messages:
+        return []
+    return [*messages[:-1], _set_cache_breakpoint(messages[-1])]
+
+
+def _set_cache_breakpoint(message: BaseMessage) -> BaseMessage:
+    content: list[Any]
+    if isinstance(message, ToolMessage):
+        # tool message is sent as tool_result block, which takes cache_control itself
+        content = [
+            {
+                "type": "tool_result",
+                "content": message.content,
+                "tool_use_id": message.tool_call_id,
+                "is_error": message.status == "error",
+                "cache_control": CACHE_CONTROL,
+            }
+        ]
+    else:
+        if isinstance(message.content, str):
+            content = [{"type": "text", "text": message.content}]
+        else:
+            content = list(message.content)
+        if not content:
+            return message
+        block = content[-1] if isinstance(content[-1], dict) else {"type": "text", "text": content[-1]}
+        content[-1] = {**block, "cache_control": CACHE_CONTROL}
+    return message.model_copy(update={"content": content})
+
+
+@dataclass(frozen=True)
+class TokenUsage:
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    cache_read_tokens: int
+    cache_creation_tokens: int
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Counts tokens of LLM responses, including prompt tokens read from and written to provider cache"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_creation_tokens = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                if not isinstance(generation, ChatGeneration):
+                    continue
+                usage = getattr(generation.message, "usage_metadata", None)
+                if not usage:
+                    continue
+                details = usage.get("input_token_details") or {}
+                with self._lock:
+                    self.calls += 1
+                    self.input_tokens += usage["input_tokens"]
+                    self.output_tokens += usage["output_tokens"]
+                    self.cache_read_tokens += details.get("cache_read") or 0
+                    self.cache_creation_tokens += details.get("cache_creation") or 0
+
+    def get_usage(self) -> TokenUsage:
+        with self._lock:
+            return TokenUsage(
+                self.calls, self.input_tokens, self.output_tokens, self.cache_read_tokens, self.cache_creation_tokens
+            )
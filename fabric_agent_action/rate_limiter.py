@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Mapping, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Run of LLM call made in current context, so its response headers are matched to its usage
+_current_run_id: ContextVar[Optional[UUID]] = ContextVar("rate_limited_run_id", default=None)
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """Parse reset duration of rate limit headers, e.g. 1s, 6m0s, 20ms, to seconds"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+class TokenBucket:
+    """Bucket of capacity per minute, refilled continuously. Capacity 0 means unlimited.
+
+    Level can go below zero when more was consumed than was available (e.g. tokens
+    counted after response), acquiring waits until the debt is refilled.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = per_minute
+        self.level = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def get_wait_time(self, amount: float, now: float) -> float:
+        """Return seconds until level reaches amount"""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (amount - self.level) * 60 / self.capacity)
+
+    def consume(self, amount: float, now: float) -> None:
+        if self.capacity > 0:
+            self._refill(now)
+            self.level -= amount
+
+    def update(self, limit: Optional[float], remaining: Optional[float], now: float) -> None:
+        """Synchronize with limit and remaining amount reported by provider"""
+        if limit is not None and (self.capacity <= 0 or limit < self.capacity):
+            self.capacity = limit
+            self.level = min(self.level, limit)
+        if remaining is not None and self.capacity > 0:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter(BaseRateLimiter):
+    """Requests and tokens per minute limiter of single provider model, shared by all LLMs using it.
+
+    Request waits until there is a request in the requests bucket and the tokens bucket is not
+    in debt. Tokens are counted from response usage, unless the response reported remaining
+    tokens, which already account for it. Limits, remaining amounts and retry-after of rate limit
+    response headers lower configured limits and pause requests until reset, so requests are not
+    sent only to be rejected with 429.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        # runs whose remaining tokens were synchronized from response headers, their usage is not counted again
+        self._synced_runs: set[UUID] = set()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self) -> float:
+        """Take one request if available, otherwise return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait_time = max(
+                self._paused_until - now,
+                self.requests.get_wait_time(1, now),
+                self.tokens.get_wait_time(0, now),
+            )
+            if wait_time <= 0:
+                self.requests.consume(1, now)
+            return wait_time
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait_time = self._try_acquire()
+            if wait_time <= 0:
+                return True
+            if not blocking:
+                return False
+            logger.debug(f"Rate limited, waiting {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        while True:
+            wait_time = self._try_acquire()
+            if wait_time <= 0:
+                return True
+            if not blocking:
+                return False
+            logger.debug(f"Rate limited, waiting {wait_time:.2f}s")
+            await asyncio.sleep(wait_time)
+
+    def record_usage(self, tokens: int, run_id: Optional[UUID] = None) -> None:
+        with self._lock:
+            if run_id is not None and run_id in self._synced_runs:
+                self._synced_runs.discard(run_id)
+                return
+            self.tokens.consume(tokens, time.monotonic())
+
+    def forget_run(self, run_id: UUID) -> None:
+        """Forget run which failed after its response headers were synchronized"""
+        with self._lock:
+            self._synced_runs.discard(run_id)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: int) -> None:
+        """Adapt to OpenAI-style x-ratelimit-* headers and retry-after of 429 responses"""
+
+        def get_number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name]) if name in headers else None
+            except ValueError:
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = get_number(f"x-ratelimit-remaining-{kind}")
+                bucket.update(get_number(f"x-ratelimit-limit-{kind}"), remaining, now)
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}", ""))
+                if remaining is not None and remaining <= 0 and reset is not None:
+                    logger.debug(f"No {kind} remaining, pausing requests for {reset:.2f}s")
+                    self._paused_until = max(self._paused_until, now + reset)
+            run_id = _current_run_id.get()
+            if status_code < 400 and run_id is not None and get_number("x-ratelimit-remaining-tokens") is not None:
+                self._synced_runs.add(run_id)
+
+        if status_code == 429:
+            retry_after_ms = get_number("retry-after-ms")
+            retry_after = retry_after_ms / 1000 if retry_after_ms is not None else get_number("retry-after")
+            if retry_after is not None:
+                logger.warning(f"Rate limit exceeded, pausing requests for {retry_after:.2f}s")
+                self.pause(retry_after)
+
+
+class RateLimiterUsageHandler(BaseCallbackHandler):
+    """Counts tokens used by LLM responses in rate limiter.
+
+    Run id is set in context of LLM call when it starts, response headers of its requests are
+    matched to it, so hedged or cancelled calls don't affect counting of other calls.
+    """
+
+    # run in context of LLM call, async callbacks would otherwise run in executor with copied context
+    run_inline = True
+
+    def __init__(self, rate_limiter: RateLimiter) -> None:
+        self.rate_limiter = rate_limiter
+
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        _current_run_id.set(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.rate_limiter.forget_run(run_id)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                if isinstance(generation, ChatGeneration):
+                    usage = getattr(generation.message, "usage_metadata", None)
+                    tokens += usage["total_tokens"] if usage else 0
+        if tokens:
+            self.rate_limiter.record_usage(tokens, run_id)
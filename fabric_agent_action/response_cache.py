@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from fabric_agent_action.llms import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_FILE_NAME = "fabric_responses.sqlite"
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+
+
+def get_cache_key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """Key-value cache in single SQLite file with TTL and LRU eviction.
+
+    Entries expire after ttl seconds and least recently used entries are evicted above
+    max_entries. Database is a single file without journal files left behind, so cache
+    directory can be saved and restored between runs (e.g. with actions/cache).
+    Cache errors are logged and treated as misses.
+    """
+
+    def __init__(self, cache_file: Path, ttl: int, max_entries: int) -> None:
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # fabric tools can be invoked from worker threads of plan agent, access is serialized by lock
+            self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Cache {cache_file} can't be opened, caching disabled: {e}")
+            self.close()
+
+    def _read(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return None
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM entries WHERE key = ? AND created_at >= ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache read from {self.cache_file.name} failed: {e}")
+                return None
+        return str(row[0]) if row is not None else None
+
+    def _write(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache write to {self.cache_file.name} failed: {e}")
+
+    def get_stats(self) -> CacheStats:
+        with self._lock:
+            entries = 0
+            if self._conn is not None:
+                try:
+                    (entries,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+                except sqlite3.Error as e:
+                    logger.warning(f"Cache stats of {self.cache_file.name} failed: {e}")
+            return CacheStats(hits=self.hits, misses=self.misses, entries=entries)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ResponseCache(SQLiteCache):
+    """Cache of fabric pattern responses of single fabric LLM.
+
+    Key is made of LLM provider, model, temperature, pattern content hash and input hash.
+    Responses of fallback models (see is_fallback_response) are not cached under this key.
+    """
+
+    def __init__(self, cache_dir: Path, llm_config: LLMConfig, ttl: int, max_entries: int) -> None:
+        super().__init__(cache_dir / RESPONSE_CACHE_FILE_NAME, ttl, max_entries)
+        self.llm_config = llm_config
+
+    def get_key(self, pattern_hash: str, input: str) -> str:
+        input_hash = hashlib.sha256(input.encode("utf-8")).hexdigest()
+        return get_cache_key(
+            self.llm_config.provider,
+            self.llm_config.model,
+            self.llm_config.temperature,
+            pattern_hash,
+            input_hash,
+        )
+
+    def get(self, pattern_hash: str, input: str) -> Optional[str]:
+        response = self._read(self.get_key(pattern_hash, input))
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, pattern_hash: str, input: str, response: str) -> None:
+        self._write(self.get_key(pattern_hash, input), response)
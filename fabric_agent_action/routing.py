@@ -0,0 +1,133 @@
+import heapq
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from fabric_agent_action.fabric_tools import FabricTools
+
+logger = logging.getLogger(__name__)
+
+_COMMAND_RE = re.compile(r"/fabric\b(.*)", re.IGNORECASE)
+
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the this to with using fabric pattern tool "
+    "input text".split()
+)
+_SUFFIXES = ("ations", "ation", "izing", "ize", "ing", "ies", "es", "s", "ed", "ly", "e", "y")
+
+
+def normalize_pattern_name(name: str) -> str:
+    """Normalize pattern name or instruction: lowercase, words separated by single underscore"""
+    return "_".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+class PatternMatcher:
+    """Deterministically matches explicit `/fabric <pattern>` instructions to tool names.
+
+    Instruction matches a tool if, after normalization, it is equal to tool name
+    (e.g. "/fabric improve writing" -> improve_writing) or it is a word prefix
+    of exactly one tool name (e.g. "/fabric create stride" -> create_stride_threat_model).
+    """
+
+    def __init__(self, tool_names: list[str]) -> None:
+        self.tool_names = {normalize_pattern_name(name): name for name in tool_names}
+
+    def match(self, instruction: str) -> Optional[str]:
+        lines = [line for line in instruction.strip().splitlines() if line.strip()]
+        if len(lines) != 1:
+            return None
+
+        command = _COMMAND_RE.fullmatch(lines[0].strip())
+        if not command:
+            return None
+
+        requested = normalize_pattern_name(command.group(1))
+        if not requested:
+            return None
+
+        if requested in self.tool_names:
+            logger.debug(f"Instruction matched exactly: {self.tool_names[requested]}")
+            return self.tool_names[requested]
+
+        candidates = [name for normalized, name in self.tool_names.items() if normalized.startswith(f"{requested}_")]
+        if len(candidates) == 1:
+            logger.debug(f"Instruction matched by prefix: {candidates[0]}")
+            return candidates[0]
+
+        logger.debug(f"Instruction not matched, candidates: {candidates}")
+        return None
+
+
+def group_by_category(tool_names: list[str], min_size: int = 3) -> dict[str, list[str]]:
+    """Group tool names by verb prefix (analyze_*, create_*, ...), small groups go to "other" category"""
+    groups: dict[str, list[str]] = defaultdict(list)
+    for name in tool_names:
+        groups[name.split("_")[0]].append(name)
+
+    categories: dict[str, list[str]] = {}
+    other: list[str] = []
+    for prefix, names in sorted(groups.items(), key=lambda item: -len(item[1])):
+        if len(names) >= min_size:
+            categories[prefix] = names
+        else:
+            other.extend(names)
+    if other:
+        categories["other"] = other
+    return categories
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase, lightly stemmed terms without stop words"""
+    terms = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in _STOP_WORDS:
+            continue
+        for suffix in _SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                token = token[: -len(suffix)]
+                break
+        terms.append(token)
+    return terms
+
+
+class PatternIndex:
+    """In-process BM25 index shortlisting patterns relevant to instruction.
+
+    Term weights are precomputed into posting lists when index is built, so
+    scoring query is a sum over postings of its terms.
+    """
+
+    def __init__(self, documents: dict[str, str], k1: float = 1.5, b: float = 0.75) -> None:
+        tokenized = {name: Counter(tokenize(text)) for name, text in documents.items()}
+        avg_length = sum(sum(terms.values()) for terms in tokenized.values()) / max(len(tokenized), 1)
+        document_frequency = Counter(term for terms in tokenized.values() for term in terms)
+
+        self._postings: dict[str, list[tuple[str, float]]] = defaultdict(list)
+        for name, terms in tokenized.items():
+            length_norm = k1 * (1 - b + b * sum(terms.values()) / max(avg_length, 1))
+            for term, tf in terms.items():
+                df = document_frequency[term]
+                idf = math.log(1 + (len(tokenized) - df + 0.5) / (df + 0.5))
+                self._postings[term].append((name, idf * tf * (k1 + 1) / (tf + length_norm)))
+
+    @classmethod
+    def from_fabric_tools(cls, fabric_tools: "FabricTools") -> "PatternIndex":
+        """Build index from tool names, docstrings and pattern headings"""
+        documents = {}
+        for tool in fabric_tools.get_fabric_tools(check_max_number_of_tools=False):
+            pattern = fabric_tools.read_fabric_pattern(fabric_tools.get_pattern_name(tool.__name__))
+            headings = [line.lstrip("#") for line in pattern.splitlines() if line.startswith("#")]
+            # tool name is repeated to weight it higher than description
+            documents[tool.__name__] = "\n".join([tool.__name__] * 2 + [tool.__doc__ or ""] + headings)
+        return cls(documents)
+
+    def search(self, query: str, k: int) -> list[str]:
+        """Return names of up to k best matching patterns, empty if nothing matches"""
+        scores: dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            for name, weight in self._postings.get(term, ()):
+                scores[name] += weight
+        return heapq.nlargest(k, scores, key=scores.__getitem__)
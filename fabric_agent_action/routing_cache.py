@@ -0,0 +1,135 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from fabric_agent_action.fabric_tools import RUN_PATTERN_TOOL_NAME
+from fabric_agent_action.inputs import (
+    COMMENTS,
+    GIT_DIFF,
+    GITHUB_ISSUE,
+    GITHUB_PULL_REQUEST,
+    INPUT,
+    INSTRUCTION,
+    ISSUE_COMMENT,
+    PULL_REQUEST_COMMENT,
+    InputReferenceResolver,
+    InputSections,
+    find_references,
+    parse_reference,
+)
+from fabric_agent_action.llms import LLMConfig
+from fabric_agent_action.response_cache import SQLiteCache, get_cache_key
+
+logger = logging.getLogger(__name__)
+
+ROUTING_CACHE_FILE_NAME = "agent_routing.sqlite"
+
+# Sections which tool call arguments can be generalized to, content of single comment is not
+_TEMPLATE_SECTIONS = (INPUT, GITHUB_ISSUE, GITHUB_PULL_REQUEST, GIT_DIFF, INSTRUCTION, COMMENTS)
+
+# Tool call arguments selecting what to run, not input, kept literally in templates
+_LITERAL_ARGS = {(RUN_PATTERN_TOOL_NAME, "pattern_name")}
+
+
+def normalize_instruction(instruction: str) -> str:
+    return " ".join(instruction.lower().split())
+
+
+def to_templates(tool_calls: list[dict[str, Any]], sections: InputSections) -> Optional[list[dict[str, Any]]]:
+    """Generalize tool calls to {{SECTION}} references, None if any input argument is not exactly an input section"""
+    resolver = InputReferenceResolver(sections)
+    contents: dict[str, str] = {}
+    for name in _TEMPLATE_SECTIONS:
+        content = resolver.lookup(name)
+        if content is not None and content.strip():
+            contents.setdefault(content.strip(), name)
+
+    templates = []
+    for tool_call in tool_calls:
+        args = {}
+        for arg_name, value in tool_call["args"].items():
+            if not isinstance(value, str):
+                return None
+            reference = parse_reference(value)
+            if (tool_call["name"], arg_name) in _LITERAL_ARGS:
+                args[arg_name] = value
+            elif reference is not None and reference.upper() in _TEMPLATE_SECTIONS:
+                args[arg_name] = value
+            elif value.strip() in contents:
+                args[arg_name] = f"{{{{{contents[value.strip()]}}}}}"
+            else:
+                return None
+        templates.append({"name": tool_call["name"], "args": args})
+    return templates
+
+
+def from_templates(templates: list[dict[str, Any]], sections: InputSections) -> Optional[list[dict[str, Any]]]:
+    """Resolve templates against input sections, None if input is missing referenced section"""
+    resolver = InputReferenceResolver(sections)
+    tool_calls = []
+    for template in templates:
+        args = {}
+        for arg_name, value in template["args"].items():
+            if any(resolver.lookup(name) is None for name in find_references(value)):
+                return None
+            args[arg_name] = resolver.resolve(value)
+        tool_calls.append({"name": template["name"], "args": args})
+    return tool_calls
+
+
+class RoutingCache(SQLiteCache):
+    """Cache of router agent decisions: which tools to call with which input sections.
+
+    Key is made of agent LLM provider, model, temperature, fingerprint of agent prompt and
+    bound tools, normalized INSTRUCTION and names of input sections, so changes of catalog,
+    model or prompt invalidate cached decisions. Decision is cached only if its tool call
+    input arguments are exact input sections, pattern name of run_pattern is kept as is,
+    and it is served only after the agent made it min_confirmations times in a row.
+    """
+
+    def __init__(
+        self, cache_dir: Path, llm_config: LLMConfig, ttl: int, max_entries: int, min_confirmations: int = 2
+    ) -> None:
+        super().__init__(cache_dir / ROUTING_CACHE_FILE_NAME, ttl, max_entries)
+        self.llm_config = llm_config
+        self.min_confirmations = min_confirmations
+
+    def get_key(self, sections: InputSections, fingerprint: str) -> Optional[str]:
+        instruction = normalize_instruction(sections.instruction)
+        if not instruction:
+            return None
+        section_names = sorted(
+            {COMMENTS if s.name in (ISSUE_COMMENT, PULL_REQUEST_COMMENT) else s.name for s in sections.sections}
+        )
+        return get_cache_key(
+            self.llm_config.provider,
+            self.llm_config.model,
+            self.llm_config.temperature,
+            fingerprint,
+            instruction,
+            section_names,
+        )
+
+    def _read_entry(self, key: str) -> Optional[dict[str, Any]]:
+        value = self._read(key)
+        return json.loads(value) if value is not None else None
+
+    def get(self, key: str) -> Optional[list[dict[str, Any]]]:
+        """Return tool call templates of confirmed decision"""
+        entry = self._read_entry(key)
+        if entry is None or entry["confirmations"] < self.min_confirmations:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(entry["tool_calls"])
+
+    def record(self, key: str, templates: list[dict[str, Any]]) -> None:
+        """Record decision made by agent, confirming it if it is the same as previous one"""
+        entry = self._read_entry(key)
+        confirmations = 1
+        if entry is not None and entry["tool_calls"] == templates:
+            confirmations = entry["confirmations"] + 1
+        elif entry is not None:
+            logger.debug("Agent changed routing decision, resetting confirmations")
+        self._write(key, json.dumps({"tool_calls": templates, "confirmations": confirmations}))
@@ -0,0 +1,115 @@
+import functools
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence, Union
+
+import langchain_core
+from langchain_core.tools import BaseTool, StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import BaseModel, Field
+
+from fabric_agent_action.fabric_tools import get_tool_coroutine
+
+logger = logging.getLogger(__name__)
+
+TOOL_SCHEMAS_FILE = Path(__file__).resolve().parent / "fabric_tool_schemas.json"
+
+Tool = Union[Callable[..., Any], BaseTool]
+
+
+class FabricToolInput(BaseModel):
+    """Arguments shared by all fabric tools, used to execute tools with already known schema"""
+
+    input: str = Field(description="input text")
+
+
+def get_docstring_hash(tool: Callable[..., Any]) -> str:
+    """Return SHA-256 of tool name and docstring, from which tool schema is generated"""
+    return hashlib.sha256(f"{tool.__name__}\n{tool.__doc__ or ''}".encode("utf-8")).hexdigest()
+
+
+class ToolSchemaCache:
+    """OpenAI tool schemas of fabric tools, keyed by tool name and docstring hash.
+
+    Generating schema introspects tool signature and parses its docstring. Cache file is loaded
+    only if it was generated by the same langchain-core version, entries with different docstring
+    hash are regenerated.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None) -> None:
+        self._entries: dict[str, tuple[str, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_file is not None and cache_file.exists():
+            self._load(cache_file)
+
+    def _load(self, cache_file: Path) -> None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to read tool schemas cache {cache_file}: {e}")
+            return
+
+        if data.get("langchain_core") != langchain_core.__version__:
+            logger.debug(f"Tool schemas cache {cache_file} generated by different langchain-core, ignoring")
+            return
+        self._entries = {name: (entry["hash"], entry["schema"]) for name, entry in data["tools"].items()}
+
+    def get(self, tool: Callable[..., Any]) -> dict[str, Any]:
+        docstring_hash = get_docstring_hash(tool)
+        entry = self._entries.get(tool.__name__)
+        if entry is not None and entry[0] == docstring_hash:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        schema = convert_to_openai_tool(tool)
+        self._entries[tool.__name__] = (docstring_hash, schema)
+        return schema
+
+    def save(self, cache_file: Path) -> None:
+        data = {
+            "langchain_core": langchain_core.__version__,
+            "tools": {name: {"hash": h, "schema": schema} for name, (h, schema) in self._entries.items()},
+        }
+        tmp_file = cache_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        tmp_file.replace(cache_file)
+
+
+@functools.lru_cache(maxsize=None)
+def get_tool_schema_cache(cache_file: Path = TOOL_SCHEMAS_FILE) -> ToolSchemaCache:
+    """Return process-wide cache, warm if cache file was built"""
+    return ToolSchemaCache(cache_file)
+
+
+def get_tool_schemas(tools: Sequence[Tool], cache: Optional[ToolSchemaCache] = None) -> list[dict[str, Any]]:
+    """Return OpenAI tool schemas to bind to LLM, fabric tools schemas are taken from cache"""
+    cache = cache or get_tool_schema_cache()
+    return [convert_to_openai_tool(tool) if isinstance(tool, BaseTool) else cache.get(tool) for tool in tools]
+
+
+def create_structured_tools(tools: Sequence[Tool], schemas: Sequence[dict[str, Any]]) -> list[Tool]:
+    """Wrap fabric tools into tools with known schema, so ToolNode doesn't need to introspect them.
+
+    Async counterparts of fabric tools are used when tools are executed asynchronously.
+    """
+    structured_tools: list[Tool] = []
+    for tool, schema in zip(tools, schemas):
+        if isinstance(tool, BaseTool) or set(schema["function"]["parameters"]["properties"]) != {"input"}:
+            structured_tools.append(tool)
+            continue
+        structured_tools.append(
+            StructuredTool(
+                name=schema["function"]["name"],
+                description=schema["function"].get("description", ""),
+                args_schema=FabricToolInput,
+                func=tool,
+                coroutine=get_tool_coroutine(tool),
+            )
+        )
+    return structured_tools
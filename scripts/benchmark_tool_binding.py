@@ -0,0 +1,97 @@
+import argparse
+import json
+import statistics
+import time
+from typing import Any, List
+
+import tiktoken
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+from langchain_core.messages import HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from fabric_agent_action.fabric_tools import FabricTools
+
+SAMPLE_INPUT = """INSTRUCTION:
+/fabric improve writing
+
+INPUT:
+I encountered a challenge in creating high-quality design documents for my threat modeling research.
+"""
+
+
+def count_schema_tokens(tools: List[Any], encoding_name: str) -> int:
+    """
+    Count tokens of tool JSON schemas, as sent to LLM on every agent call.
+
+    Args:
+        tools: Tools to convert to OpenAI tool schemas
+        encoding_name: tiktoken encoding name
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = tiktoken.get_encoding(encoding_name)
+    schemas = [convert_to_openai_tool(tool) for tool in tools]
+    return len(encoding.encode(json.dumps(schemas)))
+
+
+def measure_live(tools: List[Any], model: str, runs: int) -> tuple[float, int]:
+    """
+    Measure median time to first token and prompt tokens reported by OpenAI.
+
+    Args:
+        tools: Tools to bind to LLM
+        model: OpenAI model name
+        runs: Number of runs
+
+    Returns:
+        tuple[float, int]: Median time to first token in seconds and prompt tokens
+    """
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(model=model, temperature=0, stream_usage=True).bind_tools(tools)
+    ttfts = []
+    prompt_tokens = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        ttft = None
+        for chunk in llm.stream([HumanMessage(content=SAMPLE_INPUT)]):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            if chunk.usage_metadata:
+                prompt_tokens = chunk.usage_metadata["input_tokens"]
+        ttfts.append(ttft or 0.0)
+    return statistics.median(ttfts), prompt_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare agent tool binding modes: patterns vs run_pattern.")
+    parser.add_argument("--encoding", default="o200k_base", help="tiktoken encoding (default: o200k_base)")
+    parser.add_argument("--live", action="store_true", help="Measure time to first token using OpenAI API")
+    parser.add_argument("--model", default="gpt-4o-mini", help="Model for --live (default: gpt-4o-mini)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs for --live (default: 5)")
+    args = parser.parse_args()
+
+    fabric_tools = FabricTools(ParrotFakeChatModel())
+    modes = {
+        "patterns": fabric_tools.get_fabric_tools(check_max_number_of_tools=False),
+        "run_pattern": [fabric_tools.get_run_pattern_tool()],
+    }
+
+    print(f"{'mode':<12} {'tools':>6} {'schema tokens':>14}")
+    for mode, tools in modes.items():
+        print(f"{mode:<12} {len(tools):>6} {count_schema_tokens(tools, args.encoding):>14}")
+
+    if args.live:
+        print(f"\n{'mode':<12} {'prompt tokens':>14} {'median ttft [s]':>16}")
+        for mode, tools in modes.items():
+            # gpt-4o family accepts at most 128 tools
+            tools = tools[:128]
+            ttft, prompt_tokens = measure_live(tools, args.model, args.runs)
+            print(f"{mode:<12} {prompt_tokens:>14} {ttft:>16.3f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,74 @@
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+from langchain_openai import ChatOpenAI
+from langgraph.prebuilt import ToolNode
+
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.tool_schemas import ToolSchemaCache, create_structured_tools, get_tool_schemas
+
+
+def measure(build: Callable[[], Any], runs: int) -> float:
+    """
+    Measure median time of building tools part of agent graph.
+
+    Args:
+        build: Function binding tools to LLM and creating tools node
+        runs: Number of runs
+
+    Returns:
+        float: Median time in seconds
+    """
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        build()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare agent graph tools setup with and without schemas cache.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs (default: 5)")
+    args = parser.parse_args()
+
+    llm = ChatOpenAI(model="gpt-4o", api_key="not-used")
+    fabric_tools = FabricTools(ParrotFakeChatModel())
+    tools: List[Any] = fabric_tools.get_fabric_tools(check_max_number_of_tools=False)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_file = Path(tmp_dir) / "fabric_tool_schemas.json"
+        cache = ToolSchemaCache()
+        get_tool_schemas(tools, cache)
+        cache.save(cache_file)
+
+        def uncached() -> None:
+            llm.bind_tools(tools)
+            ToolNode(tools)
+
+        def cold() -> None:
+            cache = ToolSchemaCache()
+            schemas = get_tool_schemas(tools, cache)
+            llm.bind_tools(schemas)
+            ToolNode(create_structured_tools(tools, get_tool_schemas(tools, cache)))
+
+        def warm() -> None:
+            cache = ToolSchemaCache(cache_file)
+            schemas = get_tool_schemas(tools, cache)
+            llm.bind_tools(schemas)
+            ToolNode(create_structured_tools(tools, get_tool_schemas(tools, cache)))
+
+        print(f"{'mode':<10} {'tools':>6} {'median [s]':>11}")
+        for mode, build in {"uncached": uncached, "cold": cold, "warm": warm}.items():
+            print(f"{mode:<10} {len(tools):>6} {measure(build, args.runs):>11.4f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
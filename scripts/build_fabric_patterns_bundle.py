@@ -0,0 +1,52 @@
+import argparse
+from pathlib import Path
+
+from fabric_agent_action.patterns_bundle import (
+    PATTERNS_BUNDLE_FILE,
+    PATTERNS_FOLDER,
+    PatternsBundle,
+    build_bundle,
+    is_bundle_stale,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack fabric patterns into single memory-mapped bundle file.")
+    parser.add_argument(
+        "--patterns-folder",
+        type=Path,
+        default=PATTERNS_FOLDER,
+        help=f"Folder with fabric patterns (default: {PATTERNS_FOLDER})",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=PATTERNS_BUNDLE_FILE,
+        help=f"Bundle file (default: {PATTERNS_BUNDLE_FILE})",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only check that bundle is up to date with patterns, exit with 1 if it is not",
+    )
+    args = parser.parse_args()
+
+    if not args.patterns_folder.exists():
+        print(f"Error: Path {args.patterns_folder} does not exist")
+        return 1
+
+    if args.check:
+        if not args.output.exists() or is_bundle_stale(PatternsBundle(args.output), args.output, args.patterns_folder):
+            print(f"Bundle {args.output} is missing or older than patterns, rebuild it")
+            return 1
+        print(f"Bundle {args.output} is up to date")
+        return 0
+
+    count = build_bundle(args.patterns_folder, args.output)
+    print(f"Bundled {count} patterns into {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
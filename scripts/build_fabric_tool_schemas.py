@@ -0,0 +1,30 @@
+import argparse
+from pathlib import Path
+
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.tool_schemas import TOOL_SCHEMAS_FILE, ToolSchemaCache, get_tool_schemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate tool schemas of all fabric tools.")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=TOOL_SCHEMAS_FILE,
+        help=f"Tool schemas cache file (default: {TOOL_SCHEMAS_FILE})",
+    )
+    args = parser.parse_args()
+
+    cache = ToolSchemaCache()
+    tools = FabricTools(ParrotFakeChatModel()).get_fabric_tools(check_max_number_of_tools=False)
+    get_tool_schemas(tools, cache)
+    cache.save(args.output)
+    print(f"Saved schemas of {len(tools)} tools into {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,4 +1,5 @@
 import argparse
+import json
 import os
 from pathlib import Path
 from typing import List, Tuple
@@ -73,30 +74,21 @@ def scan_folders(root_path: str | Path, process_all: bool = False) -> List[Tuple
     return patterns
 
 
-def create_tool_code(pattern_name: str, pattern_content: str, output_file) -> None:
+def create_tool_metadata(pattern_name: str, pattern_content: str) -> dict:
     """
-    Create tool code using LLM and write to output file.
+    Create tool metadata using LLM to describe the pattern.
 
     Args:
         pattern_name: Name of the pattern
         pattern_content: Content of the pattern
-        output_file: File object to write the output to
-    """
-    SYSTEM_PROMPT = """You are a helpful assistant tasked with creating python functions that will be used as fabric tools for LLM. I will give you PROMPT NAME and PROMPT CONTENT. You will create me well formatted python function.
-
-    FORMATTING
-
-    def function_name(self, input: str) -> str:
-        \"""Tool description
 
-        Args:
-            input: input text
-        \"""
-    return self.invoke_llm(input, "prompt_name")
+    Returns:
+        dict: Tool metadata entry
+    """
+    SYSTEM_PROMPT = """You are a helpful assistant tasked with describing fabric patterns that will be used as tools for LLM. I will give you PROMPT NAME and PROMPT CONTENT. You will create me short, one sentence tool description.
 
-    - replace function_name with value of PROMPT_NAME
-    - prompt_name replace with value of PROMPT_NAME
-    - description of tool must contains information that tool is "fabric pattern"
+    - description must end with "using fabric pattern"
+    - answer only with description, without quotes or any formatting
     """
 
     llm = ChatOpenAI(model="gpt-4o")
@@ -108,50 +100,35 @@ def create_tool_code(pattern_name: str, pattern_content: str, output_file) -> No
     ]
 
     response = llm.invoke(messages)
-    if response.content:
-        # Remove code block markers if present
-        content = response.content.replace("```python", "").replace("```", "")
-        output_file.write(f"{content}\n")
+    return {
+        # tool name must be valid python identifier, e.g. write_pull-request -> write_pull_request
+        "name": pattern_name.replace("-", "_"),
+        "pattern": pattern_name,
+        "description": str(response.content).strip(),
+        "input": "input text",
+    }
 
 
-def convert_to_method(patterns: List[Tuple[str, str]]) -> str:
+def update_metadata(metadata: List[dict], new_entries: List[dict], patterns_path: Path) -> List[dict]:
     """
-    Convert patterns to a method definition.
+    Merge new entries into metadata, keeping order of existing tools and removing tools of deleted patterns.
 
     Args:
-        patterns: List of (pattern_name, pattern_content) tuples
+        metadata: Existing metadata entries
+        new_entries: Entries created for changed patterns
+        patterns_path: Path to the patterns directory
 
     Returns:
-        str: Method definition as string
-    """
-    method_lines = [
-        "def get_fabric_tools(self) -> list:",
-        "    return [",
-        *[f"        self.{pattern_name}" for pattern_name, _ in patterns],
-        "    ]",
-    ]
-    return "\n".join(method_lines)
-
-
-def convert_to_test(patterns: List[Tuple[str, str]]) -> str:
+        List[dict]: Updated metadata entries
     """
-    Convert patterns to a test definition.
+    entries = {entry["name"]: entry for entry in metadata}
+    for entry in new_entries:
+        # keep manually adjusted input description of existing tool
+        if entry["name"] in entries:
+            entry["input"] = entries[entry["name"]].get("input", entry["input"])
+        entries[entry["name"]] = entry
 
-    Args:
-        patterns: List of (pattern_name, pattern_content) tuples
-
-    Returns:
-        str: Test definition as string
-    """
-    test_lines = [
-        "@pytest.mark.parametrize(",
-        '    "pattern_name",',
-        "    [",
-        *[f'        "{pattern_name}"' for pattern_name, _ in patterns],
-        "    ],",
-        ")",
-    ]
-    return "\n".join(test_lines)
+    return [entry for entry in entries.values() if (patterns_path / entry["pattern"] / "system.md").exists()]
 
 
 def main():
@@ -161,6 +138,11 @@ def main():
         action="store_true",
         help="Process all patterns regardless of CHANGED_FILES",
     )
+    parser.add_argument(
+        "--metadata-file",
+        default="fabric_agent_action/fabric_tools.json",
+        help="Tools metadata file to update (default: fabric_agent_action/fabric_tools.json)",
+    )
     args = parser.parse_args()
 
     folder_path = "prompts/fabric_patterns"
@@ -170,20 +152,19 @@ def main():
         print(f"Error: {e}")
         return 1
 
-    if not patterns:
-        print("No patterns found or no changes detected.")
-        return 0
-
     pattern_type = "all" if args.process_all else "changed"
     print(f"\nProcessing {len(patterns)} {pattern_type} patterns:")
 
-    with open("fabric_tools.txt", "w", encoding="utf-8") as f:
-        for pattern_name, pattern_content in patterns:
-            print(f"- {pattern_name}...")
-            create_tool_code(pattern_name, pattern_content, f)
+    new_entries = []
+    for pattern_name, pattern_content in patterns:
+        print(f"- {pattern_name}...")
+        new_entries.append(create_tool_metadata(pattern_name, pattern_content))
 
-        f.write(convert_to_method(patterns) + "\n")
-        f.write(convert_to_test(patterns))
+    metadata_file = Path(args.metadata_file)
+    metadata = json.loads(metadata_file.read_text(encoding="utf-8")) if metadata_file.exists() else []
+    metadata = update_metadata(metadata, new_entries, Path(folder_path))
+    metadata_file.write_text(json.dumps(metadata, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"\nWrote {len(metadata)} tools to {metadata_file}")
 
     return 0
 
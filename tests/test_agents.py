@@ -1,10 +1,32 @@
-from unittest.mock import MagicMock, Mock
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, Mock
 
 import pytest
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel, ParrotFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 
-from fabric_agent_action.agents import AgentBuilder, ReActAgent, RouterAgent
+from fabric_agent_action.agents import (
+    DEADLINE_MESSAGE,
+    AgentBuilder,
+    AgentOptions,
+    FastPathAgent,
+    Plan,
+    PlanAgent,
+    PlanStep,
+    ReActAgent,
+    RouterAgent,
+    resolve_tool_call_references,
+)
+from fabric_agent_action.deadline import Deadline, DeadlineExceeded
 from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.llms import LLMConfig
+from fabric_agent_action.routing_cache import RoutingCache
+
+
+class FakeToolCallingModel(FakeMessagesListChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
 
 
 @pytest.fixture
@@ -32,6 +54,22 @@ def mock_fabric_tools():
     return tools
 
 
+@pytest.fixture
+def plan_fabric_tools():
+    def clean_text(input: str) -> str:
+        """Clean text using fabric pattern"""
+        return f"clean({input})"
+
+    def improve_writing(input: str) -> str:
+        """Improve writing using fabric pattern"""
+        return f"improve({input})"
+
+    tools = Mock(spec=FabricTools)
+    tools.get_fabric_tools.return_value = [clean_text, improve_writing]
+    tools.get_fabric_tools_catalog.return_value = "- clean_text: Clean text\n- improve_writing: Improve writing"
+    return tools
+
+
 # Tests for AgentBuilder
 def test_agent_builder_with_valid_agent_type(llm_provider, mock_fabric_tools):
     builder = AgentBuilder("router", llm_provider, mock_fabric_tools)
@@ -39,6 +77,112 @@ def test_agent_builder_with_valid_agent_type(llm_provider, mock_fabric_tools):
     assert graph is not None
 
 
+def test_agent_builder_fast_path(llm_provider, plan_fabric_tools):
+    builder = AgentBuilder("react", llm_provider, plan_fabric_tools, AgentOptions(fast_path=True))
+    graph = builder.build("INSTRUCTION:\n/fabric clean text\n\nINPUT:\nsome text\n")
+
+    result = graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric clean text\n\nINPUT:\nsome text\n")]})
+
+    assert result["messages"][-1].content == "clean(some text)"
+    llm_provider.createAgentLLM.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "options,input_str",
+    [
+        (AgentOptions(fast_path=True), "INSTRUCTION:\n/fabric clean text and improve writing\n\nINPUT:\nsome text\n"),
+        (AgentOptions(fast_path=True), "INSTRUCTION:\n/fabric clean text\n"),
+        (AgentOptions(fast_path=False), "INSTRUCTION:\n/fabric clean text\n\nINPUT:\nsome text\n"),
+    ],
+)
+def test_agent_builder_fast_path_fallback(llm_provider, plan_fabric_tools, options, input_str):
+    builder = AgentBuilder("react", llm_provider, plan_fabric_tools, options)
+    builder.build(input_str)
+    llm_provider.createAgentLLM.assert_called_once()
+
+
+def test_fast_path_agent_react_state(llm_provider, plan_fabric_tools):
+    tool = plan_fabric_tools.get_fabric_tools.return_value[1]
+    graph = FastPathAgent(llm_provider, plan_fabric_tools, tool).build_graph()
+
+    result = graph.invoke(
+        {"messages": [HumanMessage(content="INSTRUCTION:\n/fabric improve writing\n\nINPUT:\nabc\n")], "max_num_turns": 5}
+    )
+
+    assert result["messages"][-1].content == "improve(abc)"
+
+
+def test_fast_path_agent_stops_at_deadline(llm_provider, plan_fabric_tools):
+    def slow(input: str) -> str:
+        """Slow fabric pattern"""
+        raise DeadlineExceeded("Deadline of 600s passed")
+
+    graph = FastPathAgent(llm_provider, plan_fabric_tools, slow).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric slow\n\nINPUT:\nabc\n")]})
+
+    assert result["messages"][-1].content == DEADLINE_MESSAGE
+
+
+def test_fast_path_agent_async(llm_provider, plan_fabric_tools):
+    tool = plan_fabric_tools.get_fabric_tools.return_value[0]
+    graph = FastPathAgent(llm_provider, plan_fabric_tools, tool).build_graph()
+
+    result = asyncio.run(
+        graph.ainvoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric clean text\n\nINPUT:\nabc\n")]})
+    )
+
+    assert result["messages"][-1].content == "clean(abc)"
+
+
+def test_agent_builder_tools_top_k(llm_provider):
+    fabric_tools = FabricTools(ParrotFakeChatModel())
+    builder = AgentBuilder("react", llm_provider, fabric_tools, AgentOptions(tools_top_k=3))
+
+    builder.build("INSTRUCTION:\n/fabric write pull request\n\nINPUT:\ndiff\n")
+
+    bound_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.call_args.args[0]
+    assert len(bound_tools) == 3
+    assert "write_pull_request" in [tool["function"]["name"] for tool in bound_tools]
+
+
+def test_agent_builder_tools_top_k_fallback(llm_provider):
+    fabric_tools = FabricTools(ParrotFakeChatModel())
+    builder = AgentBuilder("react", llm_provider, fabric_tools, AgentOptions(tools_top_k=3))
+
+    builder.build("INSTRUCTION:\n/fabric xyzzy\n\nINPUT:\ndiff\n")
+
+    bound_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.call_args.args[0]
+    assert len(bound_tools) == 182
+
+
+def test_agent_builder_hierarchical_routing(llm_provider):
+    fabric_tools = FabricTools(ParrotFakeChatModel(), max_number_of_tools=128)
+    structured_llm = llm_provider.createAgentLLM.return_value.llm.with_structured_output.return_value
+    structured_llm.invoke.return_value = Mock(categories=["summarize", "write"])
+    builder = AgentBuilder("react", llm_provider, fabric_tools, AgentOptions(hierarchical_routing=True))
+
+    builder.build("INSTRUCTION:\n/fabric write pull request\n\nINPUT:\ndiff\n")
+
+    category_messages = structured_llm.invoke.call_args.args[0]
+    assert category_messages[1].content == "INSTRUCTION:\n/fabric write pull request"
+    bound_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.call_args.args[0]
+    bound_names = [tool["function"]["name"] for tool in bound_tools]
+    assert "write_pull_request" in bound_names
+    assert all(name.startswith(("summarize", "write")) for name in bound_names)
+
+
+def test_agent_builder_hierarchical_routing_within_limit(llm_provider):
+    fabric_tools = FabricTools(ParrotFakeChatModel(), max_number_of_tools=1000)
+    builder = AgentBuilder("react", llm_provider, fabric_tools, AgentOptions(hierarchical_routing=True))
+
+    builder.build("INSTRUCTION:\n/fabric write pull request\n\nINPUT:\ndiff\n")
+
+    llm_provider.createAgentLLM.return_value.llm.with_structured_output.assert_not_called()
+    bound_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.call_args.args[0]
+    assert len(bound_tools) == 182
+
+
 def test_agent_builder_with_invalid_agent_type(llm_provider, mock_fabric_tools):
     builder = AgentBuilder("invalid_type", llm_provider, mock_fabric_tools)
     with pytest.raises(ValueError) as exc_info:
@@ -53,6 +197,50 @@ def test_router_agent_build_graph(llm_provider, mock_fabric_tools):
     assert graph is not None
 
 
+def test_router_agent_stops_at_deadline_of_routing_call(llm_provider, mock_fabric_tools):
+    llm_with_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.return_value
+    llm_with_tools.invoke.side_effect = DeadlineExceeded("Deadline of 600s passed")
+    graph = RouterAgent(llm_provider, mock_fabric_tools).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content="test")]})
+
+    assert result["messages"][-1].content == DEADLINE_MESSAGE
+
+
+def test_router_agent_stops_at_deadline_of_tool_call(llm_provider):
+    def slow(input: str) -> str:
+        """slow tool
+
+        Args:
+            input: input text
+        """
+        raise DeadlineExceeded("Deadline of 600s passed")
+
+    tools = Mock(spec=FabricTools)
+    tools.get_fabric_tools.return_value = [slow]
+    llm_with_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.return_value
+    llm_with_tools.ainvoke = AsyncMock(
+        return_value=AIMessage(content="", tool_calls=[{"name": "slow", "args": {"input": "hello"}, "id": "call_1"}])
+    )
+    graph = RouterAgent(llm_provider, tools).build_graph()
+
+    result = asyncio.run(graph.ainvoke({"messages": [HumanMessage(content="test")]}))
+
+    assert result["messages"][-1].content == DEADLINE_MESSAGE
+    assert not any(isinstance(m, ToolMessage) for m in result["messages"])
+
+
+def test_agent_builder_stops_at_deadline_of_category_routing(llm_provider, plan_fabric_tools):
+    builder = AgentBuilder("router", llm_provider, plan_fabric_tools, AgentOptions(hierarchical_routing=True))
+    builder._route_to_categories = Mock(side_effect=DeadlineExceeded("Deadline of 600s passed"))
+    graph = builder.build("test")
+
+    result = graph.invoke({"messages": [HumanMessage(content="test")]})
+
+    assert result["messages"][-1].content == DEADLINE_MESSAGE
+    llm_provider.createAgentLLM.assert_not_called()
+
+
 # Tests for ReActAgent
 def test_react_agent_build_graph(llm_provider, mock_fabric_tools):
     agent = ReActAgent(llm_provider, mock_fabric_tools)
@@ -81,10 +269,126 @@ def test_react_agent_max_turns_exceeded(llm_provider, mock_fabric_tools):
 
     # Create state with maximum number of turns exceeded
     tool_messages = [ToolMessage(content="test", tool_call_id="1", name="test") for _ in range(11)]
-    state = {"messages": tool_messages, "max_num_turns": 10}
+    ai_message = AIMessage(content="", tool_calls=[{"name": "test", "args": {}, "id": "2"}])
+    state = {"messages": tool_messages + [ai_message], "max_num_turns": 10, "num_tool_turns": 11}
 
     result = agent._tools_condition(state)
-    assert result == "__end__"
+    assert result == "finish"
+
+
+def test_react_agent_assistant_updates_counters(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+    mock_llm_with_tools = Mock()
+    mock_llm_with_tools.invoke.return_value = AIMessage(
+        content="done",
+        usage_metadata={"input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100},
+        response_metadata={"model_name": "gpt-4o-2024-08-06"},
+    )
+    state = {
+        "messages": [
+            HumanMessage(content="test"),
+            AIMessage(content="", tool_calls=[{"name": "test", "args": {}, "id": "1"}]),
+            ToolMessage(content="output", tool_call_id="1", name="test"),
+        ],
+        "started_at": time.monotonic() - 5,
+    }
+
+    result = agent._assistant(mock_llm_with_tools, SystemMessage(content="test"), state)
+
+    assert result["num_tool_turns"] == 1
+    assert result["num_llm_calls"] == 1
+    assert (result["prompt_tokens"], result["completion_tokens"]) == (1000, 100)
+    assert result["cost"] == pytest.approx(0.0035)
+    assert result["started_at"] == state["started_at"]
+    assert result["elapsed_seconds"] >= 5
+
+
+@pytest.mark.parametrize(
+    "limits,limit",
+    [
+        ({}, None),
+        ({"max_tokens": 100000, "max_cost": 1, "max_seconds": 600}, None),
+        ({"max_tokens": 5000}, "tokens"),
+        ({"max_cost": 0.01}, "cost"),
+        ({"max_seconds": 15}, "time"),
+    ],
+)
+def test_react_agent_exceeded_limit(llm_provider, mock_fabric_tools, limits, limit):
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+    state = {
+        "messages": [HumanMessage(content="test"), ToolMessage(content="x" * 4000, tool_call_id="1", name="test")],
+        "num_llm_calls": 1,
+        "prompt_tokens": 2000,
+        "completion_tokens": 100,
+        "cost": 0.006,
+        "last_prompt_tokens": 2000,
+        "last_completion_tokens": 100,
+        "started_at": time.monotonic() - 10,
+        **limits,
+    }
+
+    result = agent._get_exceeded_limit(state)
+
+    if limit is None:
+        assert result is None
+    else:
+        assert result.startswith(limit)
+    assert agent._budget_condition(state) == ("assistant" if limit is None else "finish")
+
+
+def test_react_agent_stops_at_limit_with_best_result(llm_provider, mock_fabric_tools):
+    responses = [
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "test_tool", "args": {"input": f"turn {i}"}, "id": f"call_{i}"}],
+            usage_metadata={"input_tokens": 3000, "output_tokens": 50, "total_tokens": 3050},
+        )
+        for i in range(10)
+    ]
+    llm_provider.createAgentLLM.return_value.llm = FakeToolCallingModel(responses=responses)
+    graph = ReActAgent(llm_provider, mock_fabric_tools).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content="test")], "max_num_turns": 10, "max_tokens": 9000})
+
+    # third turn would exceed the limit
+    assert result["num_llm_calls"] == 2
+    assert result["prompt_tokens"] == 6000
+    assert result["messages"][-1] == AIMessage(content="turn 1", id=result["messages"][-1].id)
+
+
+def test_react_agent_stops_at_deadline_with_best_result(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+    mock_llm_with_tools = Mock()
+    mock_llm_with_tools.invoke.side_effect = DeadlineExceeded("Deadline of 600s passed")
+    state = {
+        "messages": [
+            HumanMessage(content="test"),
+            ToolMessage(content="summary", tool_call_id="1", name="test"),
+            ToolMessage(content="Error: DeadlineExceeded()", tool_call_id="2", name="test", status="error"),
+        ]
+    }
+
+    result = agent._assistant(mock_llm_with_tools, SystemMessage(content="test"), state)
+
+    assert result["messages"][0].content == "summary"
+
+
+def test_react_agent_exceeded_deadline(llm_provider, mock_fabric_tools):
+    deadline = Deadline(600)
+    agent = ReActAgent(llm_provider, mock_fabric_tools, AgentOptions(deadline=deadline))
+    state = {"messages": [HumanMessage(content="test")]}
+
+    assert agent._get_exceeded_limit(state) is None
+    deadline.expires_at = time.monotonic() - 1
+    assert agent._get_exceeded_limit(state) == "deadline: 600s passed"
+
+
+def test_react_agent_finish_without_tool_output(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+
+    result = agent._finish({"messages": [HumanMessage(content="test")]})
+
+    assert result["messages"][0].content == "Agent stopped by limit before any fabric pattern completed"
 
 
 # Test assistant method in ReActAgent
@@ -99,3 +403,351 @@ def test_react_agent_assistant(llm_provider, mock_fabric_tools):
 
     assert "messages" in result
     mock_llm_with_tools.invoke.assert_called_once()
+
+
+def test_react_agent_async_assistant(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+    mock_llm_with_tools = Mock()
+    mock_llm_with_tools.ainvoke = AsyncMock(return_value=AIMessage(content="test response"))
+
+    state = {"messages": [HumanMessage(content="test")]}
+    result = asyncio.run(agent._aassistant(mock_llm_with_tools, SystemMessage(content="test"), state))
+
+    assert result["messages"][0].content == "test response"
+    mock_llm_with_tools.invoke.assert_not_called()
+
+
+def test_react_agent_assistant_trims_comment_history(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools, AgentOptions(context_tokens=50, recent_comments=1))
+    mock_llm_with_tools = Mock()
+    mock_llm_with_tools.invoke.return_value = AIMessage(content="test response")
+    input_str = "INSTRUCTION:\n/fabric summarize\n\nGITHUB ISSUE, NR: 1, AUTHOR: xvnpw, TITLE: Docs\nbody\n" + "".join(
+        f"\nISSUE COMMENT, ID: {i}, AUTHOR: github-actions[bot]\n{'output ' * 50}\n" for i in range(5)
+    )
+    state = {"messages": [HumanMessage(content=input_str, id="input"), AIMessage(content="turn")]}
+
+    agent._assistant(mock_llm_with_tools, SystemMessage(content="test"), state)
+
+    messages = mock_llm_with_tools.invoke.call_args.args[0]
+    assert len(messages[1].content) < len(input_str)
+    assert "ISSUE COMMENT, ID: 4" in messages[1].content
+    assert messages[1].id == "input"
+    assert messages[2:] == state["messages"][1:]
+    # graph state keeps the whole input
+    assert state["messages"][0].content == input_str
+
+
+def test_react_agent_assistant_compacts_history(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools, AgentOptions(history_compaction=True))
+    mock_llm_with_tools = Mock()
+    mock_llm_with_tools.invoke.return_value = AIMessage(content="test response")
+    output = "tool output " * 50
+    state = {
+        "messages": [
+            HumanMessage(content="INSTRUCTION:\n/fabric clean and improve\n\nINPUT:\nabc\n"),
+            AIMessage(content="", tool_calls=[{"name": "clean_text", "args": {"input": "abc"}, "id": "call_1"}]),
+            ToolMessage(content=output, tool_call_id="call_1", name="clean_text"),
+            AIMessage(content="", tool_calls=[{"name": "improve_writing", "args": {"input": output}, "id": "call_2"}]),
+            ToolMessage(content="improved", tool_call_id="call_2", name="improve_writing"),
+        ]
+    }
+
+    result = agent._assistant(mock_llm_with_tools, SystemMessage(content="test"), state)
+
+    messages = mock_llm_with_tools.invoke.call_args.args[0]
+    assert messages[3].content == "[output passed to tool call call_2, 150 tokens elided]"
+    assert result["compaction_saved_tokens"] == [150 - 14]
+    # graph state keeps the whole history
+    assert state["messages"][2].content == output
+
+
+@pytest.mark.parametrize("agent_class", [RouterAgent, ReActAgent])
+def test_agent_run_pattern_tool_binding(llm_provider, mock_fabric_tools, agent_class):
+    run_pattern_tool = Mock()
+    mock_fabric_tools.get_run_pattern_tool.return_value = run_pattern_tool
+    agent = agent_class(llm_provider, mock_fabric_tools, AgentOptions(tool_binding="run_pattern"))
+
+    assert agent._get_agent_tools() == [run_pattern_tool]
+    mock_fabric_tools.get_fabric_tools.assert_not_called()
+
+
+def test_agent_patterns_tool_binding_builds_tools_once(llm_provider, mock_fabric_tools):
+    ReActAgent(llm_provider, mock_fabric_tools).build_graph()
+    mock_fabric_tools.get_fabric_tools.assert_called_once()
+    mock_fabric_tools.get_run_pattern_tool.assert_not_called()
+
+
+def test_react_agent_prompt_with_input_references(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools, AgentOptions(input_references=True))
+    assert "{{GIT DIFF}}" in agent._get_prompt_with_options(agent._get_agent_prompt())
+
+    agent = ReActAgent(llm_provider, mock_fabric_tools)
+    assert "{{GIT DIFF}}" not in agent._get_prompt_with_options(agent._get_agent_prompt())
+
+
+def test_react_agent_prompt_with_output_passthrough(llm_provider, mock_fabric_tools):
+    agent = ReActAgent(llm_provider, mock_fabric_tools, AgentOptions(output_passthrough=True))
+    assert "OUTPUT PASSTHROUGH" in agent._get_prompt_with_options(agent._get_agent_prompt())
+
+    agent = RouterAgent(llm_provider, mock_fabric_tools, AgentOptions(output_passthrough=True))
+    assert "OUTPUT PASSTHROUGH" not in agent._get_prompt_with_options("prompt")
+
+
+def test_resolve_tool_call_references():
+    messages = [
+        HumanMessage(content="INSTRUCTION:\n/fabric clean text\n\nINPUT:\nsome  text\n"),
+        AIMessage(content="", tool_calls=[{"name": "clean_text", "args": {"input": "{{INPUT}}"}, "id": "call_1"}]),
+        ToolMessage(content="some text", tool_call_id="call_1", name="clean_text"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "improve_writing", "args": {"input": "{{call_1}}"}, "id": "call_2"}],
+        ),
+    ]
+
+    resolved = resolve_tool_call_references(messages)
+
+    assert resolved.tool_calls[0]["args"] == {"input": "some text"}
+    assert resolved.tool_calls[0]["id"] == "call_2"
+    assert messages[-1].tool_calls[0]["args"] == {"input": "{{call_1}}"}
+
+
+def test_router_agent_tools_node_resolves_references(llm_provider):
+    def echo(input: str) -> str:
+        """echo tool
+
+        Args:
+            input: input text
+        """
+        return input
+
+    tools = Mock(spec=FabricTools)
+    tools.get_fabric_tools.return_value = [echo]
+    agent = RouterAgent(llm_provider, tools, AgentOptions(input_references=True))
+    tools_node = agent._create_tools_node([echo])
+
+    result = tools_node.invoke(
+        {
+            "messages": [
+                HumanMessage(content="INSTRUCTION:\n/fabric echo\n\nINPUT:\nhello\n"),
+                AIMessage(content="", tool_calls=[{"name": "echo", "args": {"input": "{{INPUT}}"}, "id": "call_1"}]),
+            ]
+        }
+    )
+
+    assert result["messages"][0].content == "hello"
+
+
+def test_router_agent_routing_cache(llm_provider, tmp_path):
+    def echo(input: str) -> str:
+        """echo tool
+
+        Args:
+            input: input text
+        """
+        return f"echo({input})"
+
+    tools = Mock(spec=FabricTools)
+    tools.get_fabric_tools.return_value = [echo]
+    routing_cache = RoutingCache(tmp_path, LLMConfig(provider="openai", model="gpt-4o", temperature=0), 3600, 100)
+    llm_with_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.return_value
+    llm_with_tools.invoke.side_effect = lambda messages: AIMessage(
+        content="", tool_calls=[{"name": "echo", "args": {"input": "hello"}, "id": "call_1"}]
+    )
+    graph = RouterAgent(llm_provider, tools, AgentOptions(routing_cache=routing_cache)).build_graph()
+
+    for _ in range(2):
+        graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric echo\n\nINPUT:\nhello\n")]})
+    result = graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric  Echo\n\nINPUT:\nworld\n")]})
+
+    assert llm_with_tools.invoke.call_count == 2
+    assert result["messages"][-1].content == "echo(world)"
+    routing_cache.close()
+
+
+def test_router_agent_routing_cache_with_run_pattern_binding(llm_provider, tmp_path):
+    def echo(input: str) -> str:
+        """Echo input"""
+        return f"echo({input})"
+
+    tools = FabricTools(MagicMock())
+    tools._get_fabric_tools = Mock(return_value=[echo])
+    routing_cache = RoutingCache(tmp_path, LLMConfig(provider="openai", model="gpt-4o", temperature=0), 3600, 100)
+    llm_with_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.return_value
+    llm_with_tools.invoke.side_effect = lambda messages: AIMessage(
+        content="",
+        tool_calls=[{"name": "run_pattern", "args": {"pattern_name": "echo", "input": "hello"}, "id": "call_1"}],
+    )
+    options = AgentOptions(tool_binding="run_pattern", routing_cache=routing_cache)
+    graph = RouterAgent(llm_provider, tools, options).build_graph()
+
+    for _ in range(2):
+        graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric echo\n\nINPUT:\nhello\n")]})
+    result = graph.invoke({"messages": [HumanMessage(content="INSTRUCTION:\n/fabric echo\n\nINPUT:\nworld\n")]})
+
+    assert llm_with_tools.invoke.call_count == 2
+    assert result["messages"][-1].content == "echo(world)"
+    routing_cache.close()
+
+
+def test_router_agent_async_routing_cache(llm_provider, tmp_path):
+    def echo(input: str) -> str:
+        """echo tool
+
+        Args:
+            input: input text
+        """
+        return f"echo({input})"
+
+    tools = Mock(spec=FabricTools)
+    tools.get_fabric_tools.return_value = [echo]
+    routing_cache = RoutingCache(tmp_path, LLMConfig(provider="openai", model="gpt-4o", temperature=0), 3600, 100)
+    llm_with_tools = llm_provider.createAgentLLM.return_value.llm.bind_tools.return_value
+    llm_with_tools.ainvoke = AsyncMock(
+        return_value=AIMessage(content="", tool_calls=[{"name": "echo", "args": {"input": "hello"}, "id": "call_1"}])
+    )
+    graph = RouterAgent(llm_provider, tools, AgentOptions(routing_cache=routing_cache)).build_graph()
+
+    async def run() -> dict:
+        for input_text in ["hello", "hello", "world"]:
+            input_str = f"INSTRUCTION:\n/fabric echo\n\nINPUT:\n{input_text}\n"
+            result = await graph.ainvoke({"messages": [HumanMessage(content=input_str)]})
+        return result
+
+    result = asyncio.run(run())
+
+    assert llm_with_tools.ainvoke.await_count == 2
+    llm_with_tools.invoke.assert_not_called()
+    assert result["messages"][-1].content == "echo(world)"
+    routing_cache.close()
+
+
+# Tests for PlanAgent
+PLAN_INPUT = "INSTRUCTION:\n/fabric clean text and improve writing\n\nINPUT:\nsome text\n"
+
+
+def test_plan_agent_build_graph(llm_provider, plan_fabric_tools):
+    builder = AgentBuilder("plan", llm_provider, plan_fabric_tools)
+    graph = builder.build()
+    assert graph is not None
+
+
+def test_plan_agent_executes_chained_steps(llm_provider, plan_fabric_tools):
+    plan = Plan(
+        steps=[
+            PlanStep(id="step1", pattern="clean_text", input="{{INPUT}}"),
+            PlanStep(id="step2", pattern="improve_writing", input="{{step1}}"),
+        ]
+    )
+    llm_provider.createAgentLLM.return_value.llm.with_structured_output.return_value.invoke.return_value = plan
+    graph = PlanAgent(llm_provider, plan_fabric_tools).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content=PLAN_INPUT)], "max_num_turns": 10})
+
+    assert result["messages"][-1].content == "improve(clean(some text))"
+
+
+def test_plan_agent_async_executes_chained_steps(llm_provider, plan_fabric_tools):
+    plan = Plan(
+        steps=[
+            PlanStep(id="step1", pattern="clean_text", input="{{INPUT}}"),
+            PlanStep(id="step2", pattern="improve_writing", input="{{step1}}"),
+            PlanStep(id="step3", pattern="clean_text", input="{{INSTRUCTION}}"),
+        ],
+        outputs=["step2", "step3"],
+    )
+    structured_output = llm_provider.createAgentLLM.return_value.llm.with_structured_output.return_value
+    structured_output.ainvoke = AsyncMock(return_value=plan)
+    graph = PlanAgent(llm_provider, plan_fabric_tools).build_graph()
+
+    result = asyncio.run(graph.ainvoke({"messages": [HumanMessage(content=PLAN_INPUT)], "max_num_turns": 10}))
+
+    assert result["messages"][-1].content == (
+        "improve(clean(some text))\n\nclean(/fabric clean text and improve writing)"
+    )
+    structured_output.invoke.assert_not_called()
+
+
+def test_plan_agent_stops_at_deadline_of_planning(llm_provider, plan_fabric_tools):
+    structured_output = llm_provider.createAgentLLM.return_value.llm.with_structured_output.return_value
+    structured_output.invoke.side_effect = DeadlineExceeded("Deadline of 600s passed")
+    graph = PlanAgent(llm_provider, plan_fabric_tools).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content=PLAN_INPUT)], "max_num_turns": 10})
+
+    assert result["messages"][-1].content == DEADLINE_MESSAGE
+
+
+def test_plan_agent_stops_at_deadline_of_step(llm_provider, plan_fabric_tools):
+    def clean_text(input: str) -> str:
+        """Clean text using fabric pattern"""
+        raise DeadlineExceeded("Deadline of 600s passed")
+
+    plan_fabric_tools.get_fabric_tools.return_value = [clean_text]
+    plan = Plan(steps=[PlanStep(id="step1", pattern="clean_text", input="{{INPUT}}")])
+    agent = PlanAgent(llm_provider, plan_fabric_tools)
+    state = {"messages": [HumanMessage(content=PLAN_INPUT)], "plan": plan, "max_num_turns": 10}
+
+    result = agent._execute(state)
+
+    assert result["messages"][0].content == DEADLINE_MESSAGE
+
+
+def test_plan_agent_executes_independent_steps(llm_provider, plan_fabric_tools):
+    plan = Plan(
+        steps=[
+            PlanStep(id="a", pattern="clean_text", input="{{INPUT}}"),
+            PlanStep(id="b", pattern="improve_writing", input="{{INSTRUCTION}}"),
+        ],
+        outputs=["b", "a"],
+    )
+    agent = PlanAgent(llm_provider, plan_fabric_tools)
+    state = {"messages": [HumanMessage(content=PLAN_INPUT)], "plan": plan, "max_num_turns": 10}
+
+    result = agent._execute(state)
+
+    assert result["messages"][0].content == "improve(/fabric clean text and improve writing)\n\nclean(some text)"
+
+
+def test_plan_agent_empty_plan(llm_provider, plan_fabric_tools):
+    llm_provider.createAgentLLM.return_value.llm.with_structured_output.return_value.invoke.return_value = Plan(
+        steps=[]
+    )
+    graph = PlanAgent(llm_provider, plan_fabric_tools).build_graph()
+
+    result = graph.invoke({"messages": [HumanMessage(content=PLAN_INPUT)], "max_num_turns": 10})
+
+    assert result["messages"][-1].content == "no fabric pattern for this request"
+
+
+@pytest.mark.parametrize(
+    "steps,max_num_turns,error",
+    [
+        ([PlanStep(id="s1", pattern="unknown", input="{{INPUT}}")], 10, "Unknown fabric pattern in plan: unknown"),
+        (
+            [PlanStep(id="s1", pattern="clean_text", input="x"), PlanStep(id="s1", pattern="clean_text", input="y")],
+            10,
+            "duplicated step ids",
+        ),
+        (
+            [PlanStep(id="s1", pattern="clean_text", input="x"), PlanStep(id="s2", pattern="clean_text", input="y")],
+            1,
+            "Plan has 2 steps, but maximum number of turns is 1",
+        ),
+        (
+            [
+                PlanStep(id="s1", pattern="clean_text", input="{{s2}}"),
+                PlanStep(id="s2", pattern="clean_text", input="{{s1}}"),
+            ],
+            10,
+            "unresolved dependencies",
+        ),
+    ],
+)
+def test_plan_agent_invalid_plan(llm_provider, plan_fabric_tools, steps, max_num_turns, error):
+    agent = PlanAgent(llm_provider, plan_fabric_tools)
+    state = {"messages": [HumanMessage(content=PLAN_INPUT)], "plan": Plan(steps=steps), "max_num_turns": max_num_turns}
+
+    with pytest.raises(ValueError, match=error):
+        agent._execute(state)
+    with pytest.raises(ValueError, match=error):
+        asyncio.run(agent._aexecute(state))
@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from fabric_agent_action.call_policy import CallPolicy, CallStats, LatencyTracker
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("fabric_agent_action.call_policy.BACKOFF_BASE_SECONDS", 0)
+
+
+def failing(errors: list[BaseException], result: str = "ok"):
+    """Return function raising given errors on first calls, then returning result"""
+    calls = {"count": 0}
+
+    def func() -> str:
+        calls["count"] += 1
+        if calls["count"] <= len(errors):
+            raise errors[calls["count"] - 1]
+        return result
+
+    return func
+
+
+def test_latency_percentile():
+    tracker = LatencyTracker()
+    for latency in range(1, 21):
+        tracker.record(float(latency))
+
+    assert tracker.get_percentile(0.95) == 20.0
+    assert tracker.get_percentile(0.5) == 11.0
+    assert LatencyTracker().get_percentile(0.95) is None
+
+
+def test_call_without_policy_options():
+    policy = CallPolicy()
+
+    assert policy.call(lambda: "ok") == "ok"
+    assert policy.get_stats() == CallStats(calls=1, retries=0, timeouts=0, hedged=0, hedge_wins=0)
+    assert policy.latencies.get_percentile(0.95, min_samples=1) is not None
+
+
+def test_retries_transient_errors():
+    policy = CallPolicy(max_retries=2)
+
+    assert policy.call(failing([TimeoutError(), TimeoutError()])) == "ok"
+    assert policy.get_stats().retries == 2
+
+
+def test_gives_up_after_max_retries():
+    policy = CallPolicy(max_retries=1)
+
+    with pytest.raises(TimeoutError):
+        policy.call(failing([TimeoutError(), TimeoutError()]))
+    assert policy.get_stats().timeouts == 2
+
+
+def test_does_not_retry_other_errors():
+    policy = CallPolicy(max_retries=3)
+
+    with pytest.raises(ValueError):
+        policy.call(failing([ValueError("invalid request")]))
+    assert policy.get_stats().retries == 0
+
+
+def test_call_timeout():
+    policy = CallPolicy(timeout=0.05)
+
+    with pytest.raises(TimeoutError):
+        policy.call(lambda: time.sleep(1))
+    assert policy.get_stats().timeouts == 1
+    policy.close()
+
+
+def test_call_in_worker_thread_keeps_context():
+    request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+    policy = CallPolicy(timeout=1, hedge_delay=0.05)
+    request_id.set("abc")
+
+    assert policy.call(request_id.get) == "abc"
+    policy.close()
+
+
+def test_acall_timeout_retried():
+    policy = CallPolicy(timeout=0.05, max_retries=1)
+    attempts = []
+
+    async def func() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    assert asyncio.run(policy.acall(func)) == "ok"
+    assert policy.get_stats() == CallStats(calls=1, retries=1, timeouts=1, hedged=0, hedge_wins=0)
+
+
+def test_call_hedged():
+    policy = CallPolicy(hedge_delay=0.05)
+    attempts = []
+
+    def func() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    assert policy.call(func) == "fast"
+    assert policy.get_stats().hedged == 1
+    assert policy.get_stats().hedge_wins == 1
+    policy.close()
+
+
+def test_acall_hedged():
+    policy = CallPolicy(hedge_delay=0.05)
+    attempts = []
+
+    async def func() -> str:
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert asyncio.run(policy.acall(func)) == "fast"
+    assert policy.get_stats() == CallStats(calls=1, retries=0, timeouts=0, hedged=1, hedge_wins=1)
+
+
+def test_acall_not_hedged_when_fast():
+    policy = CallPolicy(hedge_delay=1)
+
+    async def func() -> str:
+        return "ok"
+
+    assert asyncio.run(policy.acall(func)) == "ok"
+    assert policy.get_stats().hedged == 0
+
+
+def test_acall_hedge_failure_falls_back_to_primary():
+    policy = CallPolicy(hedge_delay=0.02)
+    attempts = []
+
+    async def func() -> str:
+        attempts.append(1)
+        if len(attempts) == 2:
+            raise ConnectionError("hedge failed")
+        await asyncio.sleep(0.1)
+        return "primary"
+
+    assert asyncio.run(policy.acall(func)) == "primary"
+    assert policy.get_stats().hedge_wins == 0
+
+
+def test_hedge_delay_adapts_to_latency():
+    policy = CallPolicy(hedge_delay=10)
+    for _ in range(5):
+        policy.latencies.record(0.5)
+    assert policy._get_hedge_delay() == 0.5
@@ -0,0 +1,104 @@
+import pytest
+
+from fabric_agent_action.chunking import (
+    CHARS_PER_TOKEN,
+    estimate_tokens,
+    get_reduce_input,
+    group_outputs,
+    merge_chunks,
+    split_text,
+)
+
+
+def create_diff(num_files: int, num_hunks: int, num_lines: int) -> str:
+    diff = ""
+    for f in range(num_files):
+        diff += f"diff --git a/file{f}.py b/file{f}.py\nindex 1234567..89abcde 100644\n"
+        diff += f"--- a/file{f}.py\n+++ b/file{f}.py\n"
+        for h in range(num_hunks):
+            diff += f"@@ -{h * 10},3 +{h * 10},3 @@\n" + "".join(f"+line {i} of file {f}\n" for i in range(num_lines))
+    return diff
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_split_text_fitting_budget():
+    assert split_text("short text", 100) == ["short text"]
+
+
+def test_split_diff_on_file_headers():
+    diff = create_diff(num_files=4, num_hunks=1, num_lines=5)
+    file_tokens = estimate_tokens(diff[: diff.index("diff --git", 1)])
+
+    chunks = split_text(diff, file_tokens * 2)
+
+    assert len(chunks) == 2
+    assert "".join(chunks) == diff
+    assert all(chunk.startswith("diff --git ") for chunk in chunks)
+
+
+def test_split_large_file_diff_on_hunks_with_file_header():
+    diff = create_diff(num_files=1, num_hunks=4, num_lines=20)
+
+    chunks = split_text(diff, 200)
+
+    assert len(chunks) > 1
+    header = diff[: diff.index("@@")]
+    assert all(chunk.startswith(header + "@@ ") for chunk in chunks)
+    assert "".join(chunk[len(header) :] for chunk in chunks) == diff[len(header) :]
+
+
+def test_split_markdown_sections_and_paragraphs():
+    text = "# Title\n\nIntro.\n\n## Section\n\n" + "\n\n".join(f"Paragraph {i} " + "word " * 40 for i in range(10))
+
+    chunks = split_text(text, 100)
+
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= 100 * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk.startswith(("# ", "## ", "Paragraph ")) for chunk in chunks)
+
+
+def test_split_long_line():
+    text = "x" * 1000
+
+    chunks = split_text(text, 100)
+
+    assert chunks == ["x" * 400, "x" * 400, "x" * 200]
+
+
+@pytest.mark.parametrize("max_tokens", [10, 50, 200, 1000])
+def test_split_text_keeps_text_and_budget(max_tokens):
+    text = "# Notes\n\n" + create_diff(num_files=3, num_hunks=3, num_lines=15) + "\n\nlast paragraph\n"
+
+    chunks = split_text(text, max_tokens)
+
+    assert all(len(chunk) <= max_tokens * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk in text or "diff --git" in chunk for chunk in chunks)
+
+
+def test_merge_chunks():
+    assert merge_chunks(["aa", "bb", "cc", "dddd"], 4) == ["aabb", "cc", "dddd"]
+
+
+def test_get_reduce_input():
+    reduce_input = get_reduce_input(["first\n", "second"])
+
+    assert "split into 2 consecutive parts" in reduce_input
+    assert reduce_input.index("## OUTPUT FOR PART 1\n\nfirst") < reduce_input.index("## OUTPUT FOR PART 2\n\nsecond")
+
+
+def test_group_outputs():
+    outputs = ["a" * 40] * 6
+    max_tokens = estimate_tokens(get_reduce_input(outputs[:2]))
+
+    assert group_outputs(outputs, max_tokens) == [outputs[:2], outputs[2:4], outputs[4:]]
+
+
+def test_group_outputs_too_large_are_reduced_at_once():
+    outputs = ["a" * 400] * 3
+
+    assert group_outputs(outputs, 10) == [outputs]
@@ -0,0 +1,88 @@
+from fabric_agent_action.chunking import estimate_tokens
+from fabric_agent_action.context_budget import ContextBudgeter, is_bot_comment
+from fabric_agent_action.inputs import InputSections
+
+
+def create_issue_input(instruction: str, num_comments: int, comment_size: int = 400) -> str:
+    input_str = f"INSTRUCTION:\n{instruction}\n\nGITHUB ISSUE, NR: 1, AUTHOR: xvnpw, TITLE: Docs\nIssue body.\n"
+    for i in range(num_comments):
+        author = "github-actions[bot]" if i % 2 else "xvnpw"
+        content = f"bot output {i} " * (comment_size // 14) if i % 2 else f"/fabric command {i}"
+        input_str += f"\nISSUE COMMENT, ID: {1000 + i}, AUTHOR: {author}\n{content}\n"
+    return input_str
+
+
+def test_is_bot_comment():
+    sections = InputSections.parse(create_issue_input("/fabric summarize", 2))
+
+    assert [is_bot_comment(c) for c in sections.comments] == [False, True]
+
+
+def test_input_within_budget_is_unchanged():
+    input_str = create_issue_input("/fabric summarize", 4)
+
+    assert ContextBudgeter(estimate_tokens(input_str)).trim(input_str) == input_str
+
+
+def test_bot_outputs_are_stubbed_first():
+    input_str = create_issue_input("/fabric summarize", 10)
+    budgeter = ContextBudgeter(estimate_tokens(input_str) // 2, recent_comments=2)
+
+    trimmed = budgeter.trim(input_str)
+
+    sections = InputSections.parse(trimmed)
+    assert sections.instruction == "/fabric summarize"
+    assert sections.get("GITHUB ISSUE").content == "Issue body."
+    assert [c.id for c in sections.comments] == [str(1000 + i) for i in range(10)]
+    assert sections.get_comment("1001").content.startswith("[output elided, ")
+    # recent comments are kept in full
+    assert sections.get_comment("1009").content.startswith("bot output 9")
+    assert estimate_tokens(trimmed) <= budgeter.max_tokens
+
+
+def test_older_comments_are_omitted_when_stubs_do_not_fit():
+    input_str = create_issue_input("/fabric summarize", 200)
+    budgeter = ContextBudgeter(600, recent_comments=3)
+
+    trimmed = budgeter.trim(input_str)
+
+    sections = InputSections.parse(trimmed)
+    assert [c.id for c in sections.comments][-3:] == ["1197", "1198", "1199"]
+    assert sections.comments[0].id != "1000"
+    assert trimmed.count("older comments omitted]") == 1
+    assert estimate_tokens(trimmed) <= 600
+
+
+def test_trimmed_size_is_bounded():
+    budgeter = ContextBudgeter(100, recent_comments=2)
+
+    sizes = [len(budgeter.trim(create_issue_input("/fabric summarize", n))) for n in (50, 500)]
+
+    # only ids and number of omitted comments get longer
+    assert sizes[1] - sizes[0] < 50
+
+
+def test_referenced_comments_are_kept():
+    input_str = create_issue_input("/fabric improve writing of comment 1003", 20)
+    budgeter = ContextBudgeter(100, recent_comments=1)
+
+    sections = InputSections.parse(budgeter.trim(input_str))
+
+    assert sections.get_comment("1003").content.startswith("bot output 3")
+    assert [c.id for c in sections.comments] == ["1003", "1019"]
+
+
+def test_input_without_comments_is_unchanged():
+    input_str = "INSTRUCTION:\n/fabric summarize\n\nINPUT:\n" + "text " * 1000
+
+    assert ContextBudgeter(10).trim(input_str) == input_str
+
+
+def test_text_before_first_section_is_kept():
+    input_str = "Please see below\n" + create_issue_input("/fabric summarize", 10)
+    budgeter = ContextBudgeter(estimate_tokens(input_str) // 2, recent_comments=2)
+
+    trimmed = budgeter.trim(input_str)
+
+    assert trimmed.startswith("Please see below\n\nINSTRUCTION:\n/fabric summarize")
+    assert InputSections.parse(trimmed).preamble == "Please see below"
@@ -0,0 +1,135 @@
+import asyncio
+import time
+from unittest.mock import Mock
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from fabric_agent_action.deadline import Deadline, DeadlineChatModel, DeadlineExceeded, DeadlineRunnable
+from fabric_agent_action.failover import is_fallback_response
+
+
+class SlowChatModel(BaseChatModel):
+    delay: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _generate(self, *args, **kwargs):
+        time.sleep(self.delay)
+        raise AssertionError("call should be cancelled")
+
+    async def _agenerate(self, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        raise AssertionError("call should be cancelled")
+
+
+def create_expired_deadline() -> Deadline:
+    deadline = Deadline(10)
+    deadline.expires_at = time.monotonic() - 1
+    return deadline
+
+
+def test_no_deadline():
+    deadline = Deadline()
+
+    assert deadline.get_remaining() is None
+    assert not deadline.expired
+    assert not deadline.should_degrade()
+    assert deadline.call(lambda: "result") == "result"
+
+
+def test_deadline_should_degrade():
+    assert not Deadline(600, threshold=60).should_degrade()
+    assert Deadline(30, threshold=60).should_degrade()
+
+
+def test_expired_deadline_does_not_start_call():
+    func = Mock()
+
+    with pytest.raises(DeadlineExceeded):
+        create_expired_deadline().call(func)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(create_expired_deadline().acall(func))
+    func.assert_not_called()
+
+
+def test_call_cancelled_at_deadline():
+    deadline = Deadline(0.1)
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        deadline.call(lambda: time.sleep(1))
+
+    assert time.monotonic() - started < 0.5
+    deadline.close()
+
+
+def test_async_call_cancelled_at_deadline():
+    cancelled = False
+
+    async def call() -> None:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    async def run() -> None:
+        with pytest.raises(DeadlineExceeded):
+            await Deadline(0.1).acall(call)
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+    assert cancelled
+
+
+def test_call_errors_are_raised():
+    def fail() -> None:
+        raise TimeoutError("provider timeout")
+
+    with pytest.raises(TimeoutError, match="provider timeout"):
+        Deadline(10).call(fail)
+
+
+@pytest.mark.parametrize("threshold,expected", [(0, "primary"), (700, "fallback")])
+def test_deadline_chat_model_degrades_to_fallback(threshold, expected):
+    llm = DeadlineChatModel(
+        model=FakeListChatModel(responses=["primary"]),
+        fallback=FakeListChatModel(responses=["fallback"]),
+        deadline=Deadline(600, threshold=threshold),
+    )
+
+    assert llm.invoke("test").content == expected
+    assert asyncio.run(llm.ainvoke("test")).content == expected
+    assert is_fallback_response(llm.invoke("test")) == (expected == "fallback")
+
+
+def test_deadline_chat_model_without_fallback():
+    llm = DeadlineChatModel(model=FakeListChatModel(responses=["primary"]), deadline=Deadline(600, threshold=700))
+
+    assert llm.invoke("test").content == "primary"
+
+
+def test_deadline_chat_model_cancels_call():
+    llm = DeadlineChatModel(model=SlowChatModel(), deadline=Deadline(0.1))
+
+    with pytest.raises(DeadlineExceeded):
+        llm.invoke("test")
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(llm.ainvoke("test"))
+
+
+def test_deadline_runnable_degrades_to_fallback():
+    runnable = DeadlineRunnable(
+        FakeListChatModel(responses=["primary"]),
+        FakeListChatModel(responses=["fallback"]),
+        Deadline(600, threshold=700),
+    )
+
+    assert runnable.invoke("test").content == "fallback"
+    assert asyncio.run(runnable.ainvoke("test")).content == "fallback"
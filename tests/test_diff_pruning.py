@@ -0,0 +1,145 @@
+import pytest
+
+from fabric_agent_action.diff_pruning import DEFAULT_EXCLUDE_GLOBS, DiffPruner, FileDiff, iter_file_diffs, iter_lines
+from fabric_agent_action.inputs import InputSections
+
+
+def create_file_diff(path: str, hunks: list[list[str]], new_file: bool = False) -> str:
+    diff = f"diff --git a/{path} b/{path}\n"
+    diff += "new file mode 100644\nindex 0000000..1234567\n--- /dev/null\n" if new_file else "index 1..2 100644\n"
+    diff += f"+++ b/{path}\n" if new_file else f"--- a/{path}\n+++ b/{path}\n"
+    for i, lines in enumerate(hunks):
+        diff += f"@@ -{i * 10},3 +{i * 10},{len(lines)} @@\n" + "".join(f"{line}\n" for line in lines)
+    return diff
+
+
+APP_DIFF = create_file_diff("src/app.py", [[" a", "+b", "+c"], [" x", "-y", "+z"]])
+LOCK_DIFF = create_file_diff("poetry.lock", [["+dep = 1"] * 50])
+BINARY_DIFF = "diff --git a/logo.png b/logo.png\nindex 1..2 100644\nBinary files a/logo.png and b/logo.png differ\n"
+GENERATED_DIFF = create_file_diff("api/client.py", [["+# Code generated by openapi. DO NOT EDIT.", "+x = 1"]])
+MINIFIED_DIFF = create_file_diff("static/app.js", [["+" + "var a=1;" * 100]], new_file=True)
+
+
+def test_iter_file_diffs():
+    file_diffs = list(iter_file_diffs((APP_DIFF + LOCK_DIFF).splitlines(keepends=True)))
+
+    assert [f.path for f in file_diffs] == ["src/app.py", "poetry.lock"]
+    assert len(file_diffs[0].hunks) == 2
+    assert file_diffs[0].get_stats() == (3, 1)
+    assert "".join(file_diffs[0].header) + "".join("".join(h) for h in file_diffs[0].hunks) == APP_DIFF
+
+
+def test_iter_file_diffs_holds_one_file():
+    consumed: list[str] = []
+
+    def lines():
+        for line in (APP_DIFF + LOCK_DIFF + APP_DIFF).splitlines(keepends=True):
+            consumed.append(line)
+            yield line
+
+    file_diffs = iter_file_diffs(lines())
+    next(file_diffs)
+
+    # first file is yielded as soon as header of second file is read
+    assert "".join(consumed) == APP_DIFF + LOCK_DIFF.splitlines(keepends=True)[0]
+
+
+def test_iter_lines():
+    assert list(iter_lines("a\nb\n\nc")) == ["a\n", "b\n", "\n", "c"]
+    assert list(iter_lines(APP_DIFF)) == APP_DIFF.splitlines(keepends=True)
+    assert list(iter_lines("")) == []
+
+
+def test_file_diff_path_of_deleted_file():
+    file_diff = next(iter_file_diffs(["diff --git a/old.py b/old.py\n", "--- a/old.py\n", "+++ /dev/null\n"]))
+
+    assert file_diff.path == "old.py"
+
+
+@pytest.mark.parametrize(
+    "diff,reason",
+    [
+        (APP_DIFF, None),
+        (LOCK_DIFF, "matches *.lock"),
+        (create_file_diff("web/package-lock.json", [["+{}"]]), "matches package-lock.json"),
+        (create_file_diff("vendor/lib/x.go", [["+x"]]), "matches vendor/*"),
+        (BINARY_DIFF, "binary file"),
+        (GENERATED_DIFF, "generated file"),
+        (MINIFIED_DIFF, "minified file"),
+    ],
+)
+def test_get_noise_reason(diff, reason):
+    file_diff = next(iter_file_diffs(diff.splitlines(keepends=True)))
+
+    assert DiffPruner().get_noise_reason(file_diff) == reason
+
+
+def test_prune_summarizes_noise_files():
+    pruned = DiffPruner().prune(APP_DIFF + LOCK_DIFF + BINARY_DIFF + GENERATED_DIFF)
+
+    assert pruned == (
+        APP_DIFF
+        + "diff --git a/poetry.lock b/poetry.lock\n[matches *.lock, +50 -0 lines omitted]\n"
+        + "diff --git a/logo.png b/logo.png\n[binary file omitted]\n"
+        + "diff --git a/api/client.py b/api/client.py\n[generated file, +2 -0 lines omitted]\n"
+    )
+
+
+def test_prune_with_custom_globs():
+    pruned = DiffPruner(exclude_globs=["src/*"]).prune(APP_DIFF + LOCK_DIFF)
+
+    assert pruned.startswith("diff --git a/src/app.py b/src/app.py\n[matches src/*, +3 -1 lines omitted]\n")
+    assert pruned.endswith(LOCK_DIFF)
+
+
+def test_prune_ranks_hunks_to_fit_budget():
+    code = create_file_diff("src/app.py", [["+first"] * 10, ["+small"], ["+second"] * 10])
+    docs = create_file_diff("README.md", [["+docs"] * 10])
+    pruner = DiffPruner(max_tokens=110)
+
+    pruned = pruner.prune(code + docs)
+
+    # code hunks rank above docs hunk of the same size
+    assert "+first" in pruned and "+second" in pruned
+    assert "+docs" not in pruned
+    assert "diff --git a/README.md b/README.md" in pruned
+    assert "[1 of 1 hunks omitted to fit token budget]" in pruned
+    # kept hunks stay in original order
+    assert pruned.index("+first") < pruned.index("+second")
+
+
+def test_prune_without_noise_summaries():
+    pruner = DiffPruner(max_tokens=10000, summarize_noise=False)
+
+    assert pruner.prune(APP_DIFF + LOCK_DIFF + BINARY_DIFF + MINIFIED_DIFF) == (
+        APP_DIFF + LOCK_DIFF + BINARY_DIFF + MINIFIED_DIFF
+    )
+
+
+def test_prune_within_budget_keeps_diff():
+    assert DiffPruner(exclude_globs=[], max_tokens=10000).prune(APP_DIFF + LOCK_DIFF) == APP_DIFF + LOCK_DIFF
+
+
+def test_prune_input():
+    input_str = (
+        "INSTRUCTION:\n/fabric summarize git diff\n\n"
+        f"GIT DIFF:\n{APP_DIFF}{LOCK_DIFF}\n"
+        "PULL REQUEST COMMENT, ID: 1, AUTHOR: xvnpw\nlgtm\n"
+    )
+
+    pruned = DiffPruner(DEFAULT_EXCLUDE_GLOBS).prune_input(input_str)
+
+    sections = InputSections.parse(pruned)
+    lock_summary = "diff --git a/poetry.lock b/poetry.lock\n[matches *.lock, +50 -0 lines omitted]"
+    assert sections.get("GIT DIFF").content == APP_DIFF + lock_summary
+    assert sections.get_comment("1").content == "lgtm"
+
+
+def test_prune_input_without_git_diff():
+    input_str = "INSTRUCTION:\n/fabric summarize\n\nINPUT:\ntext\n"
+
+    assert DiffPruner().prune_input(input_str) == input_str
+
+
+def test_file_diff_without_header():
+    assert FileDiff().path == ""
@@ -1,7 +1,19 @@
+import asyncio
+
 import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_anthropic import ChatAnthropic
 from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
 
-from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.call_policy import CallPolicy
+from fabric_agent_action.fabric_tools import (
+    FABRIC_PATTERN_CHUNK_TAG,
+    FABRIC_PATTERN_TAG,
+    FabricTools,
+    ainvoke_tool,
+    get_tool_coroutine,
+)
+from fabric_agent_action.prompt_caching import CACHE_CONTROL
 
 
 @pytest.fixture(scope="module")
@@ -214,6 +226,82 @@ def test_invoke_llm(llm):
     assert "create quiz for me about hammer" in fabric_output
 
 
+def test_ainvoke_llm(llm):
+    fabric_tools = FabricTools(llm)
+    fabric_output = asyncio.run(fabric_tools.ainvoke_llm("create quiz for me about hammer", "create_quiz"))
+    assert "create quiz for me about hammer" in fabric_output
+
+
+def test_pattern_is_cached_prompt_prefix():
+    fabric_tools = FabricTools(ChatAnthropic(model="claude-3-5-sonnet-20240620", anthropic_api_key="test-key"))
+
+    pattern_message, input_message = fabric_tools._get_messages("hammer", "create_quiz")
+
+    assert pattern_message.type == "system"
+    assert pattern_message.content == [
+        {"type": "text", "text": fabric_tools.read_fabric_pattern("create_quiz"), "cache_control": CACHE_CONTROL}
+    ]
+    assert input_message.content == "hammer"
+
+
+class TagsRecorder(BaseCallbackHandler):
+    def __init__(self) -> None:
+        self.tags: list[list[str]] = []
+
+    def on_chat_model_start(self, serialized, messages, *, tags=None, **kwargs) -> None:
+        self.tags.append(tags or [])
+
+
+LARGE_INPUT = "\n\n".join(f"# Section {i}\n\n" + f"sentence {i}. " * 30 for i in range(6))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_invoke_llm_map_reduce(use_async):
+    recorder = TagsRecorder()
+    fabric_tools = FabricTools(ParrotFakeChatModel(callbacks=[recorder]), chunk_tokens=200, max_concurrent_chunks=2)
+
+    if use_async:
+        output = asyncio.run(fabric_tools.ainvoke_llm(LARGE_INPUT, "summarize"))
+    else:
+        output = fabric_tools.invoke_llm(LARGE_INPUT, "summarize")
+
+    # parrot model returns its input, so reduce output holds outputs of all chunks in order
+    assert "OUTPUT FOR PART 1\n\n# Section 0" in output
+    assert all(f"sentence {i}." in output for i in range(6))
+    assert len(recorder.tags) > 2
+    assert all(tags == [FABRIC_PATTERN_CHUNK_TAG] for tags in recorder.tags[:-1])
+    assert recorder.tags[-1] == [FABRIC_PATTERN_TAG]
+
+
+def test_invoke_llm_without_chunking(llm):
+    fabric_tools = FabricTools(llm, chunk_tokens=10000)
+
+    assert fabric_tools.invoke_llm(LARGE_INPUT, "summarize") == LARGE_INPUT
+
+
+def test_invoke_llm_with_call_policy(llm):
+    call_policy = CallPolicy(timeout=60)
+    fabric_tools = FabricTools(llm, call_policy=call_policy)
+
+    assert "hammer" in fabric_tools.invoke_llm("hammer", "create_quiz")
+    assert "hammer" in asyncio.run(fabric_tools.ainvoke_llm("hammer", "create_quiz"))
+    assert call_policy.get_stats().calls == 2
+    call_policy.close()
+
+
+def test_tool_coroutine(llm):
+    tool = FabricTools(llm).create_quiz
+    coroutine = get_tool_coroutine(tool)
+
+    assert coroutine is not None
+    assert coroutine.__name__ == tool.__name__
+    assert "hammer" in asyncio.run(ainvoke_tool(tool, "hammer"))
+
+
+def test_ainvoke_tool_without_coroutine():
+    assert asyncio.run(ainvoke_tool(str.upper, "hammer")) == "HAMMER"
+
+
 @pytest.mark.parametrize(
     "included,excluded,tools_count",
     [
@@ -238,3 +326,66 @@ def test_fabric_tools_max_number_of_tools_on_error(llm):
     fabric_tools = FabricTools(llm, max_number_of_tools=1)
     with pytest.raises(ValueError, match="Model supporting only 1 tools, but got 182"):
         fabric_tools.get_fabric_tools()
+
+
+def test_fabric_tools_without_max_number_of_tools_check(llm):
+    fabric_tools = FabricTools(llm, max_number_of_tools=1)
+    tools = fabric_tools.get_fabric_tools(check_max_number_of_tools=False)
+    assert len(tools) == 182
+
+
+def test_fabric_tools_catalog(llm):
+    fabric_tools = FabricTools(llm)
+    catalog = fabric_tools.get_fabric_tools_catalog([fabric_tools.clean_text, fabric_tools.improve_writing])
+    assert catalog.splitlines() == [
+        "- clean_text: Clean input text from broken and malformatted text",
+        "- improve_writing: Improve writing of the input text",
+    ]
+
+
+def test_run_pattern_tool(llm):
+    fabric_tools = FabricTools(llm, included_tools="clean_text,create_quiz")
+    tool = fabric_tools.get_run_pattern_tool()
+
+    assert tool.name == "run_pattern"
+    assert tool.args["pattern_name"]["enum"] == ["clean_text", "create_quiz"]
+    assert "- create_quiz:" in tool.description
+    assert "hammer" in tool.invoke({"pattern_name": "create_quiz", "input": "hammer"})
+    assert "hammer" in asyncio.run(tool.ainvoke({"pattern_name": "create_quiz", "input": "hammer"}))
+
+
+def test_run_pattern_tool_not_limited_by_max_number_of_tools(llm):
+    fabric_tools = FabricTools(llm, max_number_of_tools=1)
+    tool = fabric_tools.get_run_pattern_tool()
+    assert len(tool.args["pattern_name"]["enum"]) == 182
+
+
+def test_with_tools(llm):
+    fabric_tools = FabricTools(llm)
+    limited = fabric_tools.with_tools(["clean_text", "write_pull_request"])
+
+    assert [tool.__name__ for tool in limited.get_fabric_tools()] == ["clean_text", "write_pull_request"]
+    assert len(fabric_tools.get_fabric_tools()) == 182
+
+
+@pytest.mark.parametrize(
+    "tool_name,pattern_name",
+    [("clean_text", "clean_text"), ("write_pull_request", "write_pull-request")],
+)
+def test_get_pattern_name(llm, tool_name, pattern_name):
+    assert FabricTools(llm).get_pattern_name(tool_name) == pattern_name
+
+
+def test_tools_created_only_for_included_patterns(llm):
+    fabric_tools = FabricTools(llm, included_tools="clean_text,write_pull_request")
+    tools = fabric_tools.get_fabric_tools()
+
+    assert list(fabric_tools._tools) == ["clean_text", "write_pull_request"]
+    assert tools[1].__name__ == "write_pull_request"
+    assert "git diff command output" in tools[1].__doc__
+    assert fabric_tools.clean_text is tools[0]
+
+
+def test_unknown_tool_attribute(llm):
+    with pytest.raises(AttributeError):
+        FabricTools(llm).not_exists
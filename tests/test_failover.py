@@ -0,0 +1,242 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import openai
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from fabric_agent_action.call_policy import CallPolicy
+from fabric_agent_action.failover import (
+    CircuitBreaker,
+    Failover,
+    FailoverChatModel,
+    FailoverRunnable,
+    is_fallback_response,
+)
+
+
+class FailingChatModel(BaseChatModel):
+    error: Exception = TimeoutError("provider down")
+
+    @property
+    def _llm_type(self) -> str:
+        return "failing"
+
+    def _generate(self, *args, **kwargs):
+        raise self.error
+
+
+def create_breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker("test", **{"window_size": 4, "min_calls": 2, "open_seconds": 30, **kwargs})
+
+
+def test_circuit_opens_on_failure_rate():
+    breaker = create_breaker()
+
+    breaker.record(True, 0.1)
+    assert breaker.state == "closed"
+    breaker.record(False, 0.1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_slow_calls_count_as_failures():
+    breaker = create_breaker(slow_call_seconds=1.0)
+
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+
+    assert breaker.state == "open"
+
+
+def test_circuit_half_open_probe():
+    breaker = create_breaker()
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+
+    with patch("fabric_agent_action.failover.time.monotonic", return_value=breaker._opened_until):
+        assert breaker.allow_request()
+        assert breaker.state == "half_open"
+        # single probe at a time
+        assert not breaker.allow_request()
+        breaker.record(True, 0.1)
+
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_circuit_reopens_on_failed_probe():
+    breaker = create_breaker()
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+
+    with patch("fabric_agent_action.failover.time.monotonic", return_value=breaker._opened_until):
+        assert breaker.allow_request()
+        breaker.record(False, 0.1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_failover_on_transient_error():
+    failover = Failover(["a", "b"], [create_breaker(), create_breaker()])
+
+    def fail() -> str:
+        raise TimeoutError()
+
+    assert failover.call([fail, lambda: "b"]) == "b"
+    assert list(failover.breakers[0]._window) == [True]
+    assert list(failover.breakers[1]._window) == [False]
+
+
+def test_no_failover_on_other_errors():
+    failover = Failover(["a", "b"], [create_breaker(), create_breaker()])
+
+    def fail() -> str:
+        raise ValueError("invalid request")
+
+    with pytest.raises(ValueError):
+        failover.call([fail, lambda: "b"])
+    assert list(failover.breakers[0]._window) == [False]
+
+
+def test_failover_raises_last_error():
+    failover = Failover(["a", "b"], [create_breaker(), create_breaker()])
+
+    def fail() -> str:
+        raise TimeoutError()
+
+    with pytest.raises(TimeoutError):
+        failover.call([fail, fail])
+
+
+def test_failover_skips_open_circuit():
+    breakers = [create_breaker(), create_breaker()]
+    breakers[0]._open()
+    failover = Failover(["a", "b"], breakers)
+    calls = []
+
+    assert failover.call([lambda: calls.append("a"), lambda: "b"]) == "b"
+    assert calls == []
+
+
+def test_failover_tries_all_if_all_circuits_open():
+    breakers = [create_breaker(), create_breaker()]
+    for breaker in breakers:
+        breaker._open()
+    failover = Failover(["a", "b"], breakers)
+
+    assert failover.call([lambda: "a", lambda: "b"]) == "a"
+
+
+def test_primary_success_keeps_fallback_probe():
+    breakers = [create_breaker(), create_breaker()]
+    breakers[1]._open()
+    failover = Failover(["a", "b"], breakers)
+
+    with patch("fabric_agent_action.failover.time.monotonic", return_value=breakers[1]._opened_until):
+        assert failover.call([lambda: "a", lambda: "b"]) == "a"
+        assert failover.call([lambda: "a", lambda: "b"]) == "a"
+
+        def fail() -> str:
+            raise TimeoutError()
+
+        # fallback was never called, so its probe is still available
+        assert failover.call([fail, lambda: "b"]) == "b"
+
+    assert breakers[1].state == "closed"
+
+
+def test_async_failover_on_transient_error():
+    failover = Failover(["a", "b"], [create_breaker(), create_breaker()])
+
+    async def fail() -> str:
+        raise TimeoutError()
+
+    async def succeed() -> str:
+        return "b"
+
+    assert asyncio.run(failover.acall([fail, succeed])) == "b"
+
+
+def test_failover_chat_model():
+    model = FailoverChatModel(
+        models=[FailingChatModel(), FakeListChatModel(responses=["fallback"])],
+        failover=Failover(["a", "b"], [create_breaker(), create_breaker()]),
+    )
+
+    assert model.invoke("hi").content == "fallback"
+    assert asyncio.run(model.ainvoke("hi")).content == "fallback"
+    assert is_fallback_response(model.invoke("hi"))
+
+
+def test_failover_chat_model_on_provider_error():
+    model = FailoverChatModel(
+        models=[
+            FailingChatModel(error=openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))),
+            FakeListChatModel(responses=["fallback"]),
+        ],
+        failover=Failover(["a", "b"], [create_breaker(), create_breaker()]),
+    )
+
+    assert model.invoke("hi").content == "fallback"
+
+
+def test_failover_chat_model_streams_inner_model():
+    model = FailoverChatModel(
+        models=[FailingChatModel(), FakeListChatModel(responses=["fallback"])],
+        failover=Failover(["a", "b"], [create_breaker(), create_breaker()]),
+    )
+
+    async def stream() -> str:
+        chunks = []
+        async for event in model.astream_events("hi", version="v2"):
+            if event["event"] == "on_chat_model_stream" and event["name"] == "FakeListChatModel":
+                chunks.append(event["data"]["chunk"].content)
+        return "".join(chunks)
+
+    assert asyncio.run(stream()) == "fallback"
+
+
+def test_failover_runnable_binds_each_model():
+    model = FailoverChatModel(
+        models=[FailingChatModel(), FakeListChatModel(responses=["fallback"])],
+        failover=Failover(["a", "b"], [create_breaker(), create_breaker()]),
+    )
+
+    with patch.object(BaseChatModel, "bind_tools", autospec=True, side_effect=lambda self, tools: self) as bind_tools:
+        runnable = model.bind_tools([])
+
+    assert isinstance(runnable, FailoverRunnable)
+    assert [call.args[0] for call in bind_tools.call_args_list] == model.models
+    assert runnable.invoke("hi").content == "fallback"
+    assert asyncio.run(runnable.ainvoke("hi")).content == "fallback"
+
+
+def test_cancelled_calls_open_circuit():
+    breakers = [create_breaker(), create_breaker()]
+    failover = Failover(["a", "b"], breakers)
+    policy = CallPolicy(timeout=0.05)
+
+    async def hang() -> str:
+        await asyncio.sleep(10)
+        return "a"
+
+    async def fallback() -> str:
+        return "b"
+
+    async def run() -> list[str]:
+        results = []
+        for _ in range(3):
+            try:
+                results.append(await policy.acall(lambda: failover.acall([hang, fallback])))
+            except TimeoutError:
+                results.append("timeout")
+        return results
+
+    # hanging primary is cut off by timeout until its circuit opens, then fallback answers
+    assert asyncio.run(run()) == ["timeout", "timeout", "b"]
+    assert breakers[0].state == "open"
@@ -1,16 +1,22 @@
+import asyncio
 import pytest
 from unittest.mock import Mock
 import io
 from typing import Any
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.prebuilt import ToolNode
 
 from fabric_agent_action.config import AppConfig
+from fabric_agent_action.fabric_tools import FabricTools
 from fabric_agent_action.graphs import (
     BaseGraphExecutor,
     RouterGraphExecutor,
     ReActGraphExecutor,
     GraphExecutorFactory,
+    StreamingOutputWriter,
 )
 
 
@@ -21,7 +27,11 @@ def mock_config():
     config.agent_preamble = "AI Assistant:"
     config.agent_preamble_enabled = True
     config.fabric_max_num_turns = 5
+    config.agent_max_tokens = 0
+    config.agent_max_cost = 0
+    config.agent_max_seconds = 0
     config.agent_type = "router"
+    config.output_streaming = False
     return config
 
 
@@ -91,6 +101,25 @@ class TestReActGraphExecutor:
         with pytest.raises(ValueError, match="Invalid or empty AI message"):
             executor._write_output(invalid_state)
 
+    def test_write_output_passthrough(self, mock_config):
+        executor = ReActGraphExecutor(mock_config)
+        state = {
+            "messages": [
+                HumanMessage(content="Hello"),
+                AIMessage(content="", tool_calls=[{"name": "clean_text", "args": {"input": "x"}, "id": "call_1"}]),
+                ToolMessage(content="  exact tool\noutput ", tool_call_id="call_1", name="clean_text"),
+                AIMessage(content="{{call_1}}"),
+            ]
+        }
+        executor._write_output(state)
+        assert mock_config.output_file.getvalue() == f"{mock_config.agent_preamble}\n\n  exact tool\noutput "
+
+    def test_write_output_passthrough_unknown_id(self, mock_config):
+        executor = ReActGraphExecutor(mock_config)
+        state = {"messages": [HumanMessage(content="Hello"), AIMessage(content="{{call_404}}")]}
+        executor._write_output(state)
+        assert mock_config.output_file.getvalue() == f"{mock_config.agent_preamble}\n\n{{{{call_404}}}}"
+
     def test_max_num_turns_passed_to_graph(self, mock_config, mock_graph):
         mock_config.agent_type = "react"
         mock_config.fabric_max_num_turns = 10
@@ -99,7 +128,13 @@ class TestReActGraphExecutor:
         executor._invoke_graph(mock_graph, "Test input")
 
         mock_graph.invoke.assert_called_once_with(
-            {"messages": [HumanMessage(content="Test input")], "max_num_turns": 10}
+            {
+                "messages": [HumanMessage(content="Test input")],
+                "max_num_turns": 10,
+                "max_tokens": 0,
+                "max_cost": 0,
+                "max_seconds": 0,
+            }
         )
 
     def test_max_num_turns_zero(self, mock_config, mock_graph):
@@ -110,9 +145,29 @@ class TestReActGraphExecutor:
         executor._invoke_graph(mock_graph, "Test input")
 
         mock_graph.invoke.assert_called_once_with(
-            {"messages": [HumanMessage(content="Test input")], "max_num_turns": 0}
+            {
+                "messages": [HumanMessage(content="Test input")],
+                "max_num_turns": 0,
+                "max_tokens": 0,
+                "max_cost": 0,
+                "max_seconds": 0,
+            }
         )
 
+    def test_limits_passed_to_graph(self, mock_config, mock_graph):
+        mock_config.agent_type = "react"
+        mock_config.agent_max_tokens = 50000
+        mock_config.agent_max_cost = 0.5
+        mock_config.agent_max_seconds = 300
+        executor = ReActGraphExecutor(mock_config)
+
+        executor._invoke_graph(mock_graph, "Test input")
+
+        graph_input = mock_graph.invoke.call_args.args[0]
+        assert graph_input["max_tokens"] == 50000
+        assert graph_input["max_cost"] == 0.5
+        assert graph_input["max_seconds"] == 300
+
 
 class TestGraphExecutorFactory:
     def test_create_router_executor(self, mock_config):
@@ -143,6 +198,19 @@ class TestGraphExecutorIntegration:
         executor.execute(mock_graph, "Test input")
         assert mock_config.output_file.getvalue() == f"{mock_config.agent_preamble}\n\nTest response"
 
+    def test_router_async_execution_flow(self, mock_config, mock_graph):
+        executor = RouterGraphExecutor(mock_config)
+        mock_graph.ainvoke.return_value = {
+            "messages": [
+                HumanMessage(content="Test input"),
+                AIMessage(content="Test response"),
+            ]
+        }
+
+        asyncio.run(executor.aexecute(mock_graph, "Test input"))
+        mock_graph.invoke.assert_not_called()
+        assert mock_config.output_file.getvalue() == f"{mock_config.agent_preamble}\n\nTest response"
+
     def test_react_execution_flow(self, mock_config, mock_graph):
         mock_config.agent_type = "react"
         executor = ReActGraphExecutor(mock_config)
@@ -174,9 +242,99 @@ class TestGraphExecutorIntegration:
         executor.execute(mock_graph, "Test input")
 
         # Verify max_num_turns was passed correctly
-        mock_graph.invoke.assert_called_once_with(
-            {"messages": [HumanMessage(content="Test input")], "max_num_turns": 3}
-        )
+        mock_graph.invoke.assert_called_once()
+        assert mock_graph.invoke.call_args.args[0]["max_num_turns"] == 3
 
         # Verify final output
         assert mock_config.output_file.getvalue() == f"{mock_config.agent_preamble}\n\nFinal response"
+
+
+class TestStreamingOutputWriter:
+    def test_streams_run_with_preamble(self):
+        output_file = io.StringIO()
+        writer = StreamingOutputWriter(output_file, "AI Assistant:\n\n")
+
+        writer.write_token("run-1", "Hello")
+        writer.write_token("run-1", " world")
+        assert output_file.getvalue() == "AI Assistant:\n\nHello world"
+
+        writer.finish("AI Assistant:\n\nHello world")
+        assert output_file.getvalue() == "AI Assistant:\n\nHello world"
+
+    def test_new_run_restarts_output(self):
+        output_file = io.StringIO()
+        writer = StreamingOutputWriter(output_file, "AI Assistant:\n\n")
+
+        writer.write_token("run-1", "cleaned")
+        writer.write_token("run-2", "improved")
+        # tokens of earlier run are ignored once later run started
+        writer.write_token("run-1", " text")
+        writer.write_token("run-2", " text")
+        assert output_file.getvalue() == "AI Assistant:\n\nimproved text"
+
+        writer.finish("AI Assistant:\n\nimproved text")
+        assert output_file.getvalue() == "AI Assistant:\n\nimproved text"
+
+    def test_not_seekable_output_file_is_written_once(self):
+        output_file = Mock(wraps=io.StringIO())
+        output_file.seekable.return_value = False
+        writer = StreamingOutputWriter(output_file, "")
+
+        writer.write_token("run-1", "cleaned text")
+        writer.finish("improved text")
+
+        assert [call.args[0] for call in output_file.write.call_args_list] == ["improved text"]
+        output_file.seek.assert_not_called()
+
+    def test_finish_completes_streamed_prefix(self):
+        output_file = io.StringIO()
+        writer = StreamingOutputWriter(output_file, "")
+
+        writer.write_token("run-1", "Hello")
+        writer.finish("Hello world")
+
+        assert output_file.getvalue() == "Hello world"
+
+    def test_finish_rewrites_different_output(self):
+        output_file = io.StringIO()
+        writer = StreamingOutputWriter(output_file, "")
+
+        writer.write_token("run-1", "cleaned text")
+        writer.finish("improved text")
+
+        assert output_file.getvalue() == "improved text"
+
+    def test_finish_without_streamed_tokens(self):
+        output_file = io.StringIO()
+        StreamingOutputWriter(output_file, "AI Assistant:\n\n").finish("AI Assistant:\n\nno fabric pattern")
+        assert output_file.getvalue() == "AI Assistant:\n\nno fabric pattern"
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_router_execution_streaming(mock_config, use_async):
+    fabric_llm = GenericFakeChatModel(messages=iter([AIMessage(content="cleaned text from pattern")]))
+    fabric_tools = FabricTools(fabric_llm, included_tools="clean_text")
+
+    def assistant(state: MessagesState) -> Any:
+        tool_call = {"name": "clean_text", "args": {"input": "text"}, "id": "call_1"}
+        return {"messages": [AIMessage(content="", tool_calls=[tool_call])]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("assistant", assistant)
+    builder.add_node("tools", ToolNode(fabric_tools.get_fabric_tools()))
+    builder.add_edge(START, "assistant")
+    builder.add_edge("assistant", "tools")
+    builder.add_edge("tools", END)
+
+    mock_config.output_streaming = True
+    mock_config.output_file = Mock(wraps=io.StringIO())
+    executor = RouterGraphExecutor(mock_config)
+    input_str = "INSTRUCTION:\n/fabric clean text\n\nINPUT:\ntext"
+    if use_async:
+        asyncio.run(executor.aexecute(builder.compile(), input_str))
+    else:
+        executor.execute(builder.compile(), input_str)
+
+    written = [call.args[0] for call in mock_config.output_file.write.call_args_list]
+    assert written[:3] == ["AI Assistant:\n\n", "cleaned", " "]
+    assert "".join(written) == "AI Assistant:\n\ncleaned text from pattern"
@@ -0,0 +1,91 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from fabric_agent_action.history_compaction import HistoryCompactor
+
+DIFF = "diff --git a/app.py b/app.py" + "\n+print('hello world')" * 20
+INPUT_STR = f"INSTRUCTION:\n/fabric summarize and improve\n\nGIT DIFF:\n{DIFF}"
+SUMMARY = "The change prints hello world many times. " * 10
+
+
+def create_tool_call(name: str, input: str, id: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": name, "args": {"input": input}, "id": id}])
+
+
+def create_history() -> list:
+    return [
+        HumanMessage(content=INPUT_STR, id="input"),
+        create_tool_call("summarize_git_diff", DIFF, "call_1"),
+        ToolMessage(content=SUMMARY, tool_call_id="call_1", name="summarize_git_diff"),
+        create_tool_call("improve_writing", SUMMARY, "call_2"),
+        ToolMessage(content="Improved summary", tool_call_id="call_2", name="improve_writing"),
+    ]
+
+
+def test_compact_consumed_tool_output():
+    messages = create_history()
+
+    compacted, saved = HistoryCompactor().compact(messages)
+
+    assert compacted[2].content == "[output passed to tool call call_2, 105 tokens elided]"
+    assert compacted[2].tool_call_id == "call_1"
+    # last output is not consumed, arguments are kept without input references
+    assert compacted[4] == messages[4]
+    assert compacted[1] == messages[1] and compacted[3] == messages[3]
+    assert saved == 105 - 14
+    assert messages[2].content == SUMMARY
+
+
+def test_compact_tool_output_consumed_by_reference():
+    messages = create_history()
+    messages[3] = create_tool_call("improve_writing", "{{call_1}}", "call_2")
+
+    compacted, _ = HistoryCompactor(input_references=True).compact(messages)
+
+    assert compacted[2].content.startswith("[output passed to tool call call_2")
+
+
+def test_compact_keeps_tool_output_quoted_in_part_of_argument():
+    messages = create_history()
+    messages[3] = create_tool_call("improve_writing", f"Title: Hello\n\n{SUMMARY}", "call_2")
+
+    compacted, saved = HistoryCompactor().compact(messages)
+
+    assert compacted == messages
+    assert saved == 0
+
+
+def test_compact_arguments_with_input_references():
+    messages = create_history()
+
+    compacted, saved = HistoryCompactor(input_references=True).compact(messages)
+
+    assert compacted[1].tool_calls[0]["args"] == {"input": "{{GIT DIFF}}"}
+    assert compacted[1].tool_calls[0]["id"] == "call_1"
+    assert compacted[3].tool_calls[0]["args"] == {"input": "{{call_1}}"}
+    assert saved > 200
+    assert messages[1].tool_calls[0]["args"] == {"input": DIFF}
+
+
+def test_compact_keeps_short_texts():
+    messages = [
+        HumanMessage(content="INSTRUCTION:\n/fabric clean and improve\n\nINPUT:\nsome text\n"),
+        create_tool_call("clean_text", "some text", "call_1"),
+        ToolMessage(content="clean text", tool_call_id="call_1", name="clean_text"),
+        create_tool_call("improve_writing", "clean text", "call_2"),
+    ]
+
+    compacted, saved = HistoryCompactor(input_references=True).compact(messages)
+
+    assert compacted == messages
+    assert saved == 0
+
+
+def test_compact_is_stable_between_turns():
+    messages = create_history()
+    compactor = HistoryCompactor(input_references=True)
+
+    compacted, _ = compactor.compact(messages)
+    next_compacted, _ = compactor.compact(messages + [create_tool_call("translate", "{{call_2}}", "call_3")])
+
+    # history prefix sent in previous turn stays the same
+    assert next_compacted[: len(compacted)] == compacted
@@ -0,0 +1,74 @@
+import asyncio
+
+import httpx
+
+from fabric_agent_action.http_clients import OPENAI_API_BASE, HTTPClientPool, HTTPClients
+
+
+def test_clients_keyed_by_provider_base_url_key_and_model():
+    pool = HTTPClientPool()
+    clients = pool.get_clients("openai", None, "key-1", "gpt-4o")
+    other_model = pool.get_clients("openai", None, "key-1", "gpt-4")
+
+    assert pool.get_clients("openai", OPENAI_API_BASE, "key-1", "gpt-4o") is clients
+    assert other_model is not clients
+    assert other_model.async_client._transport is clients.async_client._transport
+    assert pool.get_clients("openai", None, "key-2", "gpt-4o").async_client._transport is not (
+        clients.async_client._transport
+    )
+    assert pool.get_clients("openrouter", "https://openrouter.ai/api/v1", "key-1", "gpt-4o") is not clients
+    asyncio.run(pool.aclose())
+
+
+def test_response_hook_gets_model_of_client():
+    responses = []
+    pool = HTTPClientPool(response_hook=lambda provider, model, response: responses.append((provider, model)))
+    clients = pool.get_clients("openai", None, "key", "gpt-4o")
+
+    clients.client.event_hooks["response"][0](httpx.Response(200))
+
+    assert responses == [("openai", "gpt-4o")]
+    asyncio.run(pool.aclose())
+
+
+def test_api_key_not_kept_in_key():
+    assert "secret" not in repr(HTTPClientPool().get_key("openai", None, "secret"))
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr("fabric_agent_action.http_clients.is_http2_available", lambda: False)
+    assert HTTPClientPool(http2=True).http2 is False
+
+
+def test_warm_up_opens_connection_of_each_client():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(404)
+
+    pool = HTTPClientPool()
+    key = pool.get_key("openai", None, "key")
+    pool._clients[(key, "gpt-4o")] = HTTPClients(
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    asyncio.run(pool.awarm_up())
+
+    assert [(r.method, str(r.url)) for r in requests] == [("HEAD", OPENAI_API_BASE)]
+    asyncio.run(pool.aclose())
+
+
+def test_warm_up_failure_is_ignored():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    pool = HTTPClientPool()
+    pool._clients[(pool.get_key("openai", None, "key"), "gpt-4o")] = HTTPClients(
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+    asyncio.run(pool.awarm_up())
+    asyncio.run(pool.aclose())
@@ -0,0 +1,100 @@
+import pytest
+
+from fabric_agent_action.inputs import InputReferenceResolver, InputSections, parse_reference
+
+ISSUE_INPUT = """INSTRUCTION:
+/fabric improve writing of cleaned text
+
+GITHUB ISSUE, NR: 10, AUTHOR: xvnpw, TITLE: Text improvements
+Gives LLM bigger chunk of text.
+
+Second paragraph.
+
+ISSUE COMMENT, ID: 111, AUTHOR: xvnpw
+/fabric clean text
+
+ISSUE COMMENT, ID: 222, AUTHOR: github-actions[bot]
+Cleaned text.
+"""
+
+PR_INPUT = """INSTRUCTION:
+/fabric write pull request
+
+GITHUB PULL REQUEST, NR: 8, AUTHOR: xvnpw, TITLE: Docs
+PR description
+
+GIT DIFF:
+diff --git a/README.md b/README.md
+-old
++new
+
+PULL REQUEST COMMENT, ID: 333, AUYTHOR: pedro
+looks good
+"""
+
+
+def test_parse_issue_sections():
+    sections = InputSections.parse(ISSUE_INPUT)
+
+    assert [s.name for s in sections.sections] == ["INSTRUCTION", "GITHUB ISSUE", "ISSUE COMMENT", "ISSUE COMMENT"]
+    assert sections.instruction == "/fabric improve writing of cleaned text"
+    assert sections.get("GITHUB ISSUE").content == "Gives LLM bigger chunk of text.\n\nSecond paragraph."
+    assert [c.id for c in sections.comments] == ["111", "222"]
+    assert sections.get_comment("222").author == "github-actions[bot]"
+
+
+def test_parse_pr_sections():
+    sections = InputSections.parse(PR_INPUT)
+
+    assert sections.get("GIT DIFF").content == "diff --git a/README.md b/README.md\n-old\n+new"
+    assert sections.get_comment("333").content == "looks good"
+
+
+def test_content():
+    assert InputSections.parse("INSTRUCTION:\n/fabric clean text\n\nINPUT:\nsome text\n").content == "some text"
+    assert InputSections.parse(ISSUE_INPUT).content == "Gives LLM bigger chunk of text.\n\nSecond paragraph."
+    assert InputSections.parse(PR_INPUT).content == (
+        "GITHUB PULL REQUEST, NR: 8, AUTHOR: xvnpw, TITLE: Docs\nPR description\n\n"
+        "GIT DIFF:\ndiff --git a/README.md b/README.md\n-old\n+new"
+    )
+    assert InputSections.parse("INSTRUCTION:\n/fabric clean text\n").content is None
+
+
+def test_parse_without_sections():
+    sections = InputSections.parse("just some text")
+    assert sections.sections == []
+    assert sections.instruction == ""
+    assert sections.preamble == "just some text"
+    assert InputSections.parse("INSTRUCTION:\n/fabric clean text\n").preamble == ""
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("{{GIT DIFF}}", "diff --git a/README.md b/README.md\n-old\n+new"),
+        ("{{GITHUB PULL REQUEST}}", "PR description"),
+        ("{{COMMENT 333}}", "PULL REQUEST COMMENT, ID: 333, AUYTHOR: pedro\nlooks good"),
+        ("{{COMMENTS}}", "PULL REQUEST COMMENT, ID: 333, AUYTHOR: pedro\nlooks good"),
+        ("{{call_1}}", "previous output"),
+        ("Title: {{INSTRUCTION}}", "Title: /fabric write pull request"),
+        ("{{GITHUB ISSUE}}", "{{GITHUB ISSUE}}"),
+        ("no references", "no references"),
+    ],
+)
+def test_resolve_references(value, expected):
+    resolver = InputReferenceResolver(InputSections.parse(PR_INPUT), {"call_1": "previous output"})
+    assert resolver.resolve(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("{{call_1}}", "call_1"),
+        (" {{ call_1 }}\n", "call_1"),
+        ("result: {{call_1}}", None),
+        ("{{call_1}} {{call_2}}", None),
+        ("plain text", None),
+    ],
+)
+def test_parse_reference(value, expected):
+    assert parse_reference(value) == expected
@@ -1,3 +1,4 @@
+import httpx
 import pytest
 import os
 from unittest.mock import patch
@@ -5,7 +6,9 @@ from dataclasses import dataclass
 from langchain_anthropic import ChatAnthropic
 from langchain_openai import ChatOpenAI
 
-from fabric_agent_action.llms import LLMProvider, LLMConfig, ProviderType, constants
+from fabric_agent_action.deadline import DeadlineChatModel
+from fabric_agent_action.failover import FailoverChatModel
+from fabric_agent_action.llms import LLMProvider, LLMConfig, ProviderType, constants, parse_fallbacks
 
 
 @dataclass
@@ -14,9 +17,18 @@ class TestConfig:
     agent_provider: ProviderType = "openai"
     agent_model: str = "gpt-4"
     agent_temperature: float = 0.7
+    agent_fallbacks: str = ""
     fabric_provider: ProviderType = "anthropic"
     fabric_model: str = "claude-3"
     fabric_temperature: float = 0.5
+    fabric_fallbacks: str = ""
+    fabric_max_retries: int = 0
+    llm_http2: bool = False
+    llm_requests_per_minute: int = 0
+    llm_tokens_per_minute: int = 0
+    deadline: float = 0
+    deadline_threshold: float = 60
+    deadline_fallback: str = ""
 
 
 @pytest.fixture
@@ -108,6 +120,116 @@ def test_create_fabric_llm(mock_env, llm_provider):
     assert llm.use_system_message is True
 
 
+def test_fabric_llm_client_retries_disabled_when_policy_retries(mock_env):
+    llm_provider = LLMProvider(TestConfig(fabric_max_retries=2, fabric_fallbacks="openai:gpt-4o"))
+
+    llm = llm_provider.createFabricLLM()
+
+    assert [model.max_retries for model in llm.llm.models] == [0, 0]
+    assert llm_provider.createAgentLLM().llm.max_retries == 2
+
+
+def test_llm_instance_reused(mock_env, llm_provider):
+    config = LLMConfig(provider="openai", model="gpt-4", temperature=0.7)
+    assert llm_provider._get_llm_instance(config) is llm_provider._get_llm_instance(config)
+
+
+def test_llms_share_http_connections(mock_env, llm_provider):
+    gpt4 = llm_provider._get_llm_instance(LLMConfig(provider="openai", model="gpt-4", temperature=0.7))
+    gpt4o = llm_provider._get_llm_instance(LLMConfig(provider="openai", model="gpt-4o", temperature=0))
+    openrouter = llm_provider._get_llm_instance(LLMConfig(provider="openrouter", model="gpt-4o", temperature=0))
+
+    assert gpt4.llm.http_async_client._transport is gpt4o.llm.http_async_client._transport
+    assert gpt4.llm.root_async_client._client._transport is gpt4o.llm.root_async_client._client._transport
+    assert gpt4.llm.http_async_client._transport is not openrouter.llm.http_async_client._transport
+
+
+def test_rate_limiter_shared_by_provider_model(mock_env, llm_provider):
+    agent_llm = llm_provider._get_llm_instance(LLMConfig(provider="openai", model="gpt-4o", temperature=0))
+    fabric_llm = llm_provider._get_llm_instance(LLMConfig(provider="openai", model="gpt-4o", temperature=0.5))
+    other_llm = llm_provider._get_llm_instance(LLMConfig(provider="anthropic", model="gpt-4o", temperature=0))
+
+    assert agent_llm.llm.rate_limiter is fabric_llm.llm.rate_limiter
+    assert agent_llm.llm.rate_limiter is llm_provider.get_rate_limiter("openai", "gpt-4o")
+    assert other_llm.llm.rate_limiter is not agent_llm.llm.rate_limiter
+
+
+def test_rate_limit_headers_update_rate_limiter(mock_env, llm_provider):
+    llm = llm_provider._get_llm_instance(LLMConfig(provider="openai", model="gpt-4o", temperature=0)).llm
+    response_hook = llm.http_client.event_hooks["response"][0]
+
+    response_hook(httpx.Response(200, headers={"x-ratelimit-limit-requests": "500"}))
+
+    assert llm_provider.get_rate_limiter("openai", "gpt-4o").requests.capacity == 500
+
+
+def test_parse_fallbacks():
+    assert parse_fallbacks("anthropic:claude-3, openrouter:openai/gpt-4o,", 0.2) == [
+        LLMConfig(provider="anthropic", model="claude-3", temperature=0.2),
+        LLMConfig(provider="openrouter", model="openai/gpt-4o", temperature=0.2),
+    ]
+    assert parse_fallbacks("", 0) == []
+
+
+@pytest.mark.parametrize(
+    "fallbacks,error",
+    [("gpt-4o", "expected provider:model"), ("openai:", "expected provider:model"), ("azure:gpt-4o", "azure")],
+)
+def test_parse_fallbacks_invalid(fallbacks, error):
+    with pytest.raises(ValueError, match=error):
+        parse_fallbacks(fallbacks, 0)
+
+
+def test_create_agent_llm_with_fallbacks(mock_env):
+    llm_provider = LLMProvider(TestConfig(agent_fallbacks="anthropic:claude-3,openai:o1-preview"))
+
+    llm = llm_provider.createAgentLLM()
+
+    assert isinstance(llm.llm, FailoverChatModel)
+    assert [type(model) for model in llm.llm.models] == [ChatOpenAI, ChatAnthropic, ChatOpenAI]
+    assert llm.llm.failover.names == ["openai:gpt-4", "anthropic:claude-3", "openai:o1-preview"]
+    assert llm.llm.failover.breakers[0] is llm.llm.failover.breakers[2]
+    assert llm.llm.failover.breakers[1] is llm_provider.get_circuit_breaker("anthropic")
+    assert llm.use_system_message is False
+    assert llm.max_number_of_tools == 256
+    assert llm_provider.createAgentLLM() is llm
+
+
+def test_fallback_llms_share_circuit_breakers(mock_env):
+    llm_provider = LLMProvider(TestConfig(agent_fallbacks="anthropic:claude-3", fabric_fallbacks="openai:gpt-4o"))
+
+    agent_llm = llm_provider.createAgentLLM()
+    fabric_llm = llm_provider.createFabricLLM()
+
+    assert isinstance(agent_llm.llm, FailoverChatModel) and isinstance(fabric_llm.llm, FailoverChatModel)
+    assert agent_llm.llm.failover.breakers == list(reversed(fabric_llm.llm.failover.breakers))
+
+
+def test_create_llm_with_deadline(mock_env):
+    llm_provider = LLMProvider(TestConfig(deadline=600, deadline_fallback="openai:o1-preview"))
+
+    llm = llm_provider.createFabricLLM()
+
+    assert isinstance(llm.llm, DeadlineChatModel)
+    assert llm.llm.model is llm_provider.createFabricLLM().llm.model
+    assert isinstance(llm.llm.model, ChatAnthropic)
+    assert llm.llm.fallback.model_name == "o1-preview"
+    assert llm.llm.fallback.temperature == 0.5
+    assert llm.llm.deadline is llm_provider.deadline
+    assert llm.use_system_message is False
+
+
+def test_create_llm_without_deadline(mock_env):
+    llm_provider = LLMProvider(TestConfig(deadline_fallback="openai:o1-preview"))
+
+    assert llm_provider.deadline.expires_at is None
+    assert not isinstance(llm_provider.createAgentLLM().llm, DeadlineChatModel)
+
+
+def test_get_fabric_llm_config(llm_provider):
+    assert llm_provider.getFabricLLMConfig() == LLMConfig(provider="anthropic", model="claude-3", temperature=0.5)
+
+
 @pytest.mark.parametrize(
     "provider,model,expected_tools,expected_system_message",
     [
@@ -0,0 +1,101 @@
+import hashlib
+import os
+
+import pytest
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+
+from fabric_agent_action import fabric_tools as fabric_tools_module
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.patterns_bundle import (
+    PATTERNS_BUNDLE_CHECK_ENV,
+    PATTERNS_FOLDER,
+    PatternsBundle,
+    build_bundle,
+    get_patterns_bundle,
+    is_bundle_stale,
+)
+
+
+@pytest.fixture
+def patterns_folder(tmp_path):
+    folder = tmp_path / "fabric_patterns"
+    for name, content in [("clean_text", "# IDENTITY\nclean ✨\r\n"), ("improve_writing", "# IDENTITY\nimprove\n")]:
+        (folder / name).mkdir(parents=True)
+        (folder / name / "system.md").write_bytes(content.encode("utf-8"))
+    (folder / "no_system_md").mkdir()
+    return folder
+
+
+def test_build_and_read_bundle(patterns_folder, tmp_path):
+    bundle_file = tmp_path / "fabric_patterns.bundle"
+
+    assert build_bundle(patterns_folder, bundle_file) == 2
+
+    bundle = PatternsBundle(bundle_file)
+    assert bundle.names() == ["clean_text", "improve_writing"]
+    assert "clean_text" in bundle
+    assert "no_system_md" not in bundle
+    assert bundle.read("clean_text") == "# IDENTITY\nclean ✨\n"
+    assert bundle.read("improve_writing") == "# IDENTITY\nimprove\n"
+    assert bundle.get_hash("improve_writing") == hashlib.sha256(b"# IDENTITY\nimprove\n").hexdigest()
+
+
+def test_invalid_bundle(tmp_path):
+    bundle_file = tmp_path / "invalid.bundle"
+    bundle_file.write_bytes(b"not a bundle file")
+
+    with pytest.raises(ValueError, match="Invalid fabric patterns bundle"):
+        PatternsBundle(bundle_file)
+
+
+def test_fabric_tools_reads_from_bundle(tmp_path, monkeypatch):
+    bundle_file = tmp_path / "fabric_patterns.bundle"
+    build_bundle(PATTERNS_FOLDER, bundle_file)
+    bundle = PatternsBundle(bundle_file)
+    monkeypatch.setattr(fabric_tools_module, "get_patterns_bundle", lambda: bundle)
+
+    fabric_tools = FabricTools(ParrotFakeChatModel())
+    pattern = fabric_tools.read_fabric_pattern("write_pull-request")
+
+    assert pattern == (PATTERNS_FOLDER / "write_pull-request" / "system.md").read_text(encoding="utf-8")
+    assert fabric_tools.get_pattern_hash("write_pull-request") == hashlib.sha256(pattern.encode("utf-8")).hexdigest()
+    with pytest.raises(OSError):
+        fabric_tools.read_fabric_pattern("not_exists")
+
+
+def test_get_patterns_bundle(patterns_folder, tmp_path):
+    bundle_file = tmp_path / "fabric_patterns.bundle"
+    build_bundle(patterns_folder, bundle_file)
+
+    assert get_patterns_bundle.__wrapped__(bundle_file, patterns_folder) is not None
+    assert get_patterns_bundle.__wrapped__(tmp_path / "not_built.bundle", patterns_folder) is None
+
+
+def test_stale_bundle_is_not_used(patterns_folder, tmp_path, monkeypatch):
+    bundle_file = tmp_path / "fabric_patterns.bundle"
+    build_bundle(patterns_folder, bundle_file)
+    bundle = PatternsBundle(bundle_file)
+    assert not is_bundle_stale(bundle, bundle_file, patterns_folder)
+
+    # edited pattern
+    system_file = patterns_folder / "clean_text" / "system.md"
+    built_at = bundle_file.stat().st_mtime
+    system_file.write_text("# IDENTITY\nedited\n", encoding="utf-8")
+    os.utime(system_file, (built_at + 10, built_at + 10))
+    assert is_bundle_stale(bundle, bundle_file, patterns_folder)
+    assert get_patterns_bundle.__wrapped__(bundle_file, patterns_folder, check_stale=True) is None
+
+    # added pattern
+    build_bundle(patterns_folder, bundle_file)
+    (patterns_folder / "no_system_md" / "system.md").write_text("# IDENTITY\nnew\n", encoding="utf-8")
+    os.utime(patterns_folder / "no_system_md" / "system.md", (built_at, built_at))
+    assert is_bundle_stale(PatternsBundle(bundle_file), bundle_file, patterns_folder)
+
+    # packaged bundle is trusted at runtime, unless check is enabled
+    monkeypatch.delenv(PATTERNS_BUNDLE_CHECK_ENV, raising=False)
+    assert get_patterns_bundle.__wrapped__(bundle_file, patterns_folder) is not None
+    monkeypatch.setenv(PATTERNS_BUNDLE_CHECK_ENV, "1")
+    assert get_patterns_bundle.__wrapped__(bundle_file, patterns_folder) is None
+
+    # bundle without pattern sources, e.g. only the bundle is shipped
+    assert not is_bundle_stale(bundle, bundle_file, tmp_path / "no_patterns")
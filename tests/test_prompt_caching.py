@@ -0,0 +1,185 @@
+from unittest.mock import patch
+
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_openai import ChatOpenAI
+
+from fabric_agent_action.deadline import Deadline, DeadlineChatModel
+from fabric_agent_action.failover import CircuitBreaker, Failover, FailoverChatModel
+from fabric_agent_action.prompt_caching import (
+    CACHE_CONTROL,
+    TokenUsage,
+    TokenUsageHandler,
+    add_cache_breakpoint,
+    add_cache_breakpoints,
+    bind_tools,
+    create_prompt_message,
+)
+
+
+def clean_text(input: str) -> str:
+    """Clean text"""
+    return input
+
+
+def summarize(input: str) -> str:
+    """Summarize text"""
+    return input
+
+
+TOOL_SCHEMAS = [convert_to_openai_tool(clean_text), convert_to_openai_tool(summarize)]
+
+
+def create_anthropic() -> ChatAnthropic:
+    return ChatAnthropic(model="claude-3-5-sonnet-20240620", anthropic_api_key="test-key")
+
+
+def create_openai() -> ChatOpenAI:
+    return ChatOpenAI(model="gpt-4o", openai_api_key="test-key")
+
+
+def test_prompt_message_without_cache_control():
+    message = create_prompt_message(create_openai(), "prompt")
+
+    assert message == SystemMessage(content="prompt")
+    assert create_prompt_message(create_openai(), "prompt", use_system_message=False) == HumanMessage(content="prompt")
+
+
+def test_prompt_message_with_cache_control():
+    llm = create_anthropic()
+
+    payload = llm._get_request_payload([create_prompt_message(llm, "prompt"), HumanMessage(content="input")])
+
+    assert payload["system"] == [{"type": "text", "text": "prompt", "cache_control": CACHE_CONTROL}]
+    assert payload["messages"] == [{"role": "user", "content": "input"}]
+
+
+def test_prompt_message_with_cache_control_as_human_message():
+    llm = create_anthropic()
+
+    payload = llm._get_request_payload(
+        [create_prompt_message(llm, "prompt", use_system_message=False), HumanMessage(content="input")]
+    )
+
+    assert "system" not in payload
+    assert payload["messages"][0]["content"][0] == {"type": "text", "text": "prompt", "cache_control": CACHE_CONTROL}
+
+
+def test_bind_tools_without_cache_control():
+    bound = bind_tools(create_openai(), TOOL_SCHEMAS, cache_messages=True)
+
+    assert bound.kwargs == {"tools": TOOL_SCHEMAS}
+
+
+def test_bind_tools_caches_tool_definitions():
+    bound = bind_tools(create_anthropic(), TOOL_SCHEMAS).last
+
+    tools = bound.kwargs["tools"]
+    assert [tool["name"] for tool in tools] == ["clean_text", "summarize"]
+    assert "cache_control" not in tools[0]
+    assert tools[-1]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in bound.kwargs
+
+
+def test_bind_tools_caches_messages():
+    llm = create_anthropic()
+    bound = bind_tools(llm, TOOL_SCHEMAS, cache_messages=True)
+    messages = [
+        create_prompt_message(llm, "prompt"),
+        HumanMessage(content="input"),
+        AIMessage(content="", tool_calls=[{"name": "clean_text", "args": {"input": "x"}, "id": "call_1"}]),
+        ToolMessage(content="cleaned", tool_call_id="call_1"),
+    ]
+
+    binding = bound.last
+    payload = binding.bound._get_request_payload(bound.first.invoke(messages), **binding.kwargs)
+
+    assert payload["tools"][-1]["cache_control"] == CACHE_CONTROL
+    assert payload["system"][0]["cache_control"] == CACHE_CONTROL
+    assert payload["messages"][-1]["content"][-1]["type"] == "tool_result"
+    assert payload["messages"][-1]["content"][-1]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in payload
+    assert "cache_control" not in binding.kwargs
+
+
+def test_add_cache_breakpoint():
+    messages = [HumanMessage(content="input"), AIMessage(content=[{"type": "text", "text": "output"}])]
+
+    cached = add_cache_breakpoint(messages)
+
+    assert cached[0] is messages[0]
+    assert cached[1].content == [{"type": "text", "text": "output", "cache_control": CACHE_CONTROL}]
+    assert messages[1].content == [{"type": "text", "text": "output"}]
+    assert add_cache_breakpoint([HumanMessage(content="input")])[0].content == [
+        {"type": "text", "text": "input", "cache_control": CACHE_CONTROL}
+    ]
+
+
+def test_failover_model_sets_breakpoints_for_anthropic_models():
+    anthropic_llm = create_anthropic()
+    model = FailoverChatModel(
+        models=[create_openai(), anthropic_llm],
+        failover=Failover(["openai", "anthropic"], [CircuitBreaker("openai"), CircuitBreaker("anthropic")]),
+    )
+    messages = [create_prompt_message(model, "prompt"), HumanMessage(content="input")]
+
+    # caller creates plain prompt, as wrapper can delegate to other providers
+    assert messages[0] == SystemMessage(content="prompt")
+    assert add_cache_breakpoints(model, messages) is messages
+    payload = anthropic_llm._get_request_payload(add_cache_breakpoints(anthropic_llm, messages))
+    assert payload["system"] == [{"type": "text", "text": "prompt", "cache_control": CACHE_CONTROL}]
+
+    sent = []
+
+    def generate(self, messages, *args, **kwargs):
+        sent.append(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="output"))])
+
+    with patch.object(ChatAnthropic, "_generate", generate):
+        FailoverChatModel(models=[anthropic_llm], failover=Failover(["a"], [CircuitBreaker("a")])).invoke(messages)
+    assert sent[0][0].content == [{"type": "text", "text": "prompt", "cache_control": CACHE_CONTROL}]
+
+    bound = bind_tools(model, TOOL_SCHEMAS, cache_messages=True)
+    openai_bound, anthropic_bound = bound.runnables
+    assert openai_bound.kwargs == {"tools": TOOL_SCHEMAS}
+    assert anthropic_bound.last.kwargs["tools"][-1]["cache_control"] == CACHE_CONTROL
+    cached = anthropic_bound.first.invoke(messages)
+    assert cached[0].content[-1]["cache_control"] == CACHE_CONTROL
+    assert cached[-1].content[-1]["cache_control"] == CACHE_CONTROL
+
+
+def test_deadline_model_sets_breakpoints_for_anthropic_models():
+    model = DeadlineChatModel(
+        model=create_anthropic(), fallback=create_openai(), deadline=Deadline(600, threshold=0)
+    )
+    messages = [create_prompt_message(model, "prompt"), HumanMessage(content="input")]
+
+    bound = bind_tools(model, TOOL_SCHEMAS, cache_messages=True)
+    assert bound.runnable.last.kwargs["tools"][-1]["cache_control"] == CACHE_CONTROL
+    assert bound.runnable.first.invoke(messages)[0].content[-1]["cache_control"] == CACHE_CONTROL
+    assert bound.fallback.kwargs == {"tools": TOOL_SCHEMAS}
+
+    structured = model.with_structured_output(TOOL_SCHEMAS[0])
+    assert structured.runnable.first.invoke(messages)[0].content[-1]["cache_control"] == CACHE_CONTROL
+
+
+def test_token_usage_handler():
+    handler = TokenUsageHandler()
+    message = AIMessage(
+        content="output",
+        usage_metadata={
+            "input_tokens": 1500,
+            "output_tokens": 10,
+            "total_tokens": 1510,
+            "input_token_details": {"cache_read": 1200, "cache_creation": 0},
+        },
+    )
+
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+    handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage(content="no usage"))]]))
+
+    assert handler.get_usage() == TokenUsage(
+        calls=1, input_tokens=1500, output_tokens=10, cache_read_tokens=1200, cache_creation_tokens=0
+    )
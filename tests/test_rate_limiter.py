@@ -0,0 +1,164 @@
+import asyncio
+import time
+import uuid
+from typing import Any
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult, LLMResult
+
+from fabric_agent_action.rate_limiter import RateLimiter, RateLimiterUsageHandler, TokenBucket, parse_duration
+
+
+@pytest.mark.parametrize(
+    "value,seconds",
+    [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m3.5s", 3723.5), ("2.5", 2.5), ("soon", None), ("", None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_token_bucket_refills_per_minute():
+    bucket = TokenBucket(60)
+    now = time.monotonic()
+    bucket.consume(60, now)
+
+    assert bucket.get_wait_time(1, now) == pytest.approx(1.0, abs=0.01)
+    assert bucket.get_wait_time(1, now + 1.0) == 0.0
+
+
+def test_unlimited_token_bucket():
+    bucket = TokenBucket(0)
+    bucket.consume(1000, time.monotonic())
+    assert bucket.get_wait_time(1, time.monotonic()) == 0.0
+
+
+def test_acquire_without_blocking_respects_requests_per_minute():
+    limiter = RateLimiter(requests_per_minute=2)
+
+    assert limiter.acquire(blocking=False)
+    assert limiter.acquire(blocking=False)
+    assert not limiter.acquire(blocking=False)
+
+
+def test_tokens_debt_blocks_requests():
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.record_usage(610)
+
+    assert not limiter.acquire(blocking=False)
+    assert limiter._try_acquire() == pytest.approx(1.0, abs=0.1)
+
+
+def test_aacquire_waits():
+    limiter = RateLimiter(requests_per_minute=600)
+    limiter.requests.level = 0
+
+    assert not asyncio.run(limiter.aacquire(blocking=False))
+    assert asyncio.run(limiter.aacquire())
+
+
+def test_headers_lower_limits():
+    limiter = RateLimiter(requests_per_minute=1000)
+    headers = {
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "10",
+        "x-ratelimit-limit-tokens": "30000",
+    }
+    limiter.update_from_headers(headers, 200)
+
+    assert limiter.requests.capacity == 500
+    assert limiter.requests.level == pytest.approx(10, abs=0.1)
+    assert limiter.tokens.capacity == 30000
+
+
+def test_headers_pause_until_reset_when_nothing_remains():
+    limiter = RateLimiter()
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "0", "x-ratelimit-reset-tokens": "6m0s"}, 200)
+    assert not limiter.acquire(blocking=False)
+
+
+def test_retry_after_pauses_requests():
+    limiter = RateLimiter()
+    limiter.update_from_headers({"retry-after-ms": "20"}, 429)
+
+    assert not limiter.acquire(blocking=False)
+    assert asyncio.run(limiter.aacquire())
+
+
+def test_retry_after_ignored_without_429():
+    limiter = RateLimiter()
+    limiter.update_from_headers({"retry-after": "60"}, 200)
+    assert limiter.acquire(blocking=False)
+
+
+def test_usage_handler_records_total_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    message = AIMessage(content="x", usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": 150})
+
+    RateLimiterUsageHandler(limiter).on_llm_end(
+        LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=uuid.uuid4()
+    )
+
+    assert limiter.tokens.level == pytest.approx(850, abs=1)
+
+
+class HeadersChatModel(BaseChatModel):
+    """Chat model whose requests report remaining tokens in response headers, like HTTP client hook"""
+
+    limiter: Any
+    remaining_tokens: list[int]
+
+    @property
+    def _llm_type(self) -> str:
+        return "headers"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.remaining_tokens:
+            headers = {"x-ratelimit-remaining-tokens": str(self.remaining_tokens.pop(0))}
+            self.limiter.update_from_headers(headers, 200)
+        usage = {"input_tokens": 100, "output_tokens": 50, "total_tokens": 150}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="x", usage_metadata=usage))])
+
+
+def test_usage_not_counted_when_headers_reported_remaining_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    llm = HeadersChatModel(limiter=limiter, remaining_tokens=[850], callbacks=[RateLimiterUsageHandler(limiter)])
+
+    llm.invoke("test")
+    assert limiter.tokens.level == pytest.approx(850, abs=1)
+
+    # response without headers is counted from usage
+    llm.invoke("test")
+    assert limiter.tokens.level == pytest.approx(700, abs=1)
+
+
+def test_async_usage_not_counted_when_headers_reported_remaining_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    llm = HeadersChatModel(limiter=limiter, remaining_tokens=[850], callbacks=[RateLimiterUsageHandler(limiter)])
+
+    async def run() -> None:
+        await asyncio.gather(llm.ainvoke("test"), llm.ainvoke("test"))
+
+    asyncio.run(run())
+
+    # one response synchronized from headers, the other counted from usage
+    assert limiter.tokens.level == pytest.approx(700, abs=1)
+    assert not limiter._synced_runs
+
+
+def test_synced_run_without_usage_does_not_skip_other_runs():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    handler = RateLimiterUsageHandler(limiter)
+    message = AIMessage(content="x", usage_metadata={"input_tokens": 100, "output_tokens": 50, "total_tokens": 150})
+    result = LLMResult(generations=[[ChatGeneration(message=message)]])
+    cancelled_run_id = uuid.uuid4()
+
+    # e.g. losing hedged call cancelled after its response headers arrived
+    handler.on_chat_model_start({}, [], run_id=cancelled_run_id)
+    limiter.update_from_headers({"x-ratelimit-remaining-tokens": "850"}, 200)
+    handler.on_llm_end(result, run_id=uuid.uuid4())
+    assert limiter.tokens.level == pytest.approx(700, abs=1)
+
+    handler.on_llm_error(asyncio.CancelledError(), run_id=cancelled_run_id)
+    assert not limiter._synced_runs
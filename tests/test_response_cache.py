@@ -0,0 +1,122 @@
+import time
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.failover import CircuitBreaker, Failover, FailoverChatModel
+from fabric_agent_action.llms import LLMConfig
+from fabric_agent_action.response_cache import RESPONSE_CACHE_FILE_NAME, CacheStats, ResponseCache
+
+LLM_CONFIG = LLMConfig(provider="openai", model="gpt-4o", temperature=0)
+
+
+class FailingChatModel(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "failing"
+
+    def _generate(self, *args, **kwargs):
+        raise TimeoutError("provider down")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path, LLM_CONFIG, ttl=3600, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_get_and_put(cache):
+    assert cache.get("pattern", "input") is None
+
+    cache.put("pattern", "input", "response")
+
+    assert cache.get("pattern", "input") == "response"
+    assert cache.get("other_pattern", "input") is None
+    assert cache.get("pattern", "other input") is None
+    stats = cache.get_stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 3, 1)
+
+
+def test_key_includes_llm_config(tmp_path, cache):
+    cache.put("pattern", "input", "response")
+
+    other_cache = ResponseCache(tmp_path, LLMConfig(provider="openai", model="gpt-4o", temperature=0.5), 3600, 2)
+    assert other_cache.get("pattern", "input") is None
+    other_cache.close()
+
+
+def test_persisted_between_instances(tmp_path, cache):
+    cache.put("pattern", "input", "response")
+    cache.close()
+
+    reopened = ResponseCache(tmp_path, LLM_CONFIG, ttl=3600, max_entries=2)
+    assert reopened.get("pattern", "input") == "response"
+    reopened.close()
+
+
+def test_ttl(cache):
+    with patch("fabric_agent_action.response_cache.time.time", return_value=1000.0):
+        cache.put("pattern", "input", "response")
+    with patch("fabric_agent_action.response_cache.time.time", return_value=1000.0 + 3601):
+        assert cache.get("pattern", "input") is None
+
+
+def test_lru_eviction(cache):
+    now = time.time()
+    with patch("fabric_agent_action.response_cache.time.time", side_effect=[now - 3, now - 2, now - 1, now]):
+        cache.put("pattern", "a", "A")
+        cache.put("pattern", "b", "B")
+        assert cache.get("pattern", "a") == "A"
+        cache.put("pattern", "c", "C")
+
+    assert cache.get("pattern", "b") is None
+    assert cache.get("pattern", "a") == "A"
+    assert cache.get("pattern", "c") == "C"
+
+
+def test_invoke_llm_uses_cache(cache):
+    llm = ParrotFakeChatModel()
+    fabric_tools = FabricTools(llm, response_cache=cache)
+
+    first = fabric_tools.invoke_llm("create quiz for me about hammer", "create_quiz")
+    with patch.object(ParrotFakeChatModel, "invoke", side_effect=AssertionError("LLM called")):
+        second = fabric_tools.invoke_llm("create quiz for me about hammer", "create_quiz")
+
+    assert second == first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fallback_response_not_cached(cache):
+    llm = FailoverChatModel(
+        models=[FailingChatModel(), ParrotFakeChatModel()],
+        failover=Failover(["a", "b"], [CircuitBreaker("a"), CircuitBreaker("b")]),
+    )
+    fabric_tools = FabricTools(llm, response_cache=cache)
+
+    fabric_tools.invoke_llm("create quiz for me about hammer", "create_quiz")
+
+    assert cache.get_stats().entries == 0
+
+
+def test_unusable_cache_dir_is_miss(tmp_path):
+    (tmp_path / "file").write_text("not a directory")
+    cache = ResponseCache(tmp_path / "file", LLM_CONFIG, ttl=3600, max_entries=2)
+
+    cache.put("pattern", "input", "response")
+
+    assert cache.get("pattern", "input") is None
+    assert cache.get_stats() == CacheStats(hits=0, misses=1, entries=0)
+    cache.close()
+
+
+def test_corrupt_cache_file_is_miss(tmp_path):
+    (tmp_path / RESPONSE_CACHE_FILE_NAME).write_bytes(b"not a database" * 100)
+    cache = ResponseCache(tmp_path, LLM_CONFIG, ttl=3600, max_entries=2)
+
+    assert cache.get("pattern", "input") is None
+    assert cache.get_stats().entries == 0
+    cache.close()
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.routing import (
+    PatternIndex,
+    PatternMatcher,
+    group_by_category,
+    normalize_pattern_name,
+    tokenize,
+)
+
+TOOL_NAMES = [
+    "clean_text",
+    "create_stride_threat_model",
+    "improve_writing",
+    "summarize",
+    "summarize_git_changes",
+    "summarize_git_diff",
+    "write_pull_request",
+]
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("improve_writing", "improve_writing"),
+        ("Improve  Writing:", "improve_writing"),
+        ("write_pull-request", "write_pull_request"),
+    ],
+)
+def test_normalize_pattern_name(name, expected):
+    assert normalize_pattern_name(name) == expected
+
+
+@pytest.mark.parametrize(
+    "instruction,expected",
+    [
+        ("/fabric improve_writing", "improve_writing"),
+        ("/fabric improve writing", "improve_writing"),
+        ("/fabric clean text:", "clean_text"),
+        ("/FABRIC Write Pull-Request", "write_pull_request"),
+        ("/fabric create stride", "create_stride_threat_model"),
+        ("/fabric summarize", "summarize"),
+        ("/fabric summarize git", None),
+        ("/fabric clean text and improve writing", None),
+        ("/fabric improve writ", None),
+        ("/fabric", None),
+        ("/fabricclean text", None),
+        ("clean text", None),
+        ("/fabric clean text\nand improve writing", None),
+    ],
+)
+def test_pattern_matcher(instruction, expected):
+    assert PatternMatcher(TOOL_NAMES).match(instruction) == expected
+
+
+def test_group_by_category():
+    categories = group_by_category(TOOL_NAMES + ["summarize_debate", "create_quiz"], min_size=2)
+
+    assert categories == {
+        "summarize": ["summarize", "summarize_git_changes", "summarize_git_diff", "summarize_debate"],
+        "create": ["create_stride_threat_model", "create_quiz"],
+        "other": ["clean_text", "improve_writing", "write_pull_request"],
+    }
+
+
+@pytest.fixture(scope="module")
+def pattern_index():
+    return PatternIndex.from_fabric_tools(FabricTools(ParrotFakeChatModel()))
+
+
+def test_tokenize():
+    assert tokenize("Improve the writing of summaries") == tokenize("improving write summary")
+
+
+@pytest.mark.parametrize(
+    "instruction,expected",
+    [
+        ("/fabric clean text and improve writing", {"clean_text", "improve_writing"}),
+        ("/fabric create stride threat model, take output of it and create summary", {"create_stride_threat_model"}),
+        ("/fabric write pull request", {"write_pull_request"}),
+        ("/fabric summarize the git diff", {"summarize_git_diff"}),
+    ],
+)
+def test_pattern_index_search(pattern_index, instruction, expected):
+    assert expected.issubset(pattern_index.search(instruction, 5))
+
+
+def test_pattern_index_search_no_match(pattern_index):
+    assert pattern_index.search("/fabric xyzzy", 5) == []
+
+
+def test_pattern_index_search_is_fast(pattern_index):
+    start = time.perf_counter()
+    for _ in range(100):
+        pattern_index.search("/fabric create stride threat model, take output of it and create summary", 10)
+    assert (time.perf_counter() - start) / 100 < 0.001
@@ -0,0 +1,91 @@
+import pytest
+
+from fabric_agent_action.inputs import InputSections
+from fabric_agent_action.llms import LLMConfig
+from fabric_agent_action.routing_cache import RoutingCache, from_templates, to_templates
+
+LLM_CONFIG = LLMConfig(provider="openai", model="gpt-4o", temperature=0)
+
+PR_INPUT = """INSTRUCTION:
+/fabric write pull request
+
+GITHUB PULL REQUEST, NR: 8, AUTHOR: xvnpw, TITLE: Docs
+PR description
+
+GIT DIFF:
+diff --git a/README.md b/README.md
+
+PULL REQUEST COMMENT, ID: 333, AUTHOR: pedro
+looks good
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RoutingCache(tmp_path, LLM_CONFIG, ttl=3600, max_entries=100)
+    yield cache
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    "args,expected",
+    [
+        ({"input": "diff --git a/README.md b/README.md\n"}, {"input": "{{GIT DIFF}}"}),
+        ({"input": "{{GIT DIFF}}"}, {"input": "{{GIT DIFF}}"}),
+        ({"input": "PR description"}, {"input": "{{GITHUB PULL REQUEST}}"}),
+        ({"input": "looks good"}, None),
+        ({"input": "{{call_1}}"}, None),
+        ({"input": "summary of diff"}, None),
+    ],
+)
+def test_to_templates(args, expected):
+    templates = to_templates([{"name": "write_pull_request", "args": args}], InputSections.parse(PR_INPUT))
+    assert templates == (None if expected is None else [{"name": "write_pull_request", "args": expected}])
+
+
+def test_to_templates_keeps_run_pattern_name():
+    tool_calls = [{"name": "run_pattern", "args": {"pattern_name": "summarize", "input": "PR description"}}]
+
+    assert to_templates(tool_calls, InputSections.parse(PR_INPUT)) == [
+        {"name": "run_pattern", "args": {"pattern_name": "summarize", "input": "{{GITHUB PULL REQUEST}}"}}
+    ]
+    assert to_templates(
+        [{"name": "run_pattern", "args": {"pattern_name": "summarize", "input": "summary of diff"}}],
+        InputSections.parse(PR_INPUT),
+    ) is None
+
+
+def test_from_templates():
+    templates = [{"name": "clean_text", "args": {"input": "{{INPUT}}"}}]
+
+    assert from_templates(templates, InputSections.parse("INSTRUCTION:\n/fabric clean\n\nINPUT:\nabc\n")) == [
+        {"name": "clean_text", "args": {"input": "abc"}}
+    ]
+    assert from_templates(templates, InputSections.parse(PR_INPUT)) is None
+
+
+def test_decision_served_after_confirmations(cache):
+    key = cache.get_key(InputSections.parse(PR_INPUT), "fingerprint")
+    templates = [{"name": "write_pull_request", "args": {"input": "{{GIT DIFF}}"}}]
+
+    cache.record(key, templates)
+    assert cache.get(key) is None
+    cache.record(key, templates)
+    assert cache.get(key) == templates
+
+    cache.record(key, [{"name": "summarize_git_diff", "args": {"input": "{{GIT DIFF}}"}}])
+    assert cache.get(key) is None
+
+
+def test_key(cache, tmp_path):
+    sections = InputSections.parse(PR_INPUT)
+    key = cache.get_key(sections, "fingerprint")
+
+    assert cache.get_key(InputSections.parse(PR_INPUT.replace("/fabric write", "/Fabric   WRITE")), "fingerprint") == key
+    assert cache.get_key(sections, "other fingerprint") != key
+    assert cache.get_key(InputSections.parse("INSTRUCTION:\n/fabric write pull request\n\nINPUT:\nabc\n"), "fingerprint") != key
+    assert cache.get_key(InputSections.parse("no instruction"), "fingerprint") is None
+
+    other_model = RoutingCache(tmp_path, LLMConfig(provider="openai", model="gpt-4o-mini", temperature=0), 3600, 100)
+    assert other_model.get_key(sections, "fingerprint") != key
+    other_model.close()
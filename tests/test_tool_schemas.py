@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import ParrotFakeChatModel
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from fabric_agent_action.fabric_tools import FabricTools
+from fabric_agent_action.tool_schemas import ToolSchemaCache, create_structured_tools, get_tool_schemas
+
+
+@pytest.fixture
+def tools():
+    return FabricTools(ParrotFakeChatModel()).get_fabric_tools(check_max_number_of_tools=False)[:3]
+
+
+def test_schemas_equal_generated(tools):
+    assert get_tool_schemas(tools, ToolSchemaCache()) == [convert_to_openai_tool(tool) for tool in tools]
+
+
+def test_warm_cache_skips_generation(tools, tmp_path):
+    cache_file = tmp_path / "schemas.json"
+    cache = ToolSchemaCache()
+    schemas = get_tool_schemas(tools, cache)
+    cache.save(cache_file)
+
+    warm_cache = ToolSchemaCache(cache_file)
+    assert get_tool_schemas(tools, warm_cache) == schemas
+    assert (warm_cache.hits, warm_cache.misses) == (3, 0)
+
+
+def test_cache_invalidated_by_docstring_change(tools, tmp_path):
+    cache_file = tmp_path / "schemas.json"
+    cache = ToolSchemaCache()
+    get_tool_schemas(tools, cache)
+    cache.save(cache_file)
+
+    def clean_text(input: str) -> str:
+        """Changed description
+
+        Args:
+            input: input text
+        """
+        return input
+
+    clean_text.__name__ = tools[0].__name__
+    warm_cache = ToolSchemaCache(cache_file)
+    schema = warm_cache.get(clean_text)
+
+    assert schema["function"]["description"] == "Changed description"
+    assert warm_cache.misses == 1
+
+
+def test_cache_of_other_langchain_version_ignored(tools, tmp_path):
+    cache_file = tmp_path / "schemas.json"
+    cache_file.write_text('{"langchain_core": "0.0.1", "tools": {}}')
+    assert ToolSchemaCache(cache_file).get(tools[0]) == convert_to_openai_tool(tools[0])
+
+
+def test_create_structured_tools(tools):
+    structured_tools = create_structured_tools(tools, get_tool_schemas(tools, ToolSchemaCache()))
+
+    assert all(isinstance(tool, BaseTool) for tool in structured_tools)
+    assert [tool.name for tool in structured_tools] == [tool.__name__ for tool in tools]
+    assert "hammer" in structured_tools[0].invoke({"input": "hammer"})
+    assert "hammer" in asyncio.run(structured_tools[0].ainvoke({"input": "hammer"}))